@@ -2,13 +2,19 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from .routes import submit, leaderboard, health
+from .routes import submit, leaderboard, health, admin
 from .services.storage_service import ensure_database_exists
 from .services.backup_service import (
     ensure_backup_dirs, 
     backup_to_checkpoint,
     periodic_backup_task
 )
+from .services.freeze_service import deadline_freeze_task
+from .services.ingest_service import start_ingest_workers
+from .services.idempotency_service import load_records as load_idempotency_records
+from .utils.admission import SubmitAdmissionMiddleware
+from .utils.body_limit import BodySizeLimitMiddleware
+from .utils.request_decompression import RequestDecompressionMiddleware
 import asyncio
 from pathlib import Path
 
@@ -19,6 +25,16 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# 中间件按注册的相反顺序包裹应用，请求依次经过：CORS → 请求体大小限制 → 提交准入控制 → 解压
+# 解压压缩的提交请求体（gzip / zstd），解压后的大小同样受限制
+app.add_middleware(RequestDecompressionMiddleware)
+
+# 提交准入控制（在接收和解析请求体之前生效，过载时直接返回503）
+app.add_middleware(SubmitAdmissionMiddleware)
+
+# 提交请求体大小限制（在解析请求体之前生效，限制接收的字节数；位于CORS中间件内层，413响应也带CORS头）
+app.add_middleware(BodySizeLimitMiddleware)
+
 # 配置CORS（允许前端跨域访问）
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +48,7 @@ app.add_middleware(
 app.include_router(submit.router)
 app.include_router(leaderboard.router)
 app.include_router(health.router)
+app.include_router(admin.router)
 
 
 # 全局异常处理器
@@ -70,6 +87,18 @@ async def startup_event():
     asyncio.create_task(periodic_backup_task())
     print("✓ 定期备份任务已启动（每12小时执行一次）")
     
+    # 启动截止时间钩子：截止后冻结最终排行榜
+    asyncio.create_task(deadline_freeze_task())
+    print("✓ 截止排行榜冻结任务已启动")
+    
+    # 加载未过期的幂等记录（Idempotency-Key）
+    loaded = load_idempotency_records()
+    print(f"✓ 幂等记录已加载（{loaded} 条）")
+    
+    # 启动提交队列 worker，继续处理上次未处理完的提交
+    recovered = start_ingest_workers(submit.process_queued_submission)
+    print(f"✓ 提交队列已启动（恢复 {recovered} 个未处理的提交）")
+    
     print("✓ 服务启动成功")
 
 
@@ -1,7 +1,14 @@
 from pydantic import BaseModel, Field, ConfigDict, field_validator
-from typing import Dict, Optional, Any, Literal
+from typing import Dict, List, Optional, Any, Literal
 from datetime import datetime
 from .student import StudentInfo
+from ..utils.pagination import MAX_PAGE_SIZE
+
+# 单次批量读取最多包含的操作数
+MAX_BATCH_OPERATIONS = 20
+
+# 单次批量导入最多包含的提交记录数
+MAX_IMPORT_RECORDS = 50000
 
 
 class Metrics(BaseModel):
@@ -30,17 +37,21 @@ class Metrics(BaseModel):
         """支持字典式get方法"""
         return getattr(self, key, default)
     
+    def _fields(self) -> Dict[str, Any]:
+        """所有字段（指标全部是额外字段，直接读取，不经过 model_dump 序列化）"""
+        return {**self.__dict__, **(self.__pydantic_extra__ or {})}
+    
     def items(self):
         """支持字典式items方法"""
-        return self.model_dump().items()
+        return self._fields().items()
     
     def keys(self):
         """支持字典式keys方法"""
-        return self.model_dump().keys()
+        return self._fields().keys()
     
     def values(self):
         """支持字典式values方法"""
-        return self.model_dump().values()
+        return self._fields().values()
     
     def dict(self, **kwargs):
         """兼容旧版Pydantic的dict方法"""
@@ -62,6 +73,27 @@ class SubmissionRequest(BaseModel):
     main_contributor: Literal["human", "ai"] = Field(..., description="作业主要贡献者：human 或 ai")
 
 
+class StoredFile(BaseModel):
+    """multipart 上传的文件（内容保存在文件存储中，按MD5引用）"""
+    md5: str = Field(..., description="文件内容MD5（服务端计算）")
+    size: int = Field(..., description="文件大小（字节）")
+
+
+class UploadedSubmissionRequest(SubmissionRequest):
+    """multipart 上传的提交请求（后端内部使用，file_refs 由服务端根据接收的文件生成）"""
+    file_refs: Dict[str, StoredFile] = Field(default_factory=dict, description="上传的文件，格式: {filename: StoredFile}")
+
+
+class ImportSubmissionRecord(BaseModel):
+    """批量导入的一条提交记录（JSONL 中的一行，作业ID由接口路径指定）"""
+    student_info: StudentInfo
+    metrics: Metrics = Field(..., description="评估指标")
+    checksums: Dict[str, str] = Field(default_factory=dict, description="文件MD5校验和")
+    files: Optional[Dict[str, str]] = Field(None, description="提交的文件内容（可选），格式: {filename: base64_content}")
+    main_contributor: Literal["human", "ai"] = Field(..., description="作业主要贡献者：human 或 ai")
+    timestamp: Optional[str] = Field(None, description="原始提交时间（ISO格式，必须带时区，保存时转换为UTC），不提供时使用导入时间")
+
+
 class CompleteSubmissionData(BaseModel):
     """完整提交数据模型（后端内部使用）"""
     metrics: Metrics
@@ -69,6 +101,7 @@ class CompleteSubmissionData(BaseModel):
     submission_count: int = Field(..., description="提交次数")
     checksums: Optional[Dict[str, str]] = Field(None, description="文件MD5校验和")
     files: Optional[Dict[str, str]] = Field(None, description="提交的文件内容，格式: {filename: base64_content}")
+    file_refs: Optional[Dict[str, StoredFile]] = Field(None, description="multipart 上传的文件（不含内容），格式: {filename: StoredFile}")
     main_contributor: str = Field(..., description="作业主要贡献者：human 或 ai")
 
 
@@ -90,6 +123,16 @@ class SubmissionResponse(BaseModel):
     previous_score: Optional[float] = None
 
 
+class SubmissionValidationResponse(BaseModel):
+    """提交预检（dry-run）响应模型"""
+    valid: bool
+    errors: List[str] = Field(default_factory=list, description="未通过的校验项，valid 为 true 时为空")
+    daily_submissions: int = Field(..., description="今日已提交次数")
+    max_submissions: int = Field(..., description="每日最大提交次数")
+    remaining_submissions: int = Field(..., description="今日剩余提交次数")
+    deadline: Optional[str] = Field(None, description="作业截止时间")
+
+
 class LeaderboardEntry(BaseModel):
     """排行榜条目模型"""
     rank: int
@@ -99,3 +142,29 @@ class LeaderboardEntry(BaseModel):
     timestamp: str
     submission_count: int
 
+
+class BatchReadOperation(BaseModel):
+    """批量读取中的单个读取操作，参数与对应的GET接口一致"""
+    id: Optional[str] = Field(None, description="客户端自定义的操作标识，原样返回")
+    op: Literal[
+        "assignments",
+        "active_assignment",
+        "leaderboard",
+        "students_without_submission",
+        "submissions"
+    ] = Field(..., description="读取操作类型")
+    assignment_id: Optional[str] = Field(None, description="作业编号")
+    student_id: Optional[str] = Field(None, description="学生学号（submissions 操作需要）")
+    limit: Optional[int] = Field(None, ge=1, le=MAX_PAGE_SIZE, description="每页条目数")
+    cursor: Optional[str] = Field(None, description="分页游标")
+    fields: Optional[str] = Field(None, description="字段投影")
+
+
+class BatchReadRequest(BaseModel):
+    """批量读取请求模型"""
+    operations: List[BatchReadOperation] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_OPERATIONS,
+        description="读取操作列表，结果按相同顺序返回"
+    )
@@ -0,0 +1,108 @@
+import hmac
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+
+from ..models.submission import MAX_IMPORT_RECORDS
+from ..services.async_storage import run_io
+from ..services.import_service import import_submissions
+from ..services.schedule_service import assignment_exists
+from ..utils.responses import FastJSONResponse
+
+router = APIRouter(prefix="/api", tags=["admin"])
+
+# 管理接口令牌，未设置时管理接口不可用
+ADMIN_TOKEN = os.environ.get("LEADERBOARD_ADMIN_TOKEN")
+
+# 单次导入请求体的最大字节数（请求体按行缓存在内存中）
+MAX_IMPORT_BYTES = int(os.environ.get("LEADERBOARD_MAX_IMPORT_BYTES", str(64 * 1024 * 1024)))
+
+
+def require_admin(admin_token: Optional[str] = Header(None, alias="X-Admin-Token")) -> None:
+    """校验管理接口令牌（请求头 X-Admin-Token）"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="管理接口未启用：请设置环境变量 LEADERBOARD_ADMIN_TOKEN")
+    if admin_token is None or not hmac.compare_digest(admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="管理接口令牌无效")
+
+
+def _import_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"导入内容过大：单次导入不能超过 {MAX_IMPORT_BYTES // 1024} KB，请分批导入",
+        headers={"Connection": "close"}
+    )
+
+
+async def _read_lines(request: Request) -> List[bytes]:
+    """
+    边接收请求体边按行切分（JSONL）
+
+    超过 MAX_IMPORT_RECORDS 行或 MAX_IMPORT_BYTES 字节时立即返回413
+    （Content-Length 超出时不读取请求体）
+    """
+    try:
+        content_length = int(request.headers.get("content-length", ""))
+    except ValueError:
+        content_length = None
+    if content_length is not None and content_length > MAX_IMPORT_BYTES:
+        raise _import_too_large()
+
+    lines = []
+    # 当前行尚未收到换行符的部分（一行可能跨多个数据块）
+    pending = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_IMPORT_BYTES:
+            raise _import_too_large()
+        parts = chunk.split(b"\n")
+        if len(parts) == 1:
+            pending.append(chunk)
+            continue
+        lines.append(b"".join(pending) + parts[0])
+        lines.extend(parts[1:-1])
+        pending = [parts[-1]]
+        if len(lines) > MAX_IMPORT_RECORDS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"单次导入最多 {MAX_IMPORT_RECORDS} 条记录，请分批导入"
+            )
+    last_line = b"".join(pending)
+    if last_line:
+        lines.append(last_line)
+    return lines
+
+
+@router.post("/admin/assignments/{assignment_id}/import", dependencies=[Depends(require_admin)])
+async def import_assignment_submissions(
+    assignment_id: str,
+    request: Request,
+    atomic: bool = Query(False, description="为true时任一记录校验失败则整批不导入")
+):
+    """
+    批量导入提交记录（重新评分、数据迁移）
+
+    请求体为 JSONL（Content-Type: application/x-ndjson），每行一条提交记录：
+    student_info、metrics、main_contributor，可选 checksums、files、timestamp（原始提交时间）。
+
+    所有记录在一次写锁内校验，通过校验的记录一次性追加到提交历史，
+    排行榜合并后只排序、写入一次；不检查截止时间、提交次数限制和MD5。
+
+    Args:
+        assignment_id: 作业ID
+        atomic: 为true时只要有一条记录失败就不写入任何记录
+
+    Returns:
+        导入报告（导入数量和逐条错误）
+    """
+    if not await run_io(assignment_exists, assignment_id):
+        raise HTTPException(
+            status_code=404,
+            detail=f"无效的作业ID：{assignment_id}，该作业不存在"
+        )
+
+    lines = await _read_lines(request)
+    report = await run_io(import_submissions, assignment_id, lines, atomic)
+    return FastJSONResponse(report)
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
 from datetime import datetime
+from ..services.admission_service import get_admission_stats, get_route_admission_stats
+from ..services.ingest_service import queue_size
+from ..services.size_limit_service import get_limit_stats
 
 router = APIRouter(prefix="/api", tags=["health"])
 
@@ -19,3 +22,34 @@ async def health_check():
         "version": "1.0.0"
     }
 
+
+
+@router.get("/health/admission")
+async def admission_stats():
+    """
+    提交准入控制统计（用于调整并发数和等待队列长度）
+    
+    Returns:
+        各提交路由（解析请求体之前）和各作业的并发处理数、等待队列长度、
+        拒绝/超时次数和平均处理时间，以及提交队列中等待后台处理的数量
+    """
+    return {
+        "routes": get_route_admission_stats(),
+        "assignments": get_admission_stats(),
+        "ingest_queue_size": queue_size(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+@router.get("/health/limits")
+async def upload_limit_stats():
+    """
+    提交大小限制统计
+    
+    Returns:
+        各拒绝原因的次数、拒绝前已接收的字节数、按 Content-Length 直接拒绝的字节数
+    """
+    return {
+        **get_limit_stats(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
@@ -1,72 +1,418 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
-from ..models.submission import LeaderboardEntry
-from ..services.leaderboard_service import get_ranked_leaderboard
+from fastapi import APIRouter, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
+import asyncio
+import base64
+import gzip
+import mimetypes
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import quote
+from typing import List, Dict, Optional, Tuple
+from ..models.submission import LeaderboardEntry, BatchReadRequest, BatchReadOperation
+from ..services.freeze_service import get_frozen_leaderboard, FROZEN_CACHE_CONTROL
+from ..services.storage_service import get_assignments_revision, get_blob_path
+from ..services.version_service import (
+    leaderboard_etag,
+    history_etag,
+    get_leaderboard_version,
+    get_history_version,
+    make_etag
+)
+from ..services.broadcast_service import leaderboard_hub, format_sse
+from ..services.response_cache import response_cache, CachedBody, GZIP_MIN_SIZE
+from ..services.index_service import (
+    get_ranked_view,
+    get_history_view,
+    get_assignment_ids,
+    get_submission_record,
+    get_file_manifest
+)
+from ..services.async_storage import run_io
+from ..utils.helpers import encode_json, hash_string
+from ..utils.http_cache import accepts_gzip, etag_matches
+from ..utils.pagination import MAX_PAGE_SIZE, encode_cursor, decode_cursor
+from ..utils.responses import FastJSONResponse
+from ..utils.projection import LEADERBOARD_FIELDS, SUBMISSION_FIELDS, parse_fields, get_projector
 
 router = APIRouter(prefix="/api", tags=["leaderboard"])
 
+# 版本化响应：允许缓存，但每次使用前必须用ETag向服务器验证
+VERSIONED_CACHE_CONTROL = "no-cache"
+
+# 单次提交中的文件写入后不会再变化（批量导入只追加新的提交序号），允许长期缓存
+SUBMISSION_FILE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# SSE 心跳间隔（秒），防止代理因连接空闲而断开
+SSE_KEEPALIVE_INTERVAL = 15
+
+# 流式返回提交文件时每次解码的base64字符数（必须是4的倍数）
+FILE_STREAM_CHUNK_CHARS = 64 * 1024
+
+# 流式返回 multipart 上传的文件时每次读取的字节数
+FILE_STREAM_CHUNK_SIZE = 64 * 1024
+
+# 长轮询的默认和最长等待时间（秒）
+LONG_POLL_DEFAULT_TIMEOUT = 30
+LONG_POLL_MAX_TIMEOUT = 60
+
+# 批量读取响应每次拼接生成，使用较快的压缩级别
+BATCH_GZIP_LEVEL = 1
+
+# 排行榜响应中携带当前版本号的响应头，长轮询时作为 wait_for_version 参数
+LEADERBOARD_VERSION_HEADER = "X-Leaderboard-Version"
+
+
+def _not_modified(etag: str, extra_headers: Optional[Dict[str, str]] = None) -> Response:
+    """返回304响应（不读取任何存储）"""
+    headers = {"ETag": etag, "Cache-Control": VERSIONED_CACHE_CONTROL}
+    headers.update(extra_headers or {})
+    return Response(status_code=304, headers=headers)
+
+
+def _cached_response(
+    cached: CachedBody,
+    request: Request,
+    extra_headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """直接返回缓存中已编码好的响应字节，客户端支持时返回预压缩的gzip字节"""
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": VERSIONED_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    headers.update(extra_headers or {})
+    if cached.compressible and accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=cached.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def _frozen_response(artifact: Dict, request: Request) -> Response:
+    """直接返回冻结排行榜的预计算字节，不做任何JSON处理"""
+    headers = {
+        "ETag": artifact["etag"],
+        "Cache-Control": FROZEN_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(request.headers.get("if-none-match"), artifact["etag"]):
+        return Response(status_code=304, headers=headers)
+
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=artifact["gzip"], media_type="application/json", headers=headers)
+    return Response(content=artifact["body"], media_type="application/json", headers=headers)
+
+
+def _parse_fields_or_400(fields: Optional[str], allowed) -> Optional[tuple]:
+    """解析字段投影参数，包含不支持的字段时返回400"""
+    try:
+        return parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _decode_cursor_or_400(cursor: Optional[str], key: str) -> int:
+    """解析分页游标，格式无效时返回400"""
+    try:
+        return decode_cursor(cursor, key) or 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 @router.get("/leaderboard/{assignment_id}")
-async def get_leaderboard(assignment_id: str):
+async def get_leaderboard(
+    assignment_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="每页条目数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    fields: Optional[str] = Query(None, description="只返回指定字段，例如 rank,score,student_info.nickname"),
+    wait_for_version: Optional[int] = Query(None, ge=0, description="长轮询：等待排行榜版本与该值不同后再返回"),
+    timeout: float = Query(LONG_POLL_DEFAULT_TIMEOUT, gt=0, le=LONG_POLL_MAX_TIMEOUT, description="长轮询最长等待秒数")
+):
     """
     获取指定作业的排行榜及配置信息
     
+    已截止的作业直接返回冻结的最终排行榜（预计算的JSON/gzip字节，带强ETag和
+    Cache-Control: public, max-age=31536000, immutable）
+    
+    传入 limit 或 cursor 时按排名分页，响应额外包含 total 和 next_cursor
+    （next_cursor 为 null 表示已是最后一页）
+    
+    响应头 X-Leaderboard-Version 为当前排行榜版本。传入 wait_for_version 时
+    挂起请求直到版本与该值不同再返回新的排行榜；超时仍未变化则返回304。
+    服务重启后版本号从0开始，wait_for_version 大于当前版本时立即返回当前排行榜。
+    
     Args:
         assignment_id: 作业ID
+        limit: 每页条目数（分页时默认 MAX_PAGE_SIZE）
+        cursor: 分页游标
+        fields: 逗号分隔的字段列表，只返回排行榜条目中的这些字段
+        wait_for_version: 长轮询时客户端已知的排行榜版本
+        timeout: 长轮询最长等待秒数
         
     Returns:
         包含排行榜列表和作业配置的字典
     """
+    selected_fields, start, limit, view = _leaderboard_query(limit, cursor, fields)
+    if start is None and selected_fields is None:
+        # 已截止的作业：返回冻结的最终排行榜
+        artifact = await run_io(get_frozen_leaderboard, assignment_id)
+        if artifact is not None:
+            return _frozen_response(artifact, request)
+    
+    if wait_for_version is not None:
+        from ..services.storage_service import get_assignment_config
+        
+        # 先确认作业存在，避免无效作业ID挂起到超时
+        if await run_io(get_assignment_config, assignment_id) is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"无效的作业ID：{assignment_id}，该作业不存在"
+            )
+        await leaderboard_hub.wait_for_version(assignment_id, wait_for_version, timeout)
+    
+    # 版本未变化时直接返回304（必须在读取数据之前获取版本）
+    version = (get_leaderboard_version(assignment_id), get_assignments_revision())
+    etag = leaderboard_etag(assignment_id, *version)
+    version_headers = {LEADERBOARD_VERSION_HEADER: str(version[0])}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag, version_headers)
+    if wait_for_version is not None and version[0] == wait_for_version:
+        # 长轮询超时：排行榜没有变化（版本小于 wait_for_version 说明服务已重启，按已变化处理）
+        return _not_modified(etag, version_headers)
+    
+    cached = await _get_leaderboard_cached(assignment_id, version, etag, view, start, limit, selected_fields)
+    return _cached_response(cached, request, version_headers)
+
+
+def _leaderboard_query(
+    limit: Optional[int],
+    cursor: Optional[str],
+    fields: Optional[str]
+) -> Tuple[Optional[tuple], Optional[int], Optional[int], str]:
+    """
+    解析排行榜查询参数
+    
+    Returns:
+        (字段投影, 分页起始位置（不分页时为None）, 每页条目数, 缓存视图名)
+    """
+    selected_fields = _parse_fields_or_400(fields, LEADERBOARD_FIELDS)
+    start = None
+    view = "full"
+    if limit is not None or cursor is not None:
+        start = _decode_cursor_or_400(cursor, "r")
+        limit = limit or MAX_PAGE_SIZE
+        view = f"page:{start}:{limit}"
+    if selected_fields is not None:
+        view += "|" + ",".join(selected_fields)
+    return selected_fields, start, limit, view
+
+
+async def _get_leaderboard_cached(
+    assignment_id: str,
+    version: tuple,
+    etag: str,
+    view: str,
+    start: Optional[int],
+    limit: Optional[int],
+    selected_fields: Optional[tuple]
+) -> CachedBody:
+    """获取排行榜响应字节：优先命中响应缓存，否则在存储线程池中生成并写入缓存"""
+    cache_key = ("leaderboard", assignment_id, view)
+    cached = response_cache.get(cache_key, version)
+    if cached is not None:
+        return cached
+    
+    try:
+        # 读取文件和编码都在存储线程池中完成
+        body = await run_io(_build_leaderboard_body, assignment_id, start, limit, selected_fields)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取排行榜失败: {str(e)}"
+        )
+    
     # 验证作业ID是否存在
+    if body is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"无效的作业ID：{assignment_id}，该作业不存在"
+        )
+    
+    return response_cache.put(cache_key, version, body, etag)
+
+
+def _build_leaderboard_body(
+    assignment_id: str,
+    start: Optional[int],
+    limit: Optional[int],
+    selected_fields: Optional[tuple]
+) -> Optional[bytes]:
+    """
+    生成排行榜响应字节（阻塞，在存储线程池中执行）
+    
+    Args:
+        assignment_id: 作业ID
+        start: 分页起始位置，不分页时为None
+        limit: 每页条目数
+        selected_fields: 字段投影
+        
+    Returns:
+        编码后的响应字节，作业不存在时返回None
+    """
     from ..services.storage_service import get_assignment_config
     
     assignment_config = get_assignment_config(assignment_id)
     if assignment_config is None:
+        return None
+    
+    _, leaderboard = get_ranked_view(assignment_id)
+    if start is not None:
+        page = leaderboard[start:start + limit]
+        end = start + len(page)
+        if selected_fields is not None:
+            page = list(map(get_projector(selected_fields), page))
+        payload = {
+            "leaderboard": page,
+            "config": assignment_config,
+            "total": len(leaderboard),
+            "next_cursor": encode_cursor({"r": end}) if end < len(leaderboard) else None
+        }
+    else:
+        if selected_fields is not None:
+            leaderboard = list(map(get_projector(selected_fields), leaderboard))
+        payload = {
+            "leaderboard": leaderboard,
+            "config": assignment_config
+        }
+    return encode_json(payload)
+
+
+def _build_snapshot_event(assignment_id: str) -> bytes:
+    """生成SSE完整快照事件（阻塞，在存储线程池中执行）"""
+    version, leaderboard = get_ranked_view(assignment_id)
+    return format_sse(
+        "snapshot",
+        encode_json({
+            "assignment_id": assignment_id,
+            "version": version,
+            "leaderboard": leaderboard
+        }),
+        event_id=version
+    )
+
+
+@router.get("/leaderboard/{assignment_id}/stream")
+async def stream_leaderboard(assignment_id: str):
+    """
+    排行榜实时更新（Server-Sent Events）
+    
+    连接建立后先发送一次完整快照（snapshot 事件），之后每次排行榜提交更新时
+    发送增量事件（delta 事件，包含变化的条目和排名发生变化的学生）。
+    客户端应忽略 version 不大于快照 version 的增量事件。
+    
+    Args:
+        assignment_id: 作业ID
+        
+    Returns:
+        text/event-stream 流
+    """
+    from ..services.storage_service import get_assignment_config
+    
+    if await run_io(get_assignment_config, assignment_id) is None:
         raise HTTPException(
             status_code=404,
             detail=f"无效的作业ID：{assignment_id}，该作业不存在"
         )
     
+    # 先订阅再读取快照，保证快照之后的更新不会丢失
+    subscriber = leaderboard_hub.subscribe(assignment_id)
     try:
-        leaderboard = get_ranked_leaderboard(assignment_id)
-        return {
-            "leaderboard": leaderboard,
-            "config": assignment_config
-        }
+        snapshot = await run_io(_build_snapshot_event, assignment_id)
     except Exception as e:
+        leaderboard_hub.unsubscribe(subscriber)
         raise HTTPException(
             status_code=500,
             detail=f"获取排行榜失败: {str(e)}"
         )
+    
+    async def event_stream():
+        try:
+            yield snapshot
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                # None 表示该连接因消费过慢被断开
+                if message is None:
+                    break
+                yield message
+        finally:
+            leaderboard_hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _build_entries_body(assignment_id: str) -> bytes:
+    """编码指定作业的带排名排行榜列表并写入缓存（在存储线程池中执行）"""
+    version, leaderboard = get_ranked_view(assignment_id)
+    body = encode_json(leaderboard)
+    response_cache.put(("leaderboard", assignment_id, "entries"), version, body, "")
+    return body
 
 
 @router.get("/leaderboard")
-async def get_all_leaderboards():
+async def get_all_leaderboards(request: Request):
     """
     获取所有作业的排行榜
+    
+    由各作业已缓存的排行榜字节直接拼接而成，未缓存的作业在线程池中并发加载；
+    整体响应按所有作业排行榜版本组成的复合版本缓存（含gzip压缩结果）
+    
     Returns:
         所有排行榜的字典
     """
     try:
-        from ..services.storage_service import get_all_assignment_ids, get_leaderboard
-        
-        # 获取所有作业ID
-        assignment_ids = get_all_assignment_ids()
-        
-        # 为每个作业获取排行榜
-        result = {}
-        for assignment_id in assignment_ids:
-            leaderboard = get_leaderboard(assignment_id)
-            
-            # 为每个排行榜添加排名
-            ranked_leaderboard = []
-            for idx, entry in enumerate(leaderboard):
-                ranked_entry = entry.copy()
-                ranked_entry['rank'] = idx + 1
-                ranked_leaderboard.append(ranked_entry)
-            result[assignment_id] = ranked_leaderboard
-        
-        return result
+        # 获取所有作业ID及其排行榜版本（复合版本）
+        assignment_ids = get_assignment_ids()
+        version = tuple(
+            (assignment_id, get_leaderboard_version(assignment_id))
+            for assignment_id in assignment_ids
+        )
+        etag = make_etag("lbs", hash_string(repr(version), "sha1")[:16])
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return _not_modified(etag)
+        
+        cache_key = ("leaderboard", "*", "full")
+        cached = response_cache.get(cache_key, version)
+        if cached is not None:
+            return _cached_response(cached, request)
+        
+        # 复用各作业已编码的排行榜，只加载版本已变化的作业
+        bodies = {}
+        cold_ids = []
+        for assignment_id, assignment_version in version:
+            entries = response_cache.get(("leaderboard", assignment_id, "entries"), assignment_version)
+            if entries is not None:
+                bodies[assignment_id] = entries.body
+            else:
+                cold_ids.append(assignment_id)
+        
+        if cold_ids:
+            loaded = await asyncio.gather(*(run_io(_build_entries_body, aid) for aid in cold_ids))
+            bodies.update(zip(cold_ids, loaded))
+        
+        # 直接拼接JSON字节，不再重新编码各排行榜
+        body = b"{" + b",".join(
+            encode_json(assignment_id) + b":" + bodies[assignment_id]
+            for assignment_id in assignment_ids
+        ) + b"}"
+        return _cached_response(response_cache.put(cache_key, version, body, etag), request)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -75,51 +421,243 @@ async def get_all_leaderboards():
 
 
 @router.get("/submissions/{student_id}/{assignment_id}")
-async def get_student_submissions(student_id: str, assignment_id: str):
+async def get_student_submissions(
+    student_id: str,
+    assignment_id: str,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="每页条目数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    fields: Optional[str] = Query(None, description="只返回指定字段，例如 submission_data.metrics")
+):
     """
     获取指定学生在指定作业的所有提交记录
     
+    传入 limit 或 cursor 时分页返回 {"submissions", "total", "next_cursor"}，
+    游标记录的是提交序号（submission_count），新提交不会影响后续页
+    
     Args:
         student_id: 学生ID
         assignment_id: 作业ID
+        limit: 每页条目数（分页时默认 MAX_PAGE_SIZE）
+        cursor: 分页游标
+        fields: 逗号分隔的字段列表，只返回提交记录中的这些字段
         
     Returns:
         该学生的所有提交记录（按时间倒序）
     """
-    # 验证作业ID是否存在
-    from ..services.storage_service import get_assignment_config
+    selected_fields, before_count, limit, view = _history_query(limit, cursor, fields)
     
-    assignment_config = get_assignment_config(assignment_id)
-    if assignment_config is None:
+    # 提交历史未变化时直接返回304
+    version = get_history_version(student_id, assignment_id)
+    etag = history_etag(student_id, assignment_id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    
+    cached = await _get_history_cached(
+        student_id, assignment_id, version, etag, view, before_count, limit, selected_fields
+    )
+    return _cached_response(cached, request)
+
+
+def _history_query(
+    limit: Optional[int],
+    cursor: Optional[str],
+    fields: Optional[str]
+) -> Tuple[Optional[tuple], Optional[int], Optional[int], str]:
+    """
+    解析提交历史查询参数
+    
+    Returns:
+        (字段投影, 游标中的提交序号（不分页时为None）, 每页条目数, 缓存视图名)
+    """
+    selected_fields = _parse_fields_or_400(fields, SUBMISSION_FIELDS)
+    before_count = None
+    view = "full"
+    if limit is not None or cursor is not None:
+        before_count = _decode_cursor_or_400(cursor, "s")
+        limit = limit or MAX_PAGE_SIZE
+        view = f"page:{before_count}:{limit}"
+    if selected_fields is not None:
+        view += "|" + ",".join(selected_fields)
+    return selected_fields, before_count, limit, view
+
+
+async def _get_history_cached(
+    student_id: str,
+    assignment_id: str,
+    version: int,
+    etag: str,
+    view: str,
+    before_count: Optional[int],
+    limit: Optional[int],
+    selected_fields: Optional[tuple]
+) -> CachedBody:
+    """获取提交历史响应字节：优先命中响应缓存，否则在存储线程池中生成并写入缓存"""
+    cache_key = ("history", student_id, assignment_id, view)
+    cached = response_cache.get(cache_key, version)
+    if cached is not None:
+        return cached
+    
+    try:
+        body = await run_io(
+            _build_history_body, student_id, assignment_id, before_count, limit, selected_fields
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取提交记录失败: {str(e)}"
+        )
+    
+    # 验证作业ID是否存在
+    if body is None:
         raise HTTPException(
             status_code=404,
             detail=f"无效的作业ID：{assignment_id}，该作业不存在"
         )
     
-    try:
-        from ..services.storage_service import get_all_submissions_for_assignment
-        
-        # 获取该作业的所有提交记录
-        all_submissions = get_all_submissions_for_assignment(assignment_id)
+    return response_cache.put(cache_key, version, body, etag)
+
+
+def _build_history_body(
+    student_id: str,
+    assignment_id: str,
+    before_count: Optional[int],
+    limit: Optional[int],
+    selected_fields: Optional[tuple]
+) -> Optional[bytes]:
+    """
+    生成提交历史响应字节（阻塞，在存储线程池中执行）
+    
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        before_count: 分页游标中的提交序号，不分页时为None
+        limit: 每页条目数
+        selected_fields: 字段投影
         
-        # 筛选该学生的提交记录
-        student_submissions = [
-            sub for sub in all_submissions
-            if sub['student_info']['student_id'] == student_id
-        ]
+    Returns:
+        编码后的响应字节，作业不存在时返回None
+    """
+    from ..services.storage_service import get_assignment_config
+    
+    if get_assignment_config(assignment_id) is None:
+        return None
+    
+    # 该学生的提交记录（内存索引，已按提交序号倒序排列）
+    student_submissions = get_history_view(student_id, assignment_id)
+    
+    if before_count is not None:
+        # 游标为上一页最后一条的提交序号，本页从序号更小的记录开始
+        start = 0
+        if before_count:
+            start = len(student_submissions)
+            for idx, sub in enumerate(student_submissions):
+                if sub['submission_data']['submission_count'] < before_count:
+                    start = idx
+                    break
+        page = student_submissions[start:start + limit]
+        has_more = start + len(page) < len(student_submissions)
+        next_cursor = None
+        if page and has_more:
+            next_cursor = encode_cursor({"s": page[-1]['submission_data']['submission_count']})
+        if selected_fields is not None:
+            page = list(map(get_projector(selected_fields), page))
+        payload = {
+            "submissions": page,
+            "total": len(student_submissions),
+            "next_cursor": next_cursor
+        }
+    else:
+        payload = student_submissions
+        if selected_fields is not None:
+            payload = list(map(get_projector(selected_fields), payload))
+    
+    return encode_json(payload)
+
+
+def _iter_base64_chunks(base64_content: str):
+    """分块解码base64内容，避免一次性生成完整的文件字节"""
+    # 含换行的base64（按行折断）需先去除空白，否则分块边界会错位
+    if "\n" in base64_content:
+        base64_content = "".join(base64_content.split())
+    for offset in range(0, len(base64_content), FILE_STREAM_CHUNK_CHARS):
+        yield base64.b64decode(base64_content[offset:offset + FILE_STREAM_CHUNK_CHARS])
+
+
+def _iter_file_chunks(file_path):
+    """分块读取文件存储中的上传文件"""
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(FILE_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+@router.get("/submissions/{student_id}/{assignment_id}/{submission_count}/files/{filename}")
+async def get_submission_file(
+    student_id: str,
+    assignment_id: str,
+    submission_count: int,
+    filename: str,
+    request: Request
+):
+    """
+    按需获取某次提交中的单个文件内容
+    
+    提交历史接口只返回文件清单（文件名、大小、MD5），文件内容通过该接口流式获取。
+    单次提交的文件不会再变化，因此使用文件MD5作为强ETag并允许长期缓存。
+    
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        submission_count: 提交序号（提交记录中的 submission_count）
+        filename: 文件名
         
-        # 按时间倒序排列
-        student_submissions.sort(
-            key=lambda x: x['submission_data']['timestamp'],
-            reverse=True
+    Returns:
+        文件内容
+    """
+    record = await run_io(get_submission_record, student_id, assignment_id, submission_count)
+    files = record['submission_data'].get('files') if record else None
+    file_refs = record['submission_data'].get('file_refs') if record else None
+    blob_path = None
+    if file_refs and filename in file_refs:
+        # multipart 上传的文件：内容在文件存储中
+        blob_path = get_blob_path(file_refs[filename]["md5"])
+        if not await run_io(blob_path.exists):
+            blob_path = None
+    if blob_path is None and (not files or not files.get(filename)):
+        raise HTTPException(
+            status_code=404,
+            detail=f"未找到提交文件：{filename}"
         )
-        
-        return student_submissions
-    except Exception as e:
+    
+    manifest = next(
+        item for item in await run_io(get_file_manifest, assignment_id, record)
+        if item["filename"] == filename
+    )
+    if manifest["md5"] is None:
         raise HTTPException(
             status_code=500,
-            detail=f"获取提交记录失败: {str(e)}"
+            detail=f"提交文件 {filename} 解码失败"
         )
+    
+    etag = f'"{manifest["md5"]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": SUBMISSION_FILE_CACHE_CONTROL,
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename)}"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    headers["Content-Length"] = str(manifest["size"])
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if blob_path is not None:
+        content = _iter_file_chunks(blob_path)
+    else:
+        content = _iter_base64_chunks(files[filename])
+    return StreamingResponse(content, media_type=media_type, headers=headers)
 
 
 @router.get("/assignments")
@@ -131,15 +669,9 @@ async def get_all_assignments() -> Dict:
         所有作业的配置信息
     """
     try:
-        from ..services.storage_service import ASSIGNMENTS_FILE, ensure_database_exists
-        import json
-        
-        ensure_database_exists()
-        
-        with open(ASSIGNMENTS_FILE, 'r', encoding='utf-8') as f:
-            assignments = json.load(f)
+        from ..services.storage_service import load_assignments
         
-        return assignments
+        return FastJSONResponse(await run_io(load_assignments))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -147,48 +679,66 @@ async def get_all_assignments() -> Dict:
         )
 
 
+def _active_assignment_payload(state: Dict) -> Dict:
+    """活跃作业响应内容"""
+    active_assignments = state["active"]
+    return {
+        "assignment_id": active_assignments[0] if active_assignments else None,
+        "all_active": active_assignments
+    }
+
+
 @router.get("/active-assignment")
-async def get_active_assignment():
+async def get_active_assignment(request: Request):
     """
     获取当前活跃的作业ID（未过截止时间的第一个作业）
     
+    活跃作业集合由预先解析的截止时间表维护，只在配置变化或到达截止时间时重新计算；
+    支持 If-None-Match / If-Modified-Since 条件请求
+    
     Returns:
         {"assignment_id": "02"} 或 {"assignment_id": null} 如果所有作业都已截止
     """
     try:
-        from ..services.storage_service import get_assignment_config, ASSIGNMENTS_FILE
-        from datetime import datetime
-        import json
-        
-        # 读取所有作业配置
-        with open(ASSIGNMENTS_FILE, 'r', encoding='utf-8') as f:
-            all_assignments = json.load(f)
-        
-        current_time = datetime.utcnow()
-        
-        # 找出所有未截止的作业，并按作业ID排序
-        active_assignments = []
-        for assignment_id, config in all_assignments.items():
-            if 'deadline' in config:
-                # 移除时区信息进行比较
-                deadline_str = config['deadline'].replace('Z', '')
-                deadline = datetime.fromisoformat(deadline_str)
-                if current_time < deadline:
-                    active_assignments.append(assignment_id)
-        
-        # 对作业ID进行排序（数字优先，然后字母）
-        active_assignments.sort()
-        
-        # 返回第一个活跃的作业，如果没有则返回 None
-        return {
-            "assignment_id": active_assignments[0] if active_assignments else None,
-            "all_active": active_assignments
-        }
+        from ..services.schedule_service import get_active_state
+        
+        state = get_active_state()
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"获取活跃作业失败: {str(e)}"
         )
+    
+    headers = {
+        "ETag": state["etag"],
+        "Last-Modified": format_datetime(state["last_modified"], usegmt=True),
+        "Cache-Control": VERSIONED_CACHE_CONTROL
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, state["etag"]):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request.headers.get("if-modified-since"), state["last_modified"]):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(
+        content=encode_json(_active_assignment_payload(state)),
+        media_type="application/json",
+        headers=headers
+    )
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified) -> bool:
+    """判断资源自 If-Modified-Since 之后是否未修改（日期无效时视为已修改）"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None or since.tzinfo is None:
+        return False
+    return last_modified <= since
 
 
 @router.get("/students-without-submission/{assignment_id}")
@@ -202,49 +752,142 @@ async def get_students_without_submission(assignment_id: str):
     Returns:
         未提交学生的学号列表
     """
-    # 验证作业ID是否存在
-    from ..services.storage_service import get_assignment_config
-    from pathlib import Path
+    try:
+        result = await run_io(_compute_students_without_submission, assignment_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取未提交学生列表失败: {str(e)}"
+        )
     
-    assignment_config = get_assignment_config(assignment_id)
-    if assignment_config is None:
+    # 验证作业ID是否存在
+    if result is None:
         raise HTTPException(
             status_code=404,
             detail=f"无效的作业ID：{assignment_id}，该作业不存在"
         )
     
-    try:
-        from ..services.storage_service import ensure_database_exists
-        import json
-        
-        ensure_database_exists()
-        
-        # 读取选课名单 list.json
-        list_file = Path(__file__).parent.parent.parent.parent / "list.json"
-        all_student_ids = set()
-        
-        if list_file.exists():
-            with open(list_file, 'r', encoding='utf-8') as f:
-                students = json.load(f)
-                for student in students:
-                    # 将学号转换为字符串
-                    all_student_ids.add(str(student['学号']))
+    return FastJSONResponse(result)
+
+
+def _compute_students_without_submission(assignment_id: str) -> Optional[Dict]:
+    """
+    获取未提交作业的学生列表（阻塞，在存储线程池中执行）
+    
+    名单和未提交集合由 roster_service 预先计算并增量维护
+    
+    Args:
+        assignment_id: 作业ID
         
-        # 获取已提交的学生
-        leaderboard = get_ranked_leaderboard(assignment_id)
-        submitted_student_ids = set(entry['student_info']['student_id'] for entry in leaderboard)
+    Returns:
+        未提交学生信息，作业不存在时返回None
+    """
+    from ..services.schedule_service import assignment_exists
+    from ..services.roster_service import get_students_without_submission as get_not_submitted
+    
+    if not assignment_exists(assignment_id):
+        return None
+    
+    return get_not_submitted(assignment_id)
+
+
+def _require(operation: BatchReadOperation, *names: str) -> None:
+    """检查批量读取操作的必填参数，缺少时返回400"""
+    for name in names:
+        if not getattr(operation, name):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{operation.op} 操作缺少参数 {name}"
+            )
+
+
+async def _resolve_batch_operation(operation: BatchReadOperation) -> bytes:
+    """
+    执行单个批量读取操作，返回编码好的结果字节
+    
+    排行榜和提交历史直接复用响应缓存中的字节，其余操作复用对应接口的实现
+    
+    Args:
+        operation: 读取操作
         
-        # 找出未提交的学生
-        not_submitted = sorted(list(all_student_ids - submitted_student_ids))
+    Returns:
+        与对应GET接口响应体相同的JSON字节
+    """
+    if operation.op == "assignments":
+        return (await get_all_assignments()).body
+    
+    if operation.op == "active_assignment":
+        from ..services.schedule_service import get_active_state
         
-        return {
-            "assignment_id": assignment_id,
-            "count": len(not_submitted),
-            "student_ids": not_submitted
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"获取未提交学生列表失败: {str(e)}"
+        return encode_json(_active_assignment_payload(get_active_state()))
+    
+    if operation.op == "students_without_submission":
+        _require(operation, "assignment_id")
+        return (await get_students_without_submission(operation.assignment_id)).body
+    
+    if operation.op == "leaderboard":
+        _require(operation, "assignment_id")
+        assignment_id = operation.assignment_id
+        selected_fields, start, limit, view = _leaderboard_query(
+            operation.limit, operation.cursor, operation.fields
         )
+        if start is None and selected_fields is None:
+            artifact = await run_io(get_frozen_leaderboard, assignment_id)
+            if artifact is not None:
+                return artifact["body"]
+        version = (get_leaderboard_version(assignment_id), get_assignments_revision())
+        etag = leaderboard_etag(assignment_id, *version)
+        cached = await _get_leaderboard_cached(assignment_id, version, etag, view, start, limit, selected_fields)
+        return cached.body
+    
+    # submissions
+    _require(operation, "student_id", "assignment_id")
+    student_id, assignment_id = operation.student_id, operation.assignment_id
+    selected_fields, before_count, limit, view = _history_query(
+        operation.limit, operation.cursor, operation.fields
+    )
+    version = get_history_version(student_id, assignment_id)
+    etag = history_etag(student_id, assignment_id, version)
+    cached = await _get_history_cached(
+        student_id, assignment_id, version, etag, view, before_count, limit, selected_fields
+    )
+    return cached.body
 
+
+async def _batch_result(operation: BatchReadOperation) -> bytes:
+    """执行单个操作并编码为结果项，单个操作失败不影响其它操作"""
+    head = {"id": operation.id, "op": operation.op}
+    try:
+        data = await _resolve_batch_operation(operation)
+    except HTTPException as e:
+        return encode_json({**head, "status": e.status_code, "detail": e.detail})
+    except Exception as e:
+        return encode_json({**head, "status": 500, "detail": f"读取失败: {str(e)}"})
+    
+    # 直接拼接已编码的结果字节，不重新解析
+    return encode_json({**head, "status": 200})[:-1] + b',"data":' + data + b"}"
+
+
+@router.post("/batch")
+async def batch_read(batch: BatchReadRequest, request: Request):
+    """
+    批量读取：一次请求执行多个读取操作
+    
+    支持的操作：assignments、active_assignment、leaderboard、
+    students_without_submission、submissions，参数与对应的GET接口一致。
+    各操作并发执行，排行榜和提交历史直接使用响应缓存中的字节。
+    
+    Args:
+        batch: 读取操作列表
+        
+    Returns:
+        {"results": [{"id", "op", "status", "data" | "detail"}, ...]}，顺序与请求一致
+    """
+    results = await asyncio.gather(*(_batch_result(operation) for operation in batch.operations))
+    body = b'{"results":[' + b",".join(results) + b"]}"
+    
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    if len(body) >= GZIP_MIN_SIZE and accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        body = gzip.compress(body, compresslevel=BATCH_GZIP_LEVEL, mtime=0)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,160 +1,568 @@
-from fastapi import APIRouter, HTTPException
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Header, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from typing import Dict, List, Optional, Tuple
+import math
 from ..models.submission import (
     SubmissionRequest,
+    UploadedSubmissionRequest,
     CompleteSubmission,
     CompleteSubmissionData,
-    SubmissionResponse
+    SubmissionResponse,
+    SubmissionValidationResponse
 )
 from ..services.storage_service import (
     is_deadline_passed,
     get_submission_count,
-    get_daily_submission_count,
     save_submission,
-    get_assignment_config,
-    get_student_registered_info,
-    validate_required_files,
-    save_submitted_files
+    save_submitted_files,
+    save_submitted_file_refs,
+    get_assignment_lock
 )
 from ..services.leaderboard_service import update_student_leaderboard
 from ..services.backup_service import check_and_archive_deadline
+from ..services.freeze_service import get_frozen_leaderboard, refreeze_leaderboard
+from ..services.index_service import check_identity, get_registered_identity
+from ..services.async_storage import run_io
+from ..services.ingest_service import (
+    enqueue_submission,
+    notify_enqueued,
+    get_submission_status as get_ingest_status,
+    queue_size
+)
+from ..services import admission_service, idempotency_service, rate_limit_service, size_limit_service
+from ..services.policy_service import AssignmentPolicy, get_policy
+from ..services.schedule_service import get_cached_assignment_config
+from ..services.upload_service import (
+    UploadError,
+    UploadedFile,
+    parse_submission_upload,
+    get_file_refs,
+    save_uploaded_files,
+    close_files
+)
+from ..utils.helpers import get_current_timestamp, hash_string, parse_iso_timestamp
+from ..utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/api", tags=["submission"])
 
+DEADLINE_PASSED_DETAIL = "提交超时：当前时间已超过作业截止时间"
+
 
 @router.post("/submit", response_model=SubmissionResponse)
-async def submit_assignment(submission: SubmissionRequest):
+async def submit_assignment(
+    submission: SubmissionRequest,
+    request: Request,
+    queue: bool = Query(False, description="为true时校验后写入提交队列并立即返回提交ID，由后台处理"),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=idempotency_service.MAX_KEY_LENGTH,
+        description="幂等键：相同的键重试时直接返回首次提交的结果，不会重复记录"
+    )
+):
     """
     提交作业接口
     
-    执行流程：
-    1. 验证作业ID和数据字段
-    2. 检查截止时间
-    3. 校验提交次数限制
-    4. 校验MD5
-    5. 保存提交记录（补全timestamp、submission_count）
-    6. 更新排行榜（根据提交次数和分数比较）
-    7. 返回提交状态信息
+    校验与文件读写都是阻塞操作，在存储线程池中执行，不占用事件循环；
+    同一作业的提交按作业写锁串行处理
+    
+    响应由后端自己构造，直接编码返回，不再按 response_model 重复校验
+    （response_model 仅用于接口文档）
+    
+    queue=true 时：提交校验通过后写入磁盘队列，返回202和 submission_id，
+    之后通过 /api/submit/{submission_id}/status 查询排名和结果
+    
+    带 Idempotency-Key 请求头时：成功的响应按键保存（默认24小时），
+    使用同一个键重试会直接重放首次的响应（响应头 Idempotent-Replayed: true）；
+    同一个键用于不同内容的提交返回422，相同键的请求仍在处理中返回409
+    
+    请求体超过作业配置的 upload_limits.max_body_bytes 时返回413
+    （接收时只能按全部作业中最宽松的限制检查，解析出作业ID后再按作业的限制检查）
     """
+    body_bytes = request.scope.get("state", {}).get(size_limit_service.BODY_BYTES_STATE_KEY, 0)
+    return await _handle_submit(submission, queue, idempotency_key, body_bytes=body_bytes)
+
+
+@router.post("/submit/upload", response_model=SubmissionResponse)
+async def submit_assignment_upload(
+    request: Request,
+    queue: bool = Query(False, description="为true时校验后写入提交队列并立即返回提交ID，由后台处理"),
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=idempotency_service.MAX_KEY_LENGTH,
+        description="幂等键：相同的键重试时直接返回首次提交的结果，不会重复记录"
+    )
+):
+    """
+    提交作业接口（multipart/form-data 版本）
     
-    # 步骤0: 验证作业ID是否存在
-    assignment_config = get_assignment_config(submission.assignment_id)
-    if assignment_config is None:
+    与 /api/submit 相同，但文件不再以Base64放在JSON中：
+    - submission 字段：JSON（student_info、assignment_id、metrics、checksums、main_contributor）
+    - 每个提交文件一个文件部分，文件名即提交的文件名
+    
+    文件内容边接收边写入临时文件并计算MD5，不会把整个请求体缓冲在内存中；
+    上传文件的MD5由服务端计算，覆盖 checksums 中同名文件的值。
+    通过校验后临时文件分块复制到文件存储，提交记录只引用文件名、大小和MD5，
+    处理过程中不会生成文件的Base64内容
+    """
+    try:
+        metadata, files = await parse_submission_upload(request.headers.get("content-type", ""), request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    try:
+        submission = _build_uploaded_submission(metadata, files)
+        return await _handle_submit(submission, queue, idempotency_key, files)
+    finally:
+        await run_io(close_files, files)
+
+
+@router.post("/submit/validate", response_model=SubmissionValidationResponse)
+async def validate_submission_dry_run(submission: SubmissionRequest):
+    """
+    提交预检接口（dry-run）
+    
+    请求体与 /api/submit 相同，执行与正式提交相同的校验（作业ID、身份绑定、指标、
+    截止时间、MD5、必需文件、今日剩余提交次数），但不写入任何数据、不消耗提交次数和频率配额。
+    全部校验都基于内存索引，返回所有未通过的校验项和今日剩余提交次数。
+    
+    作业不存在时返回400；同一学生预检过于频繁时返回429和 Retry-After
+    （令牌桶与提交分开计算）；其余校验结果都在响应的 errors 中，状态码为200
+    """
+    retry_after = rate_limit_service.acquire_validate_token(submission.student_info.student_id, submission.assignment_id)
+    if retry_after is not None:
+        raise _too_many_requests(retry_after)
+    return FastJSONResponse(await run_io(check_submission, submission))
+
+
+def check_submission(submission: SubmissionRequest) -> Dict:
+    """
+    预检一次作业提交（阻塞，只读）
+    
+    与 validate_submission 使用同一份编译后的作业规则，区别在于：
+    - 身份绑定从内存索引读取，不遍历提交记录
+    - 截止后不触发归档和冻结
+    - 不在第一个错误处停止，返回全部未通过的校验项
+    
+    Args:
+        submission: 提交请求
+        
+    Returns:
+        预检结果（SubmissionValidationResponse 的字段）
+        
+    Raises:
+        HTTPException: 作业不存在（400）
+    """
+    policy = get_policy(submission.assignment_id)
+    if policy is None:
         raise HTTPException(
             status_code=400,
             detail=f"无效的作业ID：{submission.assignment_id}，该作业不存在"
         )
     
-    # 步骤0.0: 验证学生信息是否与注册信息一致
-    # 检查student_id、name和nickname三者是否都匹配
-    registered_info = get_student_registered_info(submission.student_info.student_id)
-    if registered_info is not None:
-        # 该学生ID已经提交过，需要验证name和nickname是否都一致
-        mismatches = []
-        
-        if registered_info['name'] != submission.student_info.name:
-            mismatches.append(f"姓名（已绑定: '{registered_info['name']}'，当前提交: '{submission.student_info.name}'）")
-        
-        # 比较nickname，需要处理None的情况
-        registered_nickname = registered_info.get('nickname')
-        submitted_nickname = submission.student_info.nickname
-        if registered_nickname != submitted_nickname:
-            mismatches.append(f"昵称（已绑定: '{registered_nickname}'，当前提交: '{submitted_nickname}'）")
-        
-        if mismatches:
-            raise HTTPException(
-                status_code=403,
-                detail=f"身份验证失败：学生ID '{submission.student_info.student_id}' 的信息不匹配。{'; '.join(mismatches)}。学生信息一经绑定不可修改，请使用首次提交时的信息。"
-            )
-    # 如果是首次提交（registered_info is None），则接受并记录该student_info的所有内容
+    student_id = submission.student_info.student_id
+    errors = []
     
-    # 步骤0.1: 验证所有必需的指标字段是否存在（根据assignment配置动态确定）
-    # 从assignment配置中获取需要的指标
-    required_metrics = list(assignment_config.get("metrics", {}).keys()) if assignment_config else []
+    daily_submissions = rate_limit_service.peek_daily_count(student_id, submission.assignment_id)
+    if daily_submissions >= policy.max_submissions:
+        errors.append(_daily_limit_error(policy.config).detail)
     
-    # 如果配置中没有metrics，则使用默认的指标
-    if not required_metrics:
-        required_metrics = ["MAE", "MSE", "RMSE", "Prediction_Time"]
+    checks = (
+        check_identity(submission.student_info, get_registered_identity(student_id)),
+        policy.check_metrics(submission.metrics.model_dump()),
+        DEADLINE_PASSED_DETAIL if is_deadline_passed(submission.assignment_id) else None
+    )
+    errors.extend(error for error in checks if error is not None)
+    errors.extend(_check_files(policy, submission))
     
-    metrics_dict = submission.metrics.dict()
-    missing_metrics = []
-    invalid_metrics = []
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "daily_submissions": daily_submissions,
+        "max_submissions": policy.max_submissions,
+        "remaining_submissions": max(0, policy.max_submissions - daily_submissions),
+        "deadline": policy.config.get("deadline")
+    }
+
+
+def _build_uploaded_submission(metadata: Dict, files: Dict[str, UploadedFile]) -> UploadedSubmissionRequest:
+    """由 multipart 元数据和上传文件构造提交请求（只引用文件，不读取文件内容）"""
+    if "files" in metadata:
+        raise HTTPException(
+            status_code=400,
+            detail="submission 字段中不能包含 files，文件请以文件部分上传"
+        )
     
-    for metric in required_metrics:
-        if metric not in metrics_dict or metrics_dict[metric] is None:
-            missing_metrics.append(metric)
-        else:
-            # 验证指标值是否为有效数字（非负数）
-            value = metrics_dict[metric]
-            if not isinstance(value, (int, float)) or value < 0:
-                invalid_metrics.append(f"{metric}={value}")
+    checksums = metadata.get("checksums")
+    checksums = dict(checksums) if isinstance(checksums, dict) else {}
+    checksums.update({filename: uploaded.md5 for filename, uploaded in files.items()})
     
-    if missing_metrics:
+    try:
+        return UploadedSubmissionRequest.model_validate({
+            **metadata,
+            "checksums": checksums,
+            "file_refs": get_file_refs(files)
+        })
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+async def _handle_submit(
+    submission: SubmissionRequest,
+    queue: bool,
+    idempotency_key: Optional[str],
+    uploads: Optional[Dict[str, UploadedFile]] = None,
+    body_bytes: int = 0
+):
+    """
+    执行提交并构造响应（处理 Idempotency-Key）
+    
+    uploads 为 multipart 上传的文件；body_bytes 为接收的请求体字节数（JSON 提交）
+    """
+    if not idempotency_key:
+        status_code, body = await _submit(submission, queue, uploads, body_bytes)
+        return FastJSONResponse(body, status_code=status_code)
+    
+    key_hash = idempotency_service.make_key_hash(submission.student_info.student_id, idempotency_key)
+    fingerprint = await run_io(_fingerprint, submission, queue)
+    try:
+        record = await run_io(idempotency_service.begin, key_hash, fingerprint)
+    except idempotency_service.IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    if record is not None:
+        return FastJSONResponse(
+            record["body"],
+            status_code=record["status_code"],
+            headers={"Idempotent-Replayed": "true"}
+        )
+    
+    try:
+        status_code, body = await _submit(submission, queue, uploads, body_bytes)
+    except BaseException:
+        # 失败的请求不保存，允许使用同一个键重试
+        await run_io(idempotency_service.finish, key_hash)
+        raise
+    
+    await run_io(idempotency_service.finish, key_hash, fingerprint, status_code, body)
+    return FastJSONResponse(body, status_code=status_code)
+
+
+def _check_upload_limits(submission: SubmissionRequest, assignment_config: Dict, body_bytes: int = 0) -> None:
+    """
+    按作业的限制检查请求体大小、文件数量和每个文件的大小（按Base64长度计算，不解码）
+    
+    BodySizeLimitMiddleware 在接收时只能按全部作业中最宽松的限制检查，
+    body_bytes 为其记录的接收字节数，这里按作业自己的 max_body_bytes 再检查一次
+    """
+    max_body_bytes = size_limit_service.get_upload_limits(assignment_config)[0]
+    if body_bytes > max_body_bytes:
+        size_limit_service.record_rejection(size_limit_service.REASON_BODY, received_bytes=body_bytes)
+        raise HTTPException(status_code=413, detail=size_limit_service.body_too_large_detail(max_body_bytes))
+    
+    files = submission.files or {}
+    violation = size_limit_service.check_files(assignment_config, {
+        filename: size_limit_service.base64_decoded_size(content)
+        for filename, content in files.items()
+    })
+    if violation is not None:
+        reason, detail = violation
+        size_limit_service.record_rejection(reason, received_bytes=sum(map(len, files.values())))
+        raise HTTPException(status_code=413, detail=detail)
+
+
+def _check_rate_limits(submission: SubmissionRequest, assignment_config: Dict) -> None:
+    """
+    提交频率限制（纯内存操作，在任何存储读写之前执行）
+    
+    令牌桶限制短时间内的突发提交（429 + Retry-After）；
+    内存中已确定达到每日上限的直接拒绝
+    """
+    student_id = submission.student_info.student_id
+    retry_after = rate_limit_service.acquire_token(student_id, submission.assignment_id, assignment_config)
+    if retry_after is not None:
+        raise _too_many_requests(retry_after)
+    
+    if rate_limit_service.is_daily_limit_known_reached(student_id, submission.assignment_id, assignment_config):
+        raise _daily_limit_error(assignment_config)
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    """令牌不足的错误（429 + Retry-After，向上取整到秒）"""
+    retry_after = max(1, math.ceil(retry_after))
+    return HTTPException(
+        status_code=429,
+        detail=f"提交过于频繁，请在 {retry_after} 秒后重试",
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
+def _daily_limit_error(assignment_config: Dict) -> HTTPException:
+    """达到每日提交次数上限的错误"""
+    max_submissions = rate_limit_service.get_max_submissions(assignment_config)
+    return HTTPException(
+        status_code=400,
+        detail=f"已达到今日最大提交次数限制（{max_submissions}次/天）"
+    )
+
+
+async def _submit(
+    submission: SubmissionRequest,
+    queue: bool,
+    uploads: Optional[Dict[str, UploadedFile]] = None,
+    body_bytes: int = 0
+) -> Tuple[int, Dict]:
+    """
+    执行提交（同步处理或写入提交队列），返回 (状态码, 响应内容)
+    
+    先做纯内存的频率限制，再经过作业的准入控制：并发处理数和等待队列都满时
+    直接返回503和 Retry-After，不占用存储线程池。
+    整体过载由 SubmitAdmissionMiddleware 在接收请求体之前按路由拒绝，
+    这里的作业级准入控制只限制每个作业同时进行的存储处理
+    """
+    assignment_config = get_cached_assignment_config(submission.assignment_id)
+    if assignment_config is None:
+        # 作业不存在，由后续校验返回错误
+        return await _submit_admitted(submission, queue, uploads)
+    
+    _check_upload_limits(submission, assignment_config, body_bytes)
+    _check_rate_limits(submission, assignment_config)
+    try:
+        async with admission_service.admit(submission.assignment_id, assignment_config):
+            return await _submit_admitted(submission, queue, uploads)
+    except admission_service.AdmissionRejected as e:
         raise HTTPException(
-            status_code=400,
-            detail=f"数据格式错误：缺少必需的指标字段 {', '.join(missing_metrics)}"
+            status_code=503,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def _submit_admitted(
+    submission: SubmissionRequest,
+    queue: bool,
+    uploads: Optional[Dict[str, UploadedFile]] = None
+) -> Tuple[int, Dict]:
+    """已通过准入控制的提交：在存储线程池中校验并处理（或写入提交队列）"""
+    if queue:
+        status = await run_io(_enqueue_validated, submission, uploads)
+        notify_enqueued(status["submission_id"])
+        return 202, _queued_response(status)
+    
+    response = await run_io(_process_submission_locked, submission, None, uploads)
+    return 200, response.model_dump()
+
+
+def _fingerprint(submission: SubmissionRequest, queue: bool) -> str:
+    """请求内容指纹，用于识别同一个幂等键被用于不同的提交"""
+    return hash_string(f"{queue}\n{submission.model_dump_json()}")
+
+
+def _enqueue_validated(submission: SubmissionRequest, uploads: Optional[Dict[str, UploadedFile]] = None) -> Dict:
+    """校验提交并写入提交队列（阻塞；上传的文件在入队前保存到文件存储，队列中只保存引用）"""
+    validate_submission(submission)
+    if uploads:
+        save_uploaded_files(uploads)
+    return enqueue_submission(submission.model_dump())
+
+
+def _queued_response(status: Dict) -> Dict:
+    """排队提交的响应内容"""
+    return {
+        "success": True,
+        "message": "提交已进入处理队列",
+        "submission_id": status["submission_id"],
+        "status": status["status"],
+        "status_url": f"/api/submit/{status['submission_id']}/status",
+        "queue_size": queue_size()
+    }
+
+
+def process_queued_submission(payload: Dict, received_at: Optional[str] = None) -> Dict:
+    """
+    处理队列中的一条提交（阻塞，由后台 worker 在存储线程池中调用）
+    
+    提交时间、截止时间和每日提交次数都以入队时间为准：入队时已通过校验的提交
+    不会因为队列积压到截止时间之后而失败。这样的提交在截止后才写入排行榜时，
+    排行榜可能已经冻结，处理完成后立即重新冻结
+    
+    Args:
+        payload: 入队时保存的提交请求数据
+        received_at: 入队时间（ISO格式，UTC），旧的队列记录可能没有
+        
+    Returns:
+        提交结果（与同步提交接口的响应字段一致）
+    """
+    model = UploadedSubmissionRequest if "file_refs" in payload else SubmissionRequest
+    submission = model.model_validate(payload)
+    response = _process_submission_locked(submission, received_at)
+    if is_deadline_passed(submission.assignment_id):
+        refreeze_leaderboard(submission.assignment_id)
+    return response.model_dump()
+
+
+@router.get("/submit/{submission_id}/status")
+async def get_submission_status(submission_id: str):
+    """
+    查询排队提交的处理状态
+    
+    status 为 queued / processing / completed / failed；
+    completed 时 result 包含排名和提示信息，failed 时 error 包含状态码和原因
+    
+    Args:
+        submission_id: 提交时返回的 submission_id
+        
+    Returns:
+        提交状态
+    """
+    status = await run_io(get_ingest_status, submission_id)
+    if status is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"未找到提交：{submission_id}"
         )
+    return FastJSONResponse(status)
+
+
+def _process_submission_locked(
+    submission: SubmissionRequest,
+    received_at: Optional[str] = None,
+    uploads: Optional[Dict[str, UploadedFile]] = None
+) -> SubmissionResponse:
+    """持有作业写锁处理提交"""
+    with get_assignment_lock(submission.assignment_id):
+        return process_submission(submission, received_at, uploads)
+
+
+def validate_submission(submission: SubmissionRequest, received_at: Optional[str] = None) -> Tuple[AssignmentPolicy, Dict]:
+    """
+    校验一次作业提交（阻塞，不写入任何提交数据）
+    
+    作业规则由 policy_service 预先编译，指标只转换为字典一次，之后的检查都是内存比较。
     
-    if invalid_metrics:
+    执行流程：
+    1. 验证作业ID、学生信息和数据字段
+    2. 检查截止时间
+    3. 校验提交次数限制
+    4. 校验MD5和必需文件
+    
+    Args:
+        submission: 提交请求
+        received_at: 提交的接收时间（ISO格式，UTC），截止时间和每日提交次数按该时间判断，默认为当前时间
+        
+    Returns:
+        (作业规则, 指标字典)
+        
+    Raises:
+        HTTPException: 校验失败
+    """
+    
+    # 步骤0: 验证作业ID是否存在
+    policy = get_policy(submission.assignment_id)
+    if policy is None:
         raise HTTPException(
             status_code=400,
-            detail=f"数据格式错误：指标值必须为非负数 {', '.join(invalid_metrics)}"
+            detail=f"无效的作业ID：{submission.assignment_id}，该作业不存在"
         )
+    assignment_config = policy.config
+    received_time = parse_iso_timestamp(received_at) if received_at else None
+    
+    # 步骤0.0: 校验每日提交次数限制（内存计数，先于其它读取存储的校验）
+    if rate_limit_service.is_daily_limit_reached(
+        submission.student_info.student_id,
+        submission.assignment_id,
+        assignment_config,
+        received_time.date().isoformat() if received_time else None
+    ):
+        raise _daily_limit_error(assignment_config)
+    
+    # 步骤0.1: 验证学生信息是否与注册信息一致（内存身份索引，与预检接口使用同一来源）
+    error = check_identity(submission.student_info, get_registered_identity(submission.student_info.student_id))
+    if error is not None:
+        raise HTTPException(status_code=403, detail=error)
+    
+    # 步骤0.2: 验证所有必需的指标字段是否存在（根据assignment配置动态确定）
+    metrics_dict = submission.metrics.model_dump()
+    error = policy.check_metrics(metrics_dict)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
     
     # 步骤1: 检查截止时间
-    if is_deadline_passed(submission.assignment_id):
+    if is_deadline_passed(submission.assignment_id, received_time):
         # 检查是否需要归档
-        if assignment_config and "deadline" in assignment_config:
+        if "deadline" in assignment_config:
             check_and_archive_deadline(
                 submission.assignment_id,
                 assignment_config["deadline"]
             )
+            # 确保最终排行榜已冻结
+            get_frozen_leaderboard(submission.assignment_id)
         
-        raise HTTPException(
-            status_code=400,
-            detail="提交超时：当前时间已超过作业截止时间"
-        )
+        raise _deadline_error()
     
-    # 步骤2: 校验每日提交次数限制
-    if assignment_config:
-        max_submissions = assignment_config.get("max_submissions", 100)
-        # 获取今日提交次数
-        current_daily_count = get_daily_submission_count(
-            submission.student_info.student_id,
-            submission.assignment_id
-        )
-        
-        if current_daily_count >= max_submissions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"已达到今日最大提交次数限制（{max_submissions}次/天）"
-            )
+    # 步骤3: 校验MD5和必需文件
+    errors = _check_files(policy, submission)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
     
-    # 步骤3: 校验MD5
-    if assignment_config and "checksums" in assignment_config:
-        expected_checksums = assignment_config["checksums"]
-        failed_files = []
-        
-        # 检查所有需要验证的文件
-        for filename, expected_md5 in expected_checksums.items():
-            submitted_md5 = submission.checksums.get(filename, "")
-            
-            if submitted_md5 != expected_md5:
-                failed_files.append(filename)
-        
-        if failed_files:
-            raise HTTPException(
-                status_code=400,
-                detail=f"MD5校验失败：{', '.join(failed_files)} 文件的MD5不匹配"
-            )
+    return policy, metrics_dict
+
+
+def _deadline_error() -> HTTPException:
+    """超过截止时间的错误"""
+    return HTTPException(
+        status_code=400,
+        detail=DEADLINE_PASSED_DETAIL
+    )
+
+
+def _check_files(policy: AssignmentPolicy, submission: SubmissionRequest) -> List[str]:
+    """
+    校验MD5和必需文件（如果作业配置了checksums、required_files）
+    
+    Returns:
+        错误信息列表（MD5在前），全部通过时为空
+    """
+    errors = []
+    failed_files = policy.check_checksums(submission.checksums)
+    if failed_files:
+        errors.append(f"MD5校验失败：{', '.join(failed_files)} 文件的MD5不匹配")
     
-    # 步骤3.1: 验证必需文件（如果作业配置了required_files）
-    missing_files = validate_required_files(submission.assignment_id, submission.files)
+    if isinstance(submission, UploadedSubmissionRequest):
+        # 上传文件按大小判断是否为空，不读取内容
+        submitted_files = {filename: ref.size for filename, ref in submission.file_refs.items()}
+    else:
+        submitted_files = submission.files
+    missing_files = policy.check_required_files(submitted_files)
     if missing_files:
-        raise HTTPException(
-            status_code=400,
-            detail=f"缺少必需的文件：{', '.join(missing_files)}。请确保提交了所有必需的文件。"
-        )
+        errors.append(f"缺少必需的文件：{', '.join(missing_files)}。请确保提交了所有必需的文件。")
+    
+    return errors
+
+
+def process_submission(
+    submission: SubmissionRequest,
+    received_at: Optional[str] = None,
+    uploads: Optional[Dict[str, UploadedFile]] = None
+) -> SubmissionResponse:
+    """
+    处理一次作业提交（阻塞）
+    
+    执行流程：
+    1. 校验提交（validate_submission）
+    2. 保存提交记录（补全timestamp、submission_count）
+    3. 更新排行榜（根据提交次数和分数比较）
+    4. 返回提交状态信息
+    
+    received_at 为排队提交的入队时间：用作提交记录的时间戳，并作为截止时间和每日次数的判断时间；
+    uploads 为 multipart 上传的文件，通过校验后先保存到文件存储，再写入引用它们的提交记录
+    """
+    _, metrics_dict = validate_submission(submission, received_at)
+    if uploads:
+        save_uploaded_files(uploads)
+    file_refs = submission.file_refs if isinstance(submission, UploadedSubmissionRequest) else None
     
     # 步骤4: 保存当前提交
     # 获取提交次数（当前次数 + 1）
@@ -163,8 +571,8 @@ async def submit_assignment(submission: SubmissionRequest):
         submission.assignment_id
     ) + 1
     
-    # 生成时间戳
-    timestamp = datetime.utcnow().isoformat() + "Z"
+    # 生成时间戳（排队提交使用入队时间）
+    timestamp = received_at or get_current_timestamp()
     
     # 构造完整的提交数据（包含文件内容和校验和）
     complete_submission_data = CompleteSubmissionData(
@@ -173,6 +581,7 @@ async def submit_assignment(submission: SubmissionRequest):
         submission_count=submission_count,
         checksums=submission.checksums,
         files=submission.files,
+        file_refs=file_refs,
         main_contributor=submission.main_contributor
     )
     
@@ -185,12 +594,17 @@ async def submit_assignment(submission: SubmissionRequest):
     
     # 保存到提交历史
     save_submission(complete_submission.dict())
+    rate_limit_service.record_submission(
+        submission.student_info.student_id,
+        submission.assignment_id,
+        timestamp[:10]
+    )
     
     # 步骤5: 排名与更新逻辑（先判断是否更新排行榜）
     leaderboard_updated, current_rank, score, previous_score, metric_direction = update_student_leaderboard(
         student_info=submission.student_info.dict(),
         assignment_id=submission.assignment_id,
-        metrics=submission.metrics.dict(),
+        metrics=metrics_dict,
         timestamp=timestamp,
         submission_count=submission_count,
         main_contributor=submission.main_contributor
@@ -218,6 +632,17 @@ async def submit_assignment(submission: SubmissionRequest):
     elif submission.files and not leaderboard_updated:
         print(f"DEBUG: 排行榜未更新（成绩未提升），跳过文件保存")
     
+    if file_refs and leaderboard_updated:
+        try:
+            save_submitted_file_refs(
+                submission.assignment_id,
+                submission.student_info.student_id,
+                {filename: ref.model_dump() for filename, ref in file_refs.items()}
+            )
+        except Exception as e:
+            # 与上面相同：文件保存失败不影响提交
+            print(f"ERROR: 文件保存失败：{str(e)}")
+    
     # 步骤6: 返回提交状态信息
     if submission_count == 1:
         message = "首次提交成功，已加入排行榜"
@@ -243,7 +668,8 @@ async def submit_assignment(submission: SubmissionRequest):
         else:
             message = "提交成功"
     
-    return SubmissionResponse(
+    # 字段均由后端计算得出，跳过重复校验
+    return SubmissionResponse.model_construct(
         success=True,
         message=message,
         submission_count=submission_count,
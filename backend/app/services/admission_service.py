@@ -0,0 +1,209 @@
+import asyncio
+import math
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+# 准入控制默认配置（每个作业独立计算）
+# 作业配置中的 "admission": {"max_in_flight": 4, "max_queue": 32, "queue_timeout": 10} 可覆盖；
+# max_in_flight 为0表示不限制
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get("LEADERBOARD_SUBMIT_MAX_IN_FLIGHT", "4"))
+DEFAULT_MAX_QUEUE = int(os.environ.get("LEADERBOARD_SUBMIT_MAX_QUEUE", "32"))
+DEFAULT_QUEUE_TIMEOUT = float(os.environ.get("LEADERBOARD_SUBMIT_QUEUE_TIMEOUT", "10"))
+
+# 提交路由的准入控制（在接收和解析请求体之前，按路由计算，所有作业共享）
+# 限制同时接收、解析请求体的提交数，过载时在读取请求体之前就返回503
+ROUTE_MAX_IN_FLIGHT = int(os.environ.get("LEADERBOARD_SUBMIT_ROUTE_MAX_IN_FLIGHT", "16"))
+ROUTE_MAX_QUEUE = int(os.environ.get("LEADERBOARD_SUBMIT_ROUTE_MAX_QUEUE", "64"))
+ROUTE_QUEUE_TIMEOUT = float(os.environ.get("LEADERBOARD_SUBMIT_ROUTE_QUEUE_TIMEOUT", str(DEFAULT_QUEUE_TIMEOUT)))
+
+# 平均处理时间的平滑系数（指数移动平均），以及没有样本时使用的初始值（秒）
+SERVICE_TIME_ALPHA = 0.2
+INITIAL_SERVICE_TIME = 0.5
+
+
+class AdmissionRejected(Exception):
+    """提交被准入控制拒绝（等待队列已满或等待超时），调用方返回503"""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Gate:
+    """单个作业的准入状态（只在事件循环中访问，无需加锁）"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.waiters: deque = deque()
+        self.avg_service_time = INITIAL_SERVICE_TIME
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queue_depth = 0
+
+
+# 每个作业的准入状态 {assignment_id: _Gate}
+_gates: Dict[str, _Gate] = {}
+
+# 每个提交路由的准入状态 {path: _Gate}
+_route_gates: Dict[str, _Gate] = {}
+
+
+def get_admission_config(assignment_config: Optional[Dict]) -> Tuple[int, int, float]:
+    """
+    获取作业的准入控制配置
+
+    Args:
+        assignment_config: 作业配置
+
+    Returns:
+        (最大并发处理数, 最大等待数, 最长等待秒数)
+    """
+    admission = (assignment_config or {}).get("admission") or {}
+    return (
+        int(admission.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT)),
+        int(admission.get("max_queue", DEFAULT_MAX_QUEUE)),
+        float(admission.get("queue_timeout", DEFAULT_QUEUE_TIMEOUT))
+    )
+
+
+def _retry_after(gate: _Gate, max_in_flight: int) -> int:
+    """按当前排队长度和平均处理时间估算客户端应等待的秒数"""
+    backlog = gate.in_flight + len(gate.waiters)
+    return max(1, math.ceil(backlog * gate.avg_service_time / max_in_flight))
+
+
+def _release(gate: _Gate) -> None:
+    """释放一个处理名额：有等待者时直接交给队首，否则减少并发计数"""
+    while gate.waiters:
+        waiter = gate.waiters.popleft()
+        if not waiter.done():
+            waiter.set_result(None)
+            return
+    gate.in_flight -= 1
+
+
+@asynccontextmanager
+async def admit(assignment_id: str, assignment_config: Optional[Dict]):
+    """
+    作业级提交准入控制（需在事件循环中使用）
+
+    并发处理数未满时直接进入；否则进入有界等待队列，按先来先到的顺序获得名额。
+    等待队列已满或等待超时时抛出 AdmissionRejected，请求不会占用存储线程池。
+
+    用法:
+        async with admit(assignment_id, config):
+            ...
+
+    Args:
+        assignment_id: 作业ID
+        assignment_config: 作业配置
+
+    Raises:
+        AdmissionRejected: 提交被拒绝（附带建议的 Retry-After 秒数）
+    """
+    async with _admit(_gates, assignment_id, *get_admission_config(assignment_config)):
+        yield
+
+
+@asynccontextmanager
+async def admit_route(path: str):
+    """
+    路由级提交准入控制（需在事件循环中使用，由 SubmitAdmissionMiddleware 在读取请求体之前调用）
+
+    作业ID在请求体中，这里按路由限制同时接收和解析请求体的提交数；
+    解析后仍按作业的配置执行作业级准入控制（admit）
+
+    Args:
+        path: 请求路径
+
+    Raises:
+        AdmissionRejected: 提交被拒绝
+    """
+    async with _admit(_route_gates, path, ROUTE_MAX_IN_FLIGHT, ROUTE_MAX_QUEUE, ROUTE_QUEUE_TIMEOUT):
+        yield
+
+
+@asynccontextmanager
+async def _admit(gates: Dict[str, _Gate], key: str, max_in_flight: int, max_queue: int, queue_timeout: float):
+    """按 key 获取 gates 中的准入状态并等待名额（admit / admit_route 的实现）"""
+    if max_in_flight <= 0:
+        yield
+        return
+
+    gate = gates.get(key)
+    if gate is None:
+        gate = gates[key] = _Gate()
+
+    if gate.in_flight < max_in_flight and not gate.waiters:
+        gate.in_flight += 1
+    else:
+        if len(gate.waiters) >= max_queue:
+            gate.rejected += 1
+            raise AdmissionRejected(_retry_after(gate, max_in_flight), "提交人数过多，请稍后重试")
+
+        waiter = asyncio.get_running_loop().create_future()
+        gate.waiters.append(waiter)
+        gate.queued += 1
+        gate.max_queue_depth = max(gate.max_queue_depth, len(gate.waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done():
+                # 超时的同时刚好获得名额，交给下一个等待者
+                _release(gate)
+            else:
+                waiter.cancel()
+                gate.waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            gate.timed_out += 1
+            raise AdmissionRejected(_retry_after(gate, max_in_flight), "提交排队超时，请稍后重试")
+
+    gate.admitted += 1
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    try:
+        yield
+    finally:
+        elapsed = loop.time() - started
+        gate.avg_service_time += SERVICE_TIME_ALPHA * (elapsed - gate.avg_service_time)
+        _release(gate)
+
+
+def _gate_stats(gate: _Gate) -> Dict:
+    return {
+        "in_flight": gate.in_flight,
+        "queue_depth": len(gate.waiters),
+        "max_queue_depth": gate.max_queue_depth,
+        "admitted": gate.admitted,
+        "queued": gate.queued,
+        "rejected": gate.rejected,
+        "timed_out": gate.timed_out,
+        "avg_service_ms": round(gate.avg_service_time * 1000, 1)
+    }
+
+
+def get_admission_stats() -> Dict[str, Dict]:
+    """
+    各作业的准入控制统计（用于调整配置）
+
+    Returns:
+        {assignment_id: {"in_flight", "queue_depth", "max_queue_depth", "admitted",
+                         "queued", "rejected", "timed_out", "avg_service_ms"}}
+    """
+    return {assignment_id: _gate_stats(gate) for assignment_id, gate in _gates.items()}
+
+
+def get_route_admission_stats() -> Dict[str, Dict]:
+    """
+    各提交路由的准入控制统计
+
+    Returns:
+        {path: 与 get_admission_stats 相同的字段}
+    """
+    return {path: _gate_stats(gate) for path, gate in _route_gates.items()}
@@ -0,0 +1,27 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+# 阻塞式文件读写使用的线程数上限
+STORAGE_IO_WORKERS = int(os.environ.get("LEADERBOARD_IO_WORKERS", "8"))
+
+# 有界线程池：阻塞的文件读写在这里执行，不占用事件循环
+_executor = ThreadPoolExecutor(max_workers=STORAGE_IO_WORKERS, thread_name_prefix="storage-io")
+
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """
+    在存储线程池中执行阻塞函数
+
+    Args:
+        func: 阻塞函数
+        *args: 位置参数
+        **kwargs: 关键字参数
+
+    Returns:
+        函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
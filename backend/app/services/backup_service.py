@@ -4,6 +4,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional, List
 import asyncio
+from .async_storage import run_io
 
 
 # 数据库目录结构
@@ -224,11 +225,11 @@ async def periodic_backup_task():
             print(f"[{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC] 开始定期备份...")
             print("=" * 60)
             
-            # 执行备份
-            backup_to_checkpoint()
+            # 执行备份（阻塞的文件复制放到存储线程池中执行）
+            await run_io(backup_to_checkpoint)
             
             # 清理7天前的旧备份
-            cleanup_old_checkpoints(keep_days=7)
+            await run_io(cleanup_old_checkpoints, keep_days=7)
             
             print("=" * 60)
             print(f"✓ 定期备份完成，下次备份时间: 12小时后")
@@ -0,0 +1,186 @@
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+from ..utils.helpers import encode_json
+from .version_service import get_leaderboard_version
+
+# 每个订阅者最多积压的事件数，超过则视为慢消费者并断开
+DEFAULT_MAX_QUEUE_SIZE = 64
+
+
+def format_sse(event: str, data: bytes, event_id: Optional[Any] = None) -> bytes:
+    """
+    构造一条 Server-Sent Events 消息
+
+    Args:
+        event: 事件名称
+        data: 已编码的JSON数据（不含换行）
+        event_id: 事件ID（可选，这里使用排行榜版本号）
+
+    Returns:
+        SSE消息字节
+    """
+    message = b""
+    if event_id is not None:
+        message += f"id: {event_id}\n".encode("utf-8")
+    message += f"event: {event}\n".encode("utf-8")
+    message += b"data: " + data + b"\n\n"
+    return message
+
+
+class Subscriber:
+    """单个SSE连接的订阅者，持有一个有界的事件队列"""
+
+    def __init__(self, assignment_id: str, max_queue_size: int):
+        self.assignment_id = assignment_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = False
+
+
+class LeaderboardHub:
+    """
+    排行榜事件广播中心
+
+    每个事件只序列化一次，然后把同一份字节放入所有订阅者的队列。
+    队列已满的订阅者会被直接断开（客户端重连后会重新拿到完整快照），
+    不会为慢消费者无限制地缓存事件。
+
+    同时为长轮询请求提供按作业的 asyncio.Condition，每次发布事件时唤醒等待者。
+    """
+
+    def __init__(self, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._conditions: Dict[str, asyncio.Condition] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dropped_count = 0
+
+    def subscribe(self, assignment_id: str) -> Subscriber:
+        """
+        订阅指定作业的排行榜事件（需在事件循环中调用）
+
+        Args:
+            assignment_id: 作业ID
+
+        Returns:
+            订阅者对象
+        """
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(assignment_id, self.max_queue_size)
+        self._subscribers.setdefault(assignment_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """取消订阅"""
+        subscribers = self._subscribers.get(subscriber.assignment_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(subscriber.assignment_id, None)
+
+    def subscriber_count(self, assignment_id: Optional[str] = None) -> int:
+        """获取订阅者数量（不指定作业时返回总数）"""
+        if assignment_id is not None:
+            return len(self._subscribers.get(assignment_id, ()))
+        return sum(len(s) for s in self._subscribers.values())
+
+    def publish(self, assignment_id: str, event: str, data: Any, event_id: Optional[Any] = None) -> None:
+        """
+        发布事件给指定作业的所有订阅者
+
+        可以在事件循环线程或其它线程中调用。
+
+        Args:
+            assignment_id: 作业ID
+            event: 事件名称
+            data: 事件数据（会被编码为JSON，只编码一次）
+            event_id: 事件ID
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        has_subscribers = bool(self._subscribers.get(assignment_id))
+        if not has_subscribers and assignment_id not in self._conditions:
+            return
+
+        # 只有长轮询等待者时不需要编码事件
+        message = format_sse(event, encode_json(data), event_id) if has_subscribers else None
+        if self._in_loop(loop):
+            self._dispatch(assignment_id, message)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, assignment_id, message)
+
+    async def wait_for_version(self, assignment_id: str, after: int, timeout: float) -> int:
+        """
+        等待排行榜版本与客户端已知的版本不同（长轮询，需在事件循环中调用）
+
+        版本已不同时立即返回；否则挂起直到有新事件发布或超时。
+        版本号只保存在进程内存中，服务重启后从0开始：after 大于当前版本说明
+        客户端的版本来自重启前，同样视为已变化，立即返回。
+
+        Args:
+            assignment_id: 作业ID
+            after: 客户端已知的版本
+            timeout: 最长等待秒数
+
+        Returns:
+            返回时的排行榜版本（超时时仍等于 after）
+        """
+        self._loop = asyncio.get_running_loop()
+        condition = self._conditions.get(assignment_id)
+        if condition is None:
+            condition = self._conditions[assignment_id] = asyncio.Condition()
+
+        async with condition:
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: get_leaderboard_version(assignment_id) != after),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+        return get_leaderboard_version(assignment_id)
+
+    @staticmethod
+    def _in_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        """当前线程是否正在运行该事件循环"""
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _dispatch(self, assignment_id: str, message: Optional[bytes]) -> None:
+        """在事件循环线程中分发事件：推送给SSE订阅者并唤醒长轮询等待者"""
+        if message is not None:
+            self._fanout(assignment_id, message)
+        condition = self._conditions.get(assignment_id)
+        if condition is not None:
+            asyncio.ensure_future(self._notify(condition))
+
+    @staticmethod
+    async def _notify(condition: asyncio.Condition) -> None:
+        """唤醒某个作业的所有长轮询等待者"""
+        async with condition:
+            condition.notify_all()
+
+    def _fanout(self, assignment_id: str, message: bytes) -> None:
+        """把同一份消息放入所有订阅者队列，队列已满的订阅者直接断开"""
+        for subscriber in list(self._subscribers.get(assignment_id, ())):
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        """断开慢消费者：清空其队列并放入结束标记"""
+        subscriber.dropped = True
+        self.unsubscribe(subscriber)
+        self.dropped_count += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+
+# 全局排行榜广播中心
+leaderboard_hub = LeaderboardHub()
@@ -0,0 +1,255 @@
+import gzip
+import json
+import os
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from .storage_service import DATABASE_DIR, get_assignment_lock, is_deadline_passed
+from .leaderboard_service import get_ranked_leaderboard
+from .version_service import get_leaderboard_version, get_process_epoch
+from .schedule_service import (
+    get_active_state,
+    get_cached_assignment_config,
+    get_passed_assignment_ids,
+    seconds_until_next_deadline
+)
+from .async_storage import run_io
+from ..utils.helpers import encode_json, compute_etag, get_current_timestamp
+
+# 截止后冻结的最终排行榜目录
+FINAL_DIR = DATABASE_DIR / "final"
+
+# 冻结排行榜是截止后的最终结果，允许长期缓存
+# 冻结记录了排行榜版本，截止后排行榜仍被修改（截止前入队的提交、批量导入）时会重新冻结并更换ETag
+FROZEN_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 已加载到内存的冻结排行榜 {assignment_id: artifact}
+# artifact 格式: {"body": bytes, "gzip": bytes, "etag": str, "deadline": str, "frozen_at": str,
+#                 "content_hash": 排行榜和配置的哈希, "epoch": 冻结时的进程标识, "leaderboard_version": 冻结时的排行榜版本}
+_frozen_artifacts: Dict[str, Dict] = {}
+
+# meta 文件中保存的字段
+_META_FIELDS = ("etag", "deadline", "frozen_at", "content_hash", "epoch", "leaderboard_version")
+
+# 冻结过程（读取排行榜、写入文件）需要串行化，避免定时任务和读请求同时冻结
+_freeze_lock = threading.RLock()
+
+
+def get_frozen_files(assignment_id: str) -> Dict[str, Path]:
+    """
+    获取指定作业冻结排行榜的文件路径
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        包含 body / gzip / meta 三个路径的字典
+    """
+    return {
+        "body": FINAL_DIR / f"leaderboard_{assignment_id}.json",
+        "gzip": FINAL_DIR / f"leaderboard_{assignment_id}.json.gz",
+        "meta": FINAL_DIR / f"leaderboard_{assignment_id}.meta.json",
+    }
+
+
+def _write_bytes_atomic(path: Path, content: bytes) -> None:
+    """先写临时文件再替换，避免读到写了一半的文件"""
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def freeze_leaderboard(assignment_id: str, previous: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    将指定作业的排行榜冻结为不可变的最终结果（JSON + gzip + 强ETag）
+
+    持有作业写锁读取排行榜并写入冻结文件：截止前通过校验、仍在写入的提交会先完成，
+    冻结结果不会漏掉它。冻结时的排行榜版本记录在 artifact 和 meta 文件中，
+    之后排行榜再被修改（版本变化）时由 get_frozen_leaderboard 重新冻结。
+    排行榜和作业配置都没有变化时沿用 previous 的内容、冻结时间和ETag，只更新版本。
+
+    Args:
+        assignment_id: 作业ID
+        previous: 之前冻结的 artifact（可选）
+
+    Returns:
+        冻结后的 artifact，作业不存在时返回None
+    """
+    config = get_cached_assignment_config(assignment_id)
+    if config is None:
+        return None
+
+    with get_assignment_lock(assignment_id):
+        leaderboard_version = get_leaderboard_version(assignment_id)
+        leaderboard = get_ranked_leaderboard(assignment_id)
+        content_hash = compute_etag(encode_json({"leaderboard": leaderboard, "config": config}))
+
+        if previous is not None and previous.get("content_hash") == content_hash:
+            artifact = {**previous, "epoch": get_process_epoch(), "leaderboard_version": leaderboard_version}
+        else:
+            payload = {
+                "leaderboard": leaderboard,
+                "config": config,
+                "frozen_at": get_current_timestamp()
+            }
+            body = encode_json(payload)
+            artifact = {
+                "body": body,
+                "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+                "etag": compute_etag(body),
+                "deadline": config.get("deadline"),
+                "frozen_at": payload["frozen_at"],
+                "content_hash": content_hash,
+                "epoch": get_process_epoch(),
+                "leaderboard_version": leaderboard_version
+            }
+
+            FINAL_DIR.mkdir(parents=True, exist_ok=True)
+            files = get_frozen_files(assignment_id)
+            _write_bytes_atomic(files["body"], artifact["body"])
+            _write_bytes_atomic(files["gzip"], artifact["gzip"])
+            print(f"✓ 作业 [{assignment_id}] 最终排行榜已冻结（{len(leaderboard)} 名学生）")
+
+        # meta 最后写入，作为冻结完成的标志
+        meta = {key: artifact[key] for key in _META_FIELDS}
+        _write_bytes_atomic(
+            get_frozen_files(assignment_id)["meta"],
+            json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8")
+        )
+
+    _frozen_artifacts[assignment_id] = artifact
+    return artifact
+
+
+def _load_frozen_from_disk(assignment_id: str) -> Optional[Dict]:
+    """从磁盘加载冻结的排行榜，不存在或损坏时返回None"""
+    files = get_frozen_files(assignment_id)
+    if not files["meta"].exists():
+        return None
+
+    try:
+        with open(files["meta"], 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(files["body"], 'rb') as f:
+            body = f.read()
+        with open(files["gzip"], 'rb') as f:
+            gzip_body = f.read()
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    artifact = {key: meta.get(key) for key in _META_FIELDS}
+    artifact.update({"body": body, "gzip": gzip_body, "etag": meta["etag"]})
+    return artifact
+
+
+def _is_current(artifact: Dict, assignment_id: str, deadline: Optional[str]) -> bool:
+    """
+    冻结结果是否仍是最新的：截止时间未变，且冻结后排行榜没有再被修改
+
+    版本号只在同一个进程内有效，其他进程冻结的结果（服务重启前）需要重新核对一次
+    """
+    return (
+        artifact["deadline"] == deadline
+        and artifact["epoch"] == get_process_epoch()
+        and artifact["leaderboard_version"] == get_leaderboard_version(assignment_id)
+    )
+
+
+def get_frozen_leaderboard(assignment_id: str) -> Optional[Dict]:
+    """
+    获取已截止作业的冻结排行榜，必要时在此刻完成冻结
+
+    截止时间与冻结时记录的不一致（例如截止时间被延后后又截止），或冻结后排行榜
+    又被修改（截止前入队的提交、批量导入）时重新冻结，保证不会返回过期的结果。
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        冻结的 artifact；作业不存在或未截止时返回None
+    """
+    if not is_deadline_passed(assignment_id):
+        return None
+
+    # 读取请求每次都会执行，使用随截止时间表缓存的作业配置，不读取配置文件
+    deadline = (get_cached_assignment_config(assignment_id) or {}).get("deadline")
+
+    artifact = _frozen_artifacts.get(assignment_id)
+    if artifact is not None and _is_current(artifact, assignment_id, deadline):
+        return artifact
+
+    # 先获取作业写锁再获取冻结锁（提交校验持有作业写锁时也会调用这里）
+    with get_assignment_lock(assignment_id), _freeze_lock:
+        artifact = _frozen_artifacts.get(assignment_id)
+        if artifact is None:
+            artifact = _load_frozen_from_disk(assignment_id)
+            if artifact is not None:
+                _frozen_artifacts[assignment_id] = artifact
+
+        if artifact is not None and _is_current(artifact, assignment_id, deadline):
+            return artifact
+
+        return freeze_leaderboard(assignment_id, artifact)
+
+
+def refreeze_leaderboard(assignment_id: str) -> Optional[Dict]:
+    """
+    排行榜在截止后被修改（例如批量导入重新评分的结果）时立即重新冻结
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        新的 artifact；作业未截止时返回None
+    """
+    if not is_deadline_passed(assignment_id):
+        return None
+
+    with get_assignment_lock(assignment_id), _freeze_lock:
+        return freeze_leaderboard(assignment_id, _frozen_artifacts.get(assignment_id))
+
+
+def freeze_passed_deadlines() -> int:
+    """
+    检查所有作业，冻结已截止但尚未冻结的排行榜
+
+    Returns:
+        本次新冻结的作业数量
+    """
+    frozen_count = 0
+    for assignment_id in get_passed_assignment_ids():
+        if assignment_id in _frozen_artifacts:
+            continue
+        if get_frozen_leaderboard(assignment_id) is not None:
+            frozen_count += 1
+
+    return frozen_count
+
+
+async def deadline_freeze_task(interval: int = 60):
+    """
+    截止时间钩子：在每个截止时间到达时切换活跃作业并冻结刚截止的作业排行榜
+
+    按截止时间表休眠到下一个截止时间；最长每 interval 秒醒来一次，
+    以便发现作业配置文件中被修改的截止时间。
+
+    Args:
+        interval: 最长检查间隔（秒）
+    """
+    while True:
+        try:
+            # 刷新活跃作业集合，再冻结刚截止的作业
+            get_active_state()
+            await run_io(freeze_passed_deadlines)
+        except Exception as e:
+            print(f"❌ 冻结排行榜时出错: {str(e)}")
+
+        try:
+            delay = seconds_until_next_deadline()
+        except Exception:
+            delay = None
+        # 截止判断为严格大于，醒来时稍晚于截止时间
+        await asyncio.sleep(interval if delay is None else min(interval, delay + 0.01))
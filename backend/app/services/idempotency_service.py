@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from .storage_service import DATABASE_DIR, write_json_atomic
+from ..utils.helpers import hash_string
+
+# 幂等记录目录：每个键一个文件，文件名为键的哈希
+IDEMPOTENCY_DIR = DATABASE_DIR / "idempotency"
+
+# 幂等记录保留时间（秒），默认24小时
+IDEMPOTENCY_TTL = int(os.environ.get("LEADERBOARD_IDEMPOTENCY_TTL", str(24 * 3600)))
+
+# 内存中最多保留的记录数，超出时淘汰最早的记录（磁盘记录按TTL清理）
+MAX_MEMORY_RECORDS = 10000
+
+# Idempotency-Key 最大长度
+MAX_KEY_LENGTH = 255
+
+# 清理过期记录的最小间隔（秒）
+PURGE_INTERVAL = 3600
+
+# 内存中的幂等记录 {key_hash: record}，按写入顺序排列
+# record 格式: {"key_hash", "fingerprint", "status_code", "body", "created_at"}
+_records: "OrderedDict[str, Dict]" = OrderedDict()
+
+# 正在处理中的键
+_in_flight: Set[str] = set()
+
+_lock = threading.Lock()
+_last_purge = 0.0
+
+
+class IdempotencyConflict(Exception):
+    """同一个 Idempotency-Key 被用于不同的请求内容（422），或相同键的请求正在处理中（409）"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def make_key_hash(scope: str, key: str) -> str:
+    """
+    计算幂等键的存储哈希（按学生隔离，不同学生使用相同的键互不影响）
+
+    Args:
+        scope: 键的作用域（学生ID）
+        key: 客户端提供的 Idempotency-Key
+
+    Returns:
+        十六进制哈希
+    """
+    return hash_string(f"{scope}\n{key}", "sha256")
+
+
+def _record_file(key_hash: str):
+    return IDEMPOTENCY_DIR / f"{key_hash}.json"
+
+
+def _is_expired(record: Dict, now: float) -> bool:
+    return now - record["created_at"] > IDEMPOTENCY_TTL
+
+
+def load_records() -> int:
+    """
+    从磁盘加载未过期的幂等记录到内存（服务启动时调用）
+
+    Returns:
+        加载的记录数
+    """
+    IDEMPOTENCY_DIR.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    loaded = []
+    for record_file in IDEMPOTENCY_DIR.glob("*.json"):
+        try:
+            with open(record_file, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if _is_expired(record, now):
+            record_file.unlink(missing_ok=True)
+            continue
+        loaded.append(record)
+
+    loaded.sort(key=lambda r: r["created_at"])
+    with _lock:
+        for record in loaded[-MAX_MEMORY_RECORDS:]:
+            _records[record["key_hash"]] = record
+    return len(loaded)
+
+
+def _load_record(key_hash: str) -> Optional[Dict]:
+    """从磁盘读取单条记录（内存记录被淘汰后使用），不存在或损坏时返回None"""
+    try:
+        with open(_record_file(key_hash), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def begin(key_hash: str, fingerprint: str) -> Optional[Dict]:
+    """
+    开始处理带幂等键的请求
+
+    已有记录时返回记录（调用方直接重放响应）；否则把键标记为处理中并返回None，
+    调用方处理完成后必须调用 finish。内存中没有的记录会再查一次磁盘
+    （阻塞，在存储线程池中调用）。
+
+    Args:
+        key_hash: make_key_hash 计算出的键哈希
+        fingerprint: 请求内容的哈希
+
+    Returns:
+        已保存的记录，或None
+
+    Raises:
+        IdempotencyConflict: 键已用于不同的请求内容，或相同键的请求正在处理中
+    """
+    with _lock:
+        record = _records.get(key_hash)
+        if record is None:
+            record = _load_record(key_hash)
+        if record is not None and _is_expired(record, time.time()):
+            _records.pop(key_hash, None)
+            record = None
+
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                raise IdempotencyConflict(422, "Idempotency-Key 已用于内容不同的提交，请使用新的键")
+            return record
+
+        if key_hash in _in_flight:
+            raise IdempotencyConflict(409, "相同 Idempotency-Key 的提交正在处理中，请稍后重试")
+        _in_flight.add(key_hash)
+        return None
+
+
+def finish(key_hash: str, fingerprint: Optional[str] = None,
+           status_code: Optional[int] = None, body: Optional[Dict] = None) -> None:
+    """
+    结束处理带幂等键的请求（阻塞，可能写入磁盘）
+
+    传入响应时保存记录（先写磁盘再放入内存）；不传时只释放处理中标记，
+    失败的请求可以用同一个键重试。
+
+    Args:
+        key_hash: 键哈希
+        fingerprint: 请求内容的哈希
+        status_code: 响应状态码
+        body: 响应内容
+    """
+    try:
+        if body is not None:
+            record = {
+                "key_hash": key_hash,
+                "fingerprint": fingerprint,
+                "status_code": status_code,
+                "body": body,
+                "created_at": time.time()
+            }
+            IDEMPOTENCY_DIR.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(_record_file(key_hash), record)
+            with _lock:
+                _records[key_hash] = record
+                while len(_records) > MAX_MEMORY_RECORDS:
+                    _records.popitem(last=False)
+    finally:
+        with _lock:
+            _in_flight.discard(key_hash)
+
+    _maybe_purge()
+
+
+def _maybe_purge() -> None:
+    """距离上次清理超过 PURGE_INTERVAL 时清理过期记录"""
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    purge_expired()
+
+
+def purge_expired() -> int:
+    """
+    清理内存和磁盘中的过期记录
+
+    Returns:
+        清理的记录数
+    """
+    now = time.time()
+    with _lock:
+        expired = [key_hash for key_hash, record in _records.items() if _is_expired(record, now)]
+        for key_hash in expired:
+            _records.pop(key_hash, None)
+
+    removed = 0
+    if IDEMPOTENCY_DIR.exists():
+        for record_file in IDEMPOTENCY_DIR.glob("*.json"):
+            try:
+                if now - record_file.stat().st_mtime > IDEMPOTENCY_TTL:
+                    record_file.unlink(missing_ok=True)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return max(removed, len(expired))
@@ -0,0 +1,179 @@
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Union
+
+from pydantic import ValidationError
+
+from ..models.submission import CompleteSubmission, CompleteSubmissionData, ImportSubmissionRecord
+from .storage_service import get_assignment_lock, get_all_submissions_for_assignment, save_submissions
+from .leaderboard_service import apply_bulk_submissions
+from .freeze_service import refreeze_leaderboard
+from .index_service import check_identity, get_registered_identity
+from .policy_service import AssignmentPolicy, get_policy
+from . import rate_limit_service
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """把 pydantic 校验错误压缩为一行"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _check_record(
+    record: ImportSubmissionRecord,
+    policy: AssignmentPolicy,
+    batch_identities: Dict[str, Dict]
+) -> Optional[str]:
+    """
+    校验一条导入记录（身份绑定、指标、时间戳）
+
+    身份绑定与提交使用同一个身份索引和校验规则；本批次中首次出现的新学生记录在 batch_identities 中。
+    不检查截止时间、提交次数限制和MD5：导入用于重新评分和数据迁移，由管理员负责
+
+    Returns:
+        错误信息，校验通过时返回None
+    """
+    student_id = record.student_info.student_id
+    registered_info = batch_identities.get(student_id) or get_registered_identity(student_id)
+    error = check_identity(record.student_info, registered_info)
+    if error is not None:
+        return error
+
+    error = policy.check_metrics(record.metrics.model_dump())
+    if error is not None:
+        return error
+
+    if record.timestamp is not None:
+        try:
+            parsed = datetime.fromisoformat(record.timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            return f"时间戳格式错误：{record.timestamp}"
+        if parsed.tzinfo is None:
+            return f"时间戳格式错误：{record.timestamp} 缺少时区（例如 2025-01-01T08:00:00Z 或 +08:00）"
+
+    return None
+
+
+def _normalize_timestamp(timestamp: str) -> str:
+    """
+    把已校验的时间戳转换为UTC、与 get_current_timestamp 相同的格式
+
+    提交时间戳按字符串比较（身份绑定取最早的提交），格式必须一致
+    """
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None).isoformat(timespec="microseconds") + "Z"
+
+
+def import_submissions(
+    assignment_id: str,
+    lines: Iterable[Union[str, bytes]],
+    atomic: bool = False
+) -> Dict:
+    """
+    批量导入一个作业的提交记录（阻塞，在存储线程池中执行）
+
+    执行流程：
+    1. 逐行解析并校验（JSONL，每行一条 ImportSubmissionRecord）
+    2. 所有通过校验的记录一次性追加到提交历史
+    3. 按提交顺序合并到排行榜，最后只排序、写入一次
+    4. 同步缓存：提交次数计数、截止后的冻结排行榜（排行榜和未提交名单按版本号自动失效）
+
+    整个过程持有作业写锁，与普通提交串行。
+
+    Args:
+        assignment_id: 作业ID
+        lines: JSONL 行
+        atomic: 为True时只要有一条记录校验失败就不写入任何记录
+
+    Returns:
+        导入报告 {"assignment_id", "received", "imported", "failed", "errors", "leaderboard_version"}，
+        errors 中每条为 {"line": 行号, "student_id": 学生ID或None, "detail": 错误信息}
+
+    Raises:
+        ValueError: 作业不存在
+    """
+    policy = get_policy(assignment_id)
+    if policy is None:
+        raise ValueError(f"无效的作业ID：{assignment_id}，该作业不存在")
+
+    imported_at = datetime.utcnow().isoformat() + "Z"
+
+    errors = []
+    accepted = []
+    received = 0
+
+    with get_assignment_lock(assignment_id):
+        batch_identities: Dict[str, Dict] = {}
+        counts = Counter(
+            submission['student_info']['student_id']
+            for submission in get_all_submissions_for_assignment(assignment_id)
+        )
+
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            received += 1
+
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                errors.append({"line": line_number, "student_id": None, "detail": f"JSON格式错误：{e.msg}"})
+                continue
+
+            try:
+                record = ImportSubmissionRecord.model_validate(data)
+            except ValidationError as e:
+                student_info = data.get("student_info") if isinstance(data, dict) else None
+                errors.append({
+                    "line": line_number,
+                    "student_id": student_info.get("student_id") if isinstance(student_info, dict) else None,
+                    "detail": f"数据格式错误：{_format_validation_error(e)}"
+                })
+                continue
+
+            error = _check_record(record, policy, batch_identities)
+            if error is not None:
+                errors.append({"line": line_number, "student_id": record.student_info.student_id, "detail": error})
+                continue
+
+            # 批次中首次出现的新学生在此绑定身份，后续记录按同样的规则校验
+            student_id = record.student_info.student_id
+            batch_identities.setdefault(student_id, record.student_info.model_dump())
+            counts[student_id] += 1
+
+            accepted.append(CompleteSubmission(
+                student_info=record.student_info,
+                assignment_id=assignment_id,
+                submission_data=CompleteSubmissionData(
+                    metrics=record.metrics,
+                    timestamp=_normalize_timestamp(record.timestamp) if record.timestamp else imported_at,
+                    submission_count=counts[student_id],
+                    checksums=record.checksums,
+                    files=record.files,
+                    main_contributor=record.main_contributor
+                )
+            ).model_dump())
+
+        if atomic and errors:
+            accepted = []
+
+        version = None
+        if accepted:
+            save_submissions(assignment_id, accepted)
+            version = apply_bulk_submissions(assignment_id, accepted)
+
+    if accepted:
+        rate_limit_service.reset_daily_counts(assignment_id)
+        refreeze_leaderboard(assignment_id)
+
+    return {
+        "assignment_id": assignment_id,
+        "received": received,
+        "imported": len(accepted),
+        "failed": len(errors),
+        "errors": errors,
+        "leaderboard_version": version
+    }
@@ -0,0 +1,325 @@
+import base64
+import binascii
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from ..models.student import StudentInfo
+from .storage_service import SUBMISSIONS_DIR, get_all_submissions_for_assignment, get_all_assignment_ids
+from .leaderboard_service import get_ranked_leaderboard
+from .version_service import get_history_version, get_leaderboard_version, get_submissions_version
+
+# 内存中最多保留的学生提交历史摘要数（按 (学生, 作业) 计）和文件清单数，超出时淘汰最久未使用的
+HISTORY_VIEW_CACHE_SIZE = int(os.environ.get("LEADERBOARD_HISTORY_VIEW_CACHE_SIZE", "4096"))
+FILE_MANIFEST_CACHE_SIZE = int(os.environ.get("LEADERBOARD_FILE_MANIFEST_CACHE_SIZE", "16384"))
+
+# 内存索引中的数据被多个请求共享，调用方不得修改返回的列表和字典
+
+_lock = threading.Lock()
+
+# 带排名的排行榜 {assignment_id: (version, ranked_entries)}
+_ranked_views: Dict[str, Tuple[int, List[Dict]]] = {}
+
+# 学生提交历史摘要 {(student_id, assignment_id): (history_version, summaries)}
+# summaries 不含文件内容，按时间倒序排列；只在该学生自己的历史版本变化时重新生成
+_history_views: "OrderedDict[Tuple[str, str], Tuple[int, List[Dict]]]" = OrderedDict()
+
+# 提交文件清单缓存 {(assignment_id, student_id, submission_count): manifest}
+# 单条提交记录写入后不会再变化，因此清单只需计算一次
+_file_manifests: "OrderedDict[Tuple[str, str, int], List[Dict]]" = OrderedDict()
+
+# 作业ID列表 (提交目录修改时间, assignment_ids)
+_assignment_ids: Tuple[int, List[str]] = (-1, [])
+
+# 学生绑定身份（首次提交时的 student_info）
+# {"versions": {assignment_id: 已计入的提交版本号}, "earliest": {student_id: (timestamp, student_info)}}
+# 新提交写入后增量更新；_identity_lock 保护索引的构建和更新
+_identities: Optional[Dict] = None
+_identity_lock = threading.Lock()
+
+
+def get_assignment_ids() -> List[str]:
+    """
+    获取所有已有提交记录的作业ID列表（提交目录未变化时不重新扫描）
+
+    Returns:
+        作业ID列表
+    """
+    global _assignment_ids
+    try:
+        mtime = SUBMISSIONS_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = 0
+
+    if _assignment_ids[0] != mtime:
+        _assignment_ids = (mtime, get_all_assignment_ids())
+    return _assignment_ids[1]
+
+
+def get_ranked_view(assignment_id: str) -> Tuple[int, List[Dict]]:
+    """
+    获取带排名的排行榜（内存索引，版本变化时重新加载）
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        (版本号, 带rank字段的排行榜列表)
+    """
+    version = get_leaderboard_version(assignment_id)
+    view = _ranked_views.get(assignment_id)
+    if view is not None and view[0] == version:
+        return view
+
+    # 先读版本再读数据：数据只可能比版本新，不会出现旧数据挂在新版本上
+    view = (version, get_ranked_leaderboard(assignment_id))
+    with _lock:
+        _ranked_views[assignment_id] = view
+    return view
+
+
+def build_file_manifest(files: Optional[Dict[str, str]]) -> List[Dict]:
+    """
+    生成提交文件清单（文件名、解码后大小、MD5）
+
+    Args:
+        files: 提交的文件字典 {filename: base64_content}
+
+    Returns:
+        文件清单列表；无法解码的文件 size 和 md5 为None
+    """
+    manifest = []
+    for filename, base64_content in (files or {}).items():
+        try:
+            content = base64.b64decode(base64_content) if base64_content else b""
+            manifest.append({
+                "filename": filename,
+                "size": len(content),
+                "md5": hashlib.md5(content).hexdigest()
+            })
+        except (binascii.Error, ValueError, TypeError):
+            manifest.append({"filename": filename, "size": None, "md5": None})
+    return manifest
+
+
+def get_file_manifest(assignment_id: str, submission: Dict) -> List[Dict]:
+    """
+    获取某条提交记录的文件清单（按作业、学生、提交序号缓存）
+
+    Args:
+        assignment_id: 作业ID
+        submission: 完整提交记录
+
+    Returns:
+        文件清单列表
+    """
+    submission_data = submission['submission_data']
+    key = (assignment_id, submission['student_info']['student_id'], submission_data['submission_count'])
+    with _lock:
+        manifest = _file_manifests.get(key)
+        if manifest is not None:
+            _file_manifests.move_to_end(key)
+            return manifest
+
+    file_refs = submission_data.get('file_refs')
+    if file_refs:
+        # multipart 上传的文件在提交记录中只有引用，直接使用其中的大小和MD5
+        manifest = [
+            {"filename": filename, "size": ref["size"], "md5": ref["md5"]}
+            for filename, ref in file_refs.items()
+        ]
+    else:
+        manifest = build_file_manifest(submission_data.get('files'))
+    with _lock:
+        _file_manifests[key] = manifest
+        while len(_file_manifests) > FILE_MANIFEST_CACHE_SIZE:
+            _file_manifests.popitem(last=False)
+    return manifest
+
+
+def _summarize_submission(assignment_id: str, submission: Dict) -> Dict:
+    """生成不含文件内容的提交摘要（文件内容替换为 file_manifest）"""
+    submission_data = submission['submission_data']
+    manifest = get_file_manifest(assignment_id, submission)
+
+    summary_data = {k: v for k, v in submission_data.items() if k not in ('files', 'file_refs')}
+    summary_data['file_manifest'] = manifest
+    summary = {k: v for k, v in submission.items() if k != 'submission_data'}
+    summary['submission_data'] = summary_data
+    return summary
+
+
+def _student_records(student_id: str, assignment_id: str) -> List[Dict]:
+    """
+    该学生在作业中的完整提交记录（按提交序号倒序）
+
+    按提交序号而不是时间戳排序：批量导入的记录可能带有更早的原始时间戳，但序号排在已有记录之后，
+    提交历史的分页游标依赖序号严格递减
+    """
+    records = [
+        submission for submission in get_all_submissions_for_assignment(assignment_id)
+        if submission['student_info']['student_id'] == student_id
+    ]
+    records.sort(key=lambda x: x['submission_data']['submission_count'], reverse=True)
+    return records
+
+
+def get_history_view(student_id: str, assignment_id: str) -> List[Dict]:
+    """
+    获取学生在指定作业的提交历史摘要（内存索引，按提交序号倒序）
+
+    摘要不包含文件内容，submission_data.files 被替换为 file_manifest
+    （文件名、大小、MD5），文件内容通过单独的接口按需获取。
+    索引只保存摘要，并且只在该学生自己的提交历史变化时重新生成。
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+
+    Returns:
+        提交记录摘要列表
+    """
+    key = (student_id, assignment_id)
+    version = get_history_version(student_id, assignment_id)
+    with _lock:
+        view = _history_views.get(key)
+        if view is not None and view[0] == version:
+            _history_views.move_to_end(key)
+            return view[1]
+
+    # 先读版本再读数据：数据只可能比版本新，不会出现旧数据挂在新版本上
+    summaries = [
+        _summarize_submission(assignment_id, record)
+        for record in _student_records(student_id, assignment_id)
+    ]
+    with _lock:
+        _history_views[key] = (version, summaries)
+        _history_views.move_to_end(key)
+        while len(_history_views) > HISTORY_VIEW_CACHE_SIZE:
+            _history_views.popitem(last=False)
+    return summaries
+
+
+def get_submission_record(student_id: str, assignment_id: str, submission_count: int) -> Optional[Dict]:
+    """
+    获取学生的某一次完整提交记录（包含文件内容，不进入索引）
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        submission_count: 提交序号
+
+    Returns:
+        完整提交记录，不存在时返回None
+    """
+    for record in get_all_submissions_for_assignment(assignment_id):
+        if (record['student_info']['student_id'] == student_id
+                and record['submission_data']['submission_count'] == submission_count):
+            return record
+    return None
+
+
+def _note_identity(earliest: Dict[str, Tuple[str, Dict]], submission: Dict) -> None:
+    """按提交时间保留每个学生最早的一条提交的 student_info"""
+    student_id = submission['student_info']['student_id']
+    timestamp = submission['submission_data']['timestamp']
+    current = earliest.get(student_id)
+    if current is None or timestamp < current[0]:
+        earliest[student_id] = (timestamp, submission['student_info'])
+
+
+def _build_identity_index() -> Dict:
+    """遍历所有作业的提交记录构建身份索引（先读版本再读数据，需持有 _identity_lock）"""
+    versions = {assignment_id: get_submissions_version(assignment_id) for assignment_id in get_assignment_ids()}
+    earliest: Dict[str, Tuple[str, Dict]] = {}
+    for assignment_id in versions:
+        for submission in get_all_submissions_for_assignment(assignment_id):
+            _note_identity(earliest, submission)
+    return {"versions": versions, "earliest": earliest}
+
+
+def _is_identity_index_current(index: Dict) -> bool:
+    """索引是否包含全部作业的全部提交（作业列表或某个作业的提交版本对不上时需要重新构建）"""
+    versions = index["versions"]
+    assignment_ids = get_assignment_ids()
+    return len(assignment_ids) == len(versions) and all(
+        versions.get(assignment_id) == get_submissions_version(assignment_id)
+        for assignment_id in assignment_ids
+    )
+
+
+def record_identities(assignment_id: str, submissions: List[Dict]) -> None:
+    """
+    增量更新身份索引（由 storage_service 在作业写锁内、写入提交记录并递增版本后调用）
+
+    Args:
+        assignment_id: 作业ID
+        submissions: 新写入的提交记录
+    """
+    with _identity_lock:
+        if _identities is None:
+            return
+        for submission in submissions:
+            _note_identity(_identities["earliest"], submission)
+        _identities["versions"][assignment_id] = get_submissions_version(assignment_id)
+
+
+def get_registered_identity(student_id: str) -> Optional[Dict]:
+    """
+    获取学生绑定的身份信息（内存索引）
+
+    与 storage_service.get_student_registered_info 结果相同，但不会每次遍历全部提交记录：
+    新提交由 record_identities 增量计入，只有索引之外的写入（版本号或作业列表对不上）
+    才在锁内重新构建一次
+
+    Args:
+        student_id: 学生ID
+
+    Returns:
+        学生首次提交时的 student_info，从未提交时返回None
+    """
+    global _identities
+    index = _identities
+    if index is None or not _is_identity_index_current(index):
+        with _identity_lock:
+            if _identities is None or not _is_identity_index_current(_identities):
+                _identities = _build_identity_index()
+            index = _identities
+    entry = index["earliest"].get(student_id)
+    return entry[1] if entry is not None else None
+
+
+def check_identity(student_info: StudentInfo, registered_info: Optional[Dict]) -> Optional[str]:
+    """
+    验证学生信息是否与注册信息一致（student_id、name和nickname三者都需匹配）
+
+    首次提交（registered_info 为None）时接受并记录该student_info的所有内容；
+    提交、提交预检和批量导入使用同一套规则
+
+    Args:
+        student_info: 提交的学生信息
+        registered_info: 已绑定的学生信息（get_registered_identity 的结果）
+
+    Returns:
+        信息不匹配时的错误信息，通过时返回None
+    """
+    if registered_info is None:
+        return None
+
+    # 该学生ID已经提交过，需要验证name和nickname是否都一致
+    mismatches = []
+
+    if registered_info['name'] != student_info.name:
+        mismatches.append(f"姓名（已绑定: '{registered_info['name']}'，当前提交: '{student_info.name}'）")
+
+    # 比较nickname，需要处理None的情况
+    registered_nickname = registered_info.get('nickname')
+    submitted_nickname = student_info.nickname
+    if registered_nickname != submitted_nickname:
+        mismatches.append(f"昵称（已绑定: '{registered_nickname}'，当前提交: '{submitted_nickname}'）")
+
+    if mismatches:
+        return f"身份验证失败：学生ID '{student_info.student_id}' 的信息不匹配。{'; '.join(mismatches)}。学生信息一经绑定不可修改，请使用首次提交时的信息。"
+    return None
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from .storage_service import DATABASE_DIR, write_json_atomic
+from .async_storage import run_io
+from ..utils.helpers import get_current_timestamp
+
+# 提交队列目录：pending 为待处理的提交（含完整请求），results 为处理结果
+INGEST_DIR = DATABASE_DIR / "ingest"
+PENDING_DIR = INGEST_DIR / "pending"
+RESULTS_DIR = INGEST_DIR / "results"
+
+# 后台处理提交的 worker 数量（同一作业的提交仍按作业写锁串行）
+INGEST_WORKERS = int(os.environ.get("LEADERBOARD_INGEST_WORKERS", "2"))
+
+# 处理结果保留时间（秒），默认24小时，过期后内存状态和 results 文件都会被清理
+RESULT_TTL = int(os.environ.get("LEADERBOARD_INGEST_RESULT_TTL", str(24 * 3600)))
+
+# 清理过期结果的最小间隔（秒）
+PURGE_INTERVAL = 3600
+
+# 提交ID格式（uuid4 hex），用于校验路径参数，防止路径穿越
+SUBMISSION_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# 提交状态
+STATUS_QUEUED = "queued"
+STATUS_PROCESSING = "processing"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# 内存中的提交状态 {submission_id: status}，已完成的状态同时写入 results 目录
+_statuses: Dict[str, Dict] = {}
+_statuses_lock = threading.Lock()
+
+# 已完成（completed/failed）的提交的完成时间 {submission_id: time.time()}，按完成顺序排列，用于按TTL清理
+_finished: "OrderedDict[str, float]" = OrderedDict()
+_last_purge = 0.0
+
+# 待处理的提交ID队列（事件循环中创建）
+_queue: Optional[asyncio.Queue] = None
+
+
+def ensure_ingest_dirs() -> None:
+    """确保提交队列目录存在"""
+    PENDING_DIR.mkdir(parents=True, exist_ok=True)
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def is_valid_submission_id(submission_id: str) -> bool:
+    """判断提交ID格式是否有效"""
+    return bool(SUBMISSION_ID_PATTERN.match(submission_id))
+
+
+def _set_status(status: Dict, finished_at: Optional[float] = None) -> None:
+    """更新内存中的提交状态（finished_at 为已完成提交的完成时间）"""
+    with _statuses_lock:
+        _statuses[status["submission_id"]] = status
+        if finished_at is not None:
+            _finished[status["submission_id"]] = finished_at
+
+
+def enqueue_submission(payload: Dict) -> Dict:
+    """
+    将已校验的提交写入磁盘队列（阻塞，在存储线程池中执行）
+
+    写入完成后提交即被持久化，服务重启后会继续处理
+
+    Args:
+        payload: 提交请求数据
+
+    Returns:
+        提交状态（包含 submission_id）
+    """
+    ensure_ingest_dirs()
+
+    submission_id = uuid.uuid4().hex
+    received_at = get_current_timestamp()
+    write_json_atomic(PENDING_DIR / f"{submission_id}.json", {
+        "submission_id": submission_id,
+        "received_at": received_at,
+        "payload": payload
+    })
+
+    status = {
+        "submission_id": submission_id,
+        "status": STATUS_QUEUED,
+        "assignment_id": payload.get("assignment_id"),
+        "received_at": received_at
+    }
+    _set_status(status)
+    return status
+
+
+def notify_enqueued(submission_id: str) -> None:
+    """通知后台 worker 有新的提交（需在事件循环中调用）"""
+    if _queue is not None:
+        _queue.put_nowait(submission_id)
+
+
+def get_submission_status(submission_id: str) -> Optional[Dict]:
+    """
+    获取提交的处理状态（阻塞，可能读取磁盘）
+
+    Args:
+        submission_id: 提交ID
+
+    Returns:
+        提交状态，不存在时返回None
+    """
+    if not is_valid_submission_id(submission_id):
+        return None
+
+    status = _statuses.get(submission_id)
+    if status is not None:
+        return status
+
+    # 服务重启后内存状态丢失，从磁盘恢复（过期的结果视为不存在）
+    result_file = RESULTS_DIR / f"{submission_id}.json"
+    try:
+        finished_at = result_file.stat().st_mtime
+        if time.time() - finished_at <= RESULT_TTL:
+            with open(result_file, 'r', encoding='utf-8') as f:
+                status = json.load(f)
+            _set_status(status, finished_at)
+            return status
+    except FileNotFoundError:
+        pass
+
+    if (PENDING_DIR / f"{submission_id}.json").exists():
+        return {"submission_id": submission_id, "status": STATUS_QUEUED}
+
+    return None
+
+
+def _process_pending(submission_id: str, processor: Callable[[Dict, Optional[str]], Dict]) -> None:
+    """
+    处理一条待处理的提交并写入结果（阻塞，在存储线程池中执行）
+
+    Args:
+        submission_id: 提交ID
+        processor: 提交处理函数，输入提交请求数据和入队时间（received_at）、返回结果字典，
+                   校验失败时抛出带 status_code / detail 的异常。
+                   提交时间和截止时间、每日次数的判断以入队时间为准，不受排队时长影响
+    """
+    pending_file = PENDING_DIR / f"{submission_id}.json"
+    result_file = RESULTS_DIR / f"{submission_id}.json"
+
+    # 结果已写入但 pending 文件未删除（例如删除前进程退出），不重复处理
+    if result_file.exists():
+        pending_file.unlink(missing_ok=True)
+        return
+
+    try:
+        with open(pending_file, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        return
+
+    payload = record["payload"]
+    status = {
+        "submission_id": submission_id,
+        "status": STATUS_PROCESSING,
+        "assignment_id": payload.get("assignment_id"),
+        "received_at": record.get("received_at")
+    }
+    _set_status(status)
+
+    try:
+        result = processor(payload, record.get("received_at"))
+        status = {**status, "status": STATUS_COMPLETED, "result": result}
+    except Exception as e:
+        status = {
+            **status,
+            "status": STATUS_FAILED,
+            "error": {
+                "status_code": getattr(e, "status_code", 500),
+                "detail": getattr(e, "detail", None) or str(e)
+            }
+        }
+    status["completed_at"] = get_current_timestamp()
+
+    # 先写结果再删除 pending 文件
+    write_json_atomic(result_file, status)
+    pending_file.unlink(missing_ok=True)
+    _set_status(status, time.time())
+    _maybe_purge()
+
+
+def _maybe_purge() -> None:
+    """距离上次清理超过 PURGE_INTERVAL 时清理过期结果"""
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    purge_expired_results()
+
+
+def purge_expired_results() -> int:
+    """
+    清理内存和 results 目录中超过 RESULT_TTL 的处理结果（排队和处理中的提交不受影响）
+
+    Returns:
+        清理的结果数
+    """
+    now = time.time()
+    expired = 0
+    with _statuses_lock:
+        while _finished:
+            submission_id, finished_at = next(iter(_finished.items()))
+            if now - finished_at <= RESULT_TTL:
+                break
+            _finished.popitem(last=False)
+            _statuses.pop(submission_id, None)
+            expired += 1
+
+    removed = 0
+    if RESULTS_DIR.exists():
+        for result_file in RESULTS_DIR.glob("*.json"):
+            try:
+                if now - result_file.stat().st_mtime > RESULT_TTL:
+                    result_file.unlink(missing_ok=True)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return max(removed, expired)
+
+
+async def ingest_worker(processor: Callable[[Dict, Optional[str]], Dict]) -> None:
+    """
+    后台 worker：从队列取出提交ID并在存储线程池中处理
+
+    Args:
+        processor: 提交处理函数
+    """
+    while True:
+        submission_id = await _queue.get()
+        try:
+            await run_io(_process_pending, submission_id, processor)
+        except Exception as e:
+            print(f"❌ 处理排队提交 {submission_id} 时出错: {str(e)}")
+        finally:
+            _queue.task_done()
+
+
+def start_ingest_workers(processor: Callable[[Dict, Optional[str]], Dict], workers: int = INGEST_WORKERS) -> int:
+    """
+    启动后台 worker，并把磁盘上未处理完的提交重新放入队列（需在事件循环中调用）
+
+    Args:
+        processor: 提交处理函数
+        workers: worker 数量
+
+    Returns:
+        重新入队的提交数量
+    """
+    global _queue
+    ensure_ingest_dirs()
+    _queue = asyncio.Queue()
+
+    # 按写入时间顺序恢复未处理的提交
+    pending_files = sorted(PENDING_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime_ns)
+    for pending_file in pending_files:
+        if is_valid_submission_id(pending_file.stem):
+            _queue.put_nowait(pending_file.stem)
+
+    for _ in range(workers):
+        asyncio.create_task(ingest_worker(processor))
+    return _queue.qsize()
+
+
+def queue_size() -> int:
+    """当前排队等待处理的提交数量"""
+    return _queue.qsize() if _queue is not None else 0
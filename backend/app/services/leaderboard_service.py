@@ -1,10 +1,12 @@
 from typing import Dict, List, Optional, Tuple
 from .storage_service import (
-    get_assignment_config,
     get_leaderboard,
     update_leaderboard,
     get_student_leaderboard_entry
 )
+from .version_service import get_leaderboard_version
+from .broadcast_service import leaderboard_hub
+from .roster_service import record_leaderboard_update
 
 
 def get_primary_metric_info(metric_priorities: Dict) -> Optional[Tuple[str, str]]:
@@ -59,38 +61,20 @@ def get_primary_metric_name(metric_priorities: Dict) -> Optional[str]:
     return result[0] if result else None
 
 
-def compare_metrics_by_priority(
-    metrics_a: Dict,
-    metrics_b: Dict,
-    metric_priorities: Dict
-) -> int:
+def parse_metric_priorities(metric_priorities: Optional[Dict]) -> Optional[List[Tuple[str, str]]]:
     """
-    根据优先级配置比较两组指标
+    把指标优先级配置解析为参与排序的指标列表（按优先级从高到低）
     
     Args:
-        metrics_a: 第一组指标
-        metrics_b: 第二组指标
         metric_priorities: 指标优先级配置
                           旧格式: {metric_name: priority}
                           新格式: {metric_name: {"priority": priority, "direction": "min/max"}}
-                          
-                          priority: 0 表示不参与排序，数字越小优先级越高
-                          direction: "min"表示越小越好，"max"表示越大越好
     
     Returns:
-        -1: metrics_a 更优
-         0: 两组指标相同
-         1: metrics_b 更优
+        [(指标名称, direction)]；未配置时返回None（按 RMSE 比较）
     """
     if not metric_priorities:
-        # 如果没有配置，默认比较 RMSE（越小越好）
-        rmse_a = metrics_a.get("RMSE", float('inf'))
-        rmse_b = metrics_b.get("RMSE", float('inf'))
-        if rmse_a < rmse_b:
-            return -1
-        elif rmse_a > rmse_b:
-            return 1
-        return 0
+        return None
     
     # 解析metrics配置（支持新旧两种格式）
     parsed_metrics = []
@@ -108,10 +92,34 @@ def compare_metrics_by_priority(
             parsed_metrics.append((metric_name, priority, direction))
     
     # 按优先级排序
-    sorted_metrics = sorted(parsed_metrics, key=lambda x: x[1])
+    return [(metric_name, direction) for metric_name, _, direction in sorted(parsed_metrics, key=lambda x: x[1])]
+
+
+def compare_metrics_in_order(
+    metrics_a: Dict,
+    metrics_b: Dict,
+    metric_order: Optional[List[Tuple[str, str]]]
+) -> int:
+    """
+    按已解析的指标顺序比较两组指标（parse_metric_priorities 的结果）
+    
+    Returns:
+        -1: metrics_a 更优
+         0: 两组指标相同
+         1: metrics_b 更优
+    """
+    if metric_order is None:
+        # 如果没有配置，默认比较 RMSE（越小越好）
+        rmse_a = metrics_a.get("RMSE", float('inf'))
+        rmse_b = metrics_b.get("RMSE", float('inf'))
+        if rmse_a < rmse_b:
+            return -1
+        elif rmse_a > rmse_b:
+            return 1
+        return 0
     
     # 依次比较每个优先级的指标
-    for metric_name, _, direction in sorted_metrics:
+    for metric_name, direction in metric_order:
         value_a = metrics_a.get(metric_name, float('inf'))
         value_b = metrics_b.get(metric_name, float('inf'))
         
@@ -136,54 +144,59 @@ def compare_metrics_by_priority(
     return 0  # 所有指标都相同
 
 
-def update_student_leaderboard(
+def compare_metrics_by_priority(
+    metrics_a: Dict,
+    metrics_b: Dict,
+    metric_priorities: Dict
+) -> int:
+    """
+    根据优先级配置比较两组指标
+    
+    Args:
+        metrics_a: 第一组指标
+        metrics_b: 第二组指标
+        metric_priorities: 指标优先级配置
+                          旧格式: {metric_name: priority}
+                          新格式: {metric_name: {"priority": priority, "direction": "min/max"}}
+                          
+                          priority: 0 表示不参与排序，数字越小优先级越高
+                          direction: "min"表示越小越好，"max"表示越大越好
+    
+    Returns:
+        -1: metrics_a 更优
+         0: 两组指标相同
+         1: metrics_b 更优
+    """
+    return compare_metrics_in_order(metrics_a, metrics_b, parse_metric_priorities(metric_priorities))
+
+def _apply_submission(
+    leaderboard: List[Dict],
+    existing_index: int,
     student_info: Dict,
-    assignment_id: str,
     metrics: Dict,
+    new_score: Optional[float],
     timestamp: str,
     submission_count: int,
-    main_contributor: str = None
-) -> Tuple[bool, Optional[int], Optional[float], Optional[float], Optional[str]]:
+    main_contributor: Optional[str],
+    metric_order: Optional[List[Tuple[str, str]]]
+) -> Tuple[bool, Optional[float]]:
     """
-    更新学生在排行榜中的记录
+    把一次提交合并到排行榜列表中（原地修改，不排序）
     
     Args:
+        leaderboard: 排行榜列表
+        existing_index: 学生现有记录的位置，没有记录时为-1
         student_info: 学生信息
-        assignment_id: 作业ID
         metrics: 评估指标
+        new_score: 第一优先级的指标值
         timestamp: 提交时间戳
         submission_count: 提交次数
-        main_contributor: 主要贡献者（human 或 ai）
+        main_contributor: 主要贡献者
+        metric_order: 已解析的指标顺序（parse_metric_priorities 的结果）
         
     Returns:
-        (是否更新了排行榜, 当前排名, 当前主要指标值, 之前的主要指标值, 指标方向)
+        (是否更新了排行榜, 之前的主要指标值)
     """
-    # 获取作业配置
-    config = get_assignment_config(assignment_id)
-    metric_priorities = config.get("metrics") if config else None
-    
-    # 获取第一优先级的指标名称和方向
-    primary_metric_info = get_primary_metric_info(metric_priorities)
-    if primary_metric_info:
-        primary_metric_name, metric_direction = primary_metric_info
-        new_score = metrics.get(primary_metric_name)
-    else:
-        primary_metric_name = None
-        new_score = None
-        metric_direction = 'min'
-    
-    # 获取当前排行榜
-    leaderboard = get_leaderboard(assignment_id)
-    
-    # 查找学生现有记录
-    existing_entry = None
-    existing_index = -1
-    for idx, entry in enumerate(leaderboard):
-        if entry['student_info']['student_id'] == student_info['student_id']:
-            existing_entry = entry
-            existing_index = idx
-            break
-    
     leaderboard_updated = False
     previous_score = None
     
@@ -201,13 +214,14 @@ def update_student_leaderboard(
         leaderboard_updated = True
     else:
         # 非首次提交，需要比较指标
-        if existing_entry:
+        if existing_index >= 0:
+            existing_entry = leaderboard[existing_index]
             old_metrics = existing_entry.get('metrics', {})
             old_score = existing_entry.get('score')
             previous_score = old_score
             
             # 使用优先级比较函数
-            comparison = compare_metrics_by_priority(metrics, old_metrics, metric_priorities)
+            comparison = compare_metrics_in_order(metrics, old_metrics, metric_order)
             
             if comparison < 0:
                 # 新指标更优，更新排行榜（student_info不更新，已绑定不可修改）
@@ -229,33 +243,196 @@ def update_student_leaderboard(
                 leaderboard[existing_index]['timestamp'] = timestamp  # 更新为最后提交时间
                 # 注意：不更新分数、指标、main_contributor和student_info，保持最佳成绩
     
-    # 使用优先级配置进行排序
+    return leaderboard_updated, previous_score
+
+
+def sort_leaderboard(leaderboard: List[Dict], metric_order: Optional[List[Tuple[str, str]]]) -> None:
+    """
+    按指标顺序对排行榜原地排序
+    
+    Args:
+        leaderboard: 排行榜列表
+        metric_order: 已解析的指标顺序（parse_metric_priorities 的结果），排序期间不再重复解析配置
+    """
     # 使用 functools.cmp_to_key 将比较函数转换为排序键
     from functools import cmp_to_key
     
     def compare_entries(entry_a, entry_b):
         """比较两个排行榜条目"""
-        return compare_metrics_by_priority(
+        return compare_metrics_in_order(
             entry_a.get('metrics', {}),
             entry_b.get('metrics', {}),
-            metric_priorities
+            metric_order
         )
     
     leaderboard.sort(key=cmp_to_key(compare_entries))
+
+def update_student_leaderboard(
+    student_info: Dict,
+    assignment_id: str,
+    metrics: Dict,
+    timestamp: str,
+    submission_count: int,
+    main_contributor: str = None
+) -> Tuple[bool, Optional[int], Optional[float], Optional[float], Optional[str]]:
+    """
+    更新学生在排行榜中的记录
+    
+    Args:
+        student_info: 学生信息
+        assignment_id: 作业ID
+        metrics: 评估指标
+        timestamp: 提交时间戳
+        submission_count: 提交次数
+        main_contributor: 主要贡献者（human 或 ai）
+        
+    Returns:
+        (是否更新了排行榜, 当前排名, 当前主要指标值, 之前的主要指标值, 指标方向)
+    """
+    from .policy_service import get_policy
+    
+    # 获取编译后的作业规则（指标排序顺序只在配置变化时解析一次）
+    policy = get_policy(assignment_id)
+    metric_order = policy.metric_order if policy else None
+    
+    # 获取第一优先级的指标名称和方向
+    primary_metric_info = policy.primary_metric if policy else None
+    if primary_metric_info:
+        primary_metric_name, metric_direction = primary_metric_info
+        new_score = metrics.get(primary_metric_name)
+    else:
+        primary_metric_name = None
+        new_score = None
+        metric_direction = 'min'
+    
+    # 获取当前排行榜
+    leaderboard = get_leaderboard(assignment_id)
+    
+    # 记录更新前的排名，用于生成增量事件
+    previous_ranks = {
+        entry['student_info']['student_id']: idx + 1
+        for idx, entry in enumerate(leaderboard)
+    }
+    
+    # 查找学生现有记录
+    existing_index = -1
+    for idx, entry in enumerate(leaderboard):
+        if entry['student_info']['student_id'] == student_info['student_id']:
+            existing_index = idx
+            break
+    
+    leaderboard_updated, previous_score = _apply_submission(
+        leaderboard, existing_index, student_info, metrics, new_score,
+        timestamp, submission_count, main_contributor, metric_order
+    )
+    
+    sort_leaderboard(leaderboard, metric_order)
     
     # 保存更新后的排行榜
+    previous_version = get_leaderboard_version(assignment_id)
     update_leaderboard(assignment_id, leaderboard)
+    version = get_leaderboard_version(assignment_id)
+    
+    # 同步未提交学生集合（首次提交的学生从集合中移除）
+    record_leaderboard_update(assignment_id, student_info['student_id'], previous_version, version)
     
-    # 查找当前排名
+    # 查找当前排名，同时收集排名发生变化的学生
     current_rank = None
+    rank_changes = []
     for idx, entry in enumerate(leaderboard):
-        if entry['student_info']['student_id'] == student_info['student_id']:
+        entry_student_id = entry['student_info']['student_id']
+        if entry_student_id == student_info['student_id']:
             current_rank = idx + 1
-            break
+        if previous_ranks.get(entry_student_id) != idx + 1:
+            rank_changes.append([entry_student_id, idx + 1])
+    
+    # 向SSE订阅者广播增量事件
+    if current_rank is not None:
+        changed_entry = leaderboard[current_rank - 1].copy()
+        changed_entry['rank'] = current_rank
+        leaderboard_hub.publish(
+            assignment_id,
+            "delta",
+            {
+                "assignment_id": assignment_id,
+                "version": version,
+                "entry": changed_entry,
+                "ranks": rank_changes
+            },
+            event_id=version
+        )
     
     return leaderboard_updated, current_rank, new_score, previous_score, metric_direction
 
 
+def apply_bulk_submissions(assignment_id: str, submissions: List[Dict]) -> int:
+    """
+    把一批已保存的提交合并到排行榜，最后只排序和写入一次（批量导入使用）
+    
+    合并规则与逐条提交（update_student_leaderboard）相同，
+    完成后向SSE订阅者广播一次完整快照（snapshot 事件）
+    
+    Args:
+        assignment_id: 作业ID
+        submissions: 完整提交记录列表（按提交顺序）
+        
+    Returns:
+        更新后的排行榜版本号
+    """
+    from .policy_service import get_policy
+    
+    policy = get_policy(assignment_id)
+    metric_order = policy.metric_order if policy else None
+    primary_metric_name = policy.primary_metric[0] if policy and policy.primary_metric else None
+    
+    leaderboard = get_leaderboard(assignment_id)
+    positions = {
+        entry['student_info']['student_id']: idx
+        for idx, entry in enumerate(leaderboard)
+    }
+    
+    for submission in submissions:
+        student_info = submission['student_info']
+        data = submission['submission_data']
+        metrics = data['metrics']
+        _apply_submission(
+            leaderboard,
+            positions.get(student_info['student_id'], -1),
+            student_info,
+            metrics,
+            metrics.get(primary_metric_name) if primary_metric_name else None,
+            data['timestamp'],
+            data['submission_count'],
+            data.get('main_contributor'),
+            metric_order
+        )
+        if data['submission_count'] == 1:
+            positions[student_info['student_id']] = len(leaderboard) - 1
+    
+    sort_leaderboard(leaderboard, metric_order)
+    update_leaderboard(assignment_id, leaderboard)
+    version = get_leaderboard_version(assignment_id)
+    
+    # 批量变化不逐条生成增量事件，直接广播完整快照
+    ranked_leaderboard = []
+    for idx, entry in enumerate(leaderboard):
+        ranked_entry = entry.copy()
+        ranked_entry['rank'] = idx + 1
+        ranked_leaderboard.append(ranked_entry)
+    leaderboard_hub.publish(
+        assignment_id,
+        "snapshot",
+        {
+            "assignment_id": assignment_id,
+            "version": version,
+            "leaderboard": ranked_leaderboard
+        },
+        event_id=version
+    )
+    
+    return version
+
+
 def get_ranked_leaderboard(assignment_id: str) -> List[Dict]:
     """
     获取带排名的排行榜
@@ -0,0 +1,125 @@
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .leaderboard_service import compare_metrics_in_order, get_primary_metric_info, parse_metric_priorities
+from .rate_limit_service import get_max_submissions
+from .schedule_service import get_cached_assignment_configs
+
+# 作业配置中没有 metrics 时要求提交的默认指标
+DEFAULT_REQUIRED_METRICS = ("MAE", "MSE", "RMSE", "Prediction_Time")
+
+# 编译后的作业规则，作业配置变化时整体重新编译
+# 格式: {"configs": 编译时的作业配置字典, "policies": {assignment_id: AssignmentPolicy}}
+_policies: Dict = {"configs": None, "policies": {}}
+_lock = threading.Lock()
+
+
+class AssignmentPolicy:
+    """
+    一个作业的提交规则（由作业配置编译一次，之后每次提交只做内存比较）
+
+    包含必需指标、MD5校验值、必需文件、每日提交上限，以及排行榜的指标排序顺序
+    """
+
+    __slots__ = (
+        "assignment_id", "config", "required_metrics", "checksums", "required_files",
+        "max_submissions", "metric_order", "primary_metric"
+    )
+
+    def __init__(self, assignment_id: str, config: Dict):
+        metric_priorities = config.get("metrics")
+        self.assignment_id = assignment_id
+        self.config = config
+        self.required_metrics: Tuple[str, ...] = tuple(metric_priorities or ()) or DEFAULT_REQUIRED_METRICS
+        self.checksums: Dict[str, str] = config.get("checksums") or {}
+        self.required_files: List[str] = config.get("required_files") or []
+        self.max_submissions = get_max_submissions(config)
+        self.metric_order: Optional[List[Tuple[str, str]]] = parse_metric_priorities(metric_priorities)
+        self.primary_metric: Optional[Tuple[str, str]] = get_primary_metric_info(metric_priorities)
+
+    def check_metrics(self, metrics: Dict) -> Optional[str]:
+        """
+        一次遍历检查必需指标是否齐全、取值是否为非负数（NaN、Infinity 无法比较排名，同样拒绝）
+
+        Args:
+            metrics: 提交的指标字典
+
+        Returns:
+            错误信息，通过时返回None
+        """
+        missing_metrics = []
+        invalid_metrics = []
+        for metric in self.required_metrics:
+            value = metrics.get(metric)
+            if value is None:
+                missing_metrics.append(metric)
+            elif not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+                invalid_metrics.append(f"{metric}={value}")
+
+        if missing_metrics:
+            return f"数据格式错误：缺少必需的指标字段 {', '.join(missing_metrics)}"
+        if invalid_metrics:
+            return f"数据格式错误：指标值必须为非负数 {', '.join(invalid_metrics)}"
+        return None
+
+    def check_checksums(self, checksums: Dict[str, str]) -> List[str]:
+        """
+        检查提交的MD5
+
+        Returns:
+            MD5不匹配的文件名列表
+        """
+        return [
+            filename for filename, expected_md5 in self.checksums.items()
+            if checksums.get(filename, "") != expected_md5
+        ]
+
+    def check_required_files(self, files: Optional[Dict]) -> List[str]:
+        """
+        检查必需文件是否都已提交且内容不为空（与 storage_service.validate_required_files 相同）
+
+        Args:
+            files: {filename: base64_content}，multipart 上传的文件为 {filename: 文件大小}
+
+        Returns:
+            缺失的文件名列表
+        """
+        if not self.required_files:
+            return []
+        if not files:
+            return list(self.required_files)
+        missing_files = []
+        for filename in self.required_files:
+            content = files.get(filename)
+            if not content or (isinstance(content, str) and not content.strip()):
+                missing_files.append(filename)
+        return missing_files
+
+    def compare(self, metrics_a: Dict, metrics_b: Dict) -> int:
+        """按排行榜的指标顺序比较两组指标（-1: a更优，0: 相同，1: b更优）"""
+        return compare_metrics_in_order(metrics_a, metrics_b, self.metric_order)
+
+
+def get_policy(assignment_id: str) -> Optional[AssignmentPolicy]:
+    """
+    获取作业的编译后规则（作业配置变化时重新编译）
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        作业规则，作业不存在时返回None
+    """
+    global _policies
+    configs = get_cached_assignment_configs()
+    if _policies["configs"] is not configs:
+        with _lock:
+            if _policies["configs"] is not configs:
+                _policies = {
+                    "configs": configs,
+                    "policies": {
+                        aid: AssignmentPolicy(aid, config) for aid, config in configs.items()
+                    }
+                }
+    return _policies["policies"].get(assignment_id)
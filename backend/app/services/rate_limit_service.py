@@ -0,0 +1,330 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .storage_service import DATABASE_DIR, write_json_atomic, get_daily_submission_count
+
+# 每日提交计数的持久化文件（只保存当天的计数）
+# 格式: {"date": "YYYY-MM-DD", "counts": {assignment_id: {student_id: count}}}
+RATE_LIMIT_FILE = DATABASE_DIR / "rate_limits.json"
+
+# 令牌桶默认配置：容量（允许的突发提交数）和每恢复一个令牌所需的秒数
+# 作业配置中的 "rate_limit": {"burst": 5, "refill_seconds": 30} 可覆盖；burst 为0表示不限制
+DEFAULT_BURST = int(os.environ.get("LEADERBOARD_SUBMIT_BURST", "20"))
+DEFAULT_REFILL_SECONDS = float(os.environ.get("LEADERBOARD_SUBMIT_REFILL_SECONDS", "6"))
+
+# 提交预检（dry-run）接口的令牌桶配置，与提交的令牌桶分开计算；burst 为0表示不限制
+VALIDATE_BURST = int(os.environ.get("LEADERBOARD_VALIDATE_BURST", "30"))
+VALIDATE_REFILL_SECONDS = float(os.environ.get("LEADERBOARD_VALIDATE_REFILL_SECONDS", "2"))
+
+# 默认每日最大提交次数（与作业配置中的 max_submissions 对应）
+DEFAULT_MAX_SUBMISSIONS = 100
+
+# 令牌桶 {(student_id, assignment_id): [剩余令牌数, 上次更新时间(monotonic)]}
+# 令牌桶只保存在内存中，服务重启后恢复为满桶
+_buckets: Dict[Tuple[str, str], list] = {}
+
+# 提交预检的令牌桶，格式同上
+_validate_buckets: Dict[Tuple[str, str], list] = {}
+
+# 当天的提交计数 {(student_id, assignment_id): count}
+_daily_date: Optional[str] = None
+_daily_counts: Dict[Tuple[str, str], int] = {}
+
+# _lock 只保护内存中的令牌桶和计数，事件循环中也会获取，持有期间不做任何存储读写
+_lock = threading.Lock()
+
+# 计数写入磁盘时使用的锁，以及计数快照的序号（只写入比已写入的更新的快照）
+_persist_lock = threading.Lock()
+_snapshot_seq = 0
+_written_seq = 0
+
+
+def _today() -> str:
+    """当前UTC日期（YYYY-MM-DD）"""
+    return datetime.utcnow().date().isoformat()
+
+
+def get_bucket_config(assignment_config: Optional[Dict]) -> Tuple[int, float]:
+    """
+    获取作业的令牌桶配置
+
+    Args:
+        assignment_config: 作业配置
+
+    Returns:
+        (容量, 每个令牌的恢复秒数)
+    """
+    rate_limit = (assignment_config or {}).get("rate_limit") or {}
+    return (
+        int(rate_limit.get("burst", DEFAULT_BURST)),
+        float(rate_limit.get("refill_seconds", DEFAULT_REFILL_SECONDS))
+    )
+
+
+def acquire_token(student_id: str, assignment_id: str, assignment_config: Optional[Dict]) -> Optional[float]:
+    """
+    从令牌桶中取一个令牌（O(1)，纯内存操作）
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        assignment_config: 作业配置
+
+    Returns:
+        取到令牌返回None；令牌不足时返回需要等待的秒数
+    """
+    burst, refill_seconds = get_bucket_config(assignment_config)
+    return _take_token(_buckets, (student_id, assignment_id), burst, refill_seconds)
+
+
+def acquire_validate_token(student_id: str, assignment_id: str) -> Optional[float]:
+    """
+    从提交预检的令牌桶中取一个令牌（与提交的令牌桶分开，预检不消耗提交配额）
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+
+    Returns:
+        取到令牌返回None；令牌不足时返回需要等待的秒数
+    """
+    return _take_token(_validate_buckets, (student_id, assignment_id), VALIDATE_BURST, VALIDATE_REFILL_SECONDS)
+
+
+def _take_token(buckets: Dict[Tuple[str, str], list], key: Tuple[str, str], burst: int, refill_seconds: float) -> Optional[float]:
+    """从令牌桶中取一个令牌（burst 为0时不限制）"""
+    if burst <= 0:
+        return None
+
+    now = time.monotonic()
+    with _lock:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [float(burst), now]
+        elif refill_seconds > 0:
+            bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) / refill_seconds)
+            bucket[1] = now
+        else:
+            bucket[0] = float(burst)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return None
+        return (1 - bucket[0]) * refill_seconds
+
+
+def _read_daily_counts(today: str) -> Dict[Tuple[str, str], int]:
+    """读取持久化文件中当天的计数（会读取文件，调用时不得持有锁）"""
+    counts = {}
+    if RATE_LIMIT_FILE.exists():
+        try:
+            with open(RATE_LIMIT_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("date") == today:
+                for assignment_id, students in data.get("counts", {}).items():
+                    for student_id, count in students.items():
+                        counts[(student_id, assignment_id)] = int(count)
+        except (OSError, ValueError, AttributeError):
+            counts = {}
+    return counts
+
+
+def _ensure_loaded() -> None:
+    """首次使用时在锁外读取持久化文件，再在锁内换入（已加载时不读取）"""
+    global _daily_date, _daily_counts
+    if _daily_date is not None:
+        return
+    today = _today()
+    counts = _read_daily_counts(today)
+    with _lock:
+        if _daily_date is None:
+            _daily_date = today
+            _daily_counts = counts
+
+
+def _roll_over() -> None:
+    """日期变化时清空计数（需持有锁，调用前先调用 _ensure_loaded）"""
+    global _daily_date, _daily_counts
+    if _daily_date != _today():
+        _daily_date = _today()
+        _daily_counts = {}
+
+
+def get_max_submissions(assignment_config: Optional[Dict]) -> int:
+    """作业的每日最大提交次数"""
+    return (assignment_config or {}).get("max_submissions", DEFAULT_MAX_SUBMISSIONS)
+
+
+def get_daily_count(student_id: str, assignment_id: str) -> int:
+    """
+    获取学生在指定作业的当日提交次数
+
+    内存中没有该学生当天的计数时，从提交历史计算一次作为初始值
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+
+    Returns:
+        当日提交次数
+    """
+    key = (student_id, assignment_id)
+    _ensure_loaded()
+    with _lock:
+        _roll_over()
+        count = _daily_counts.get(key)
+        date = _daily_date
+    if count is not None:
+        return count
+
+    # 从提交历史计算（遍历提交记录）时不持有锁，写入前再检查一次
+    count = get_daily_submission_count(student_id, assignment_id)
+    with _lock:
+        if _daily_date == date:
+            count = _daily_counts.setdefault(key, count)
+    return count
+
+
+def peek_daily_count(student_id: str, assignment_id: str) -> int:
+    """
+    只读获取学生在指定作业的当日提交次数（用于提交预检）
+
+    与 get_daily_count 相同，但内存中没有计数时只从提交历史计算，不写入内存计数：
+    只做预检的学生不会在内存和持久化文件中留下计数
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+
+    Returns:
+        当日提交次数
+    """
+    _ensure_loaded()
+    with _lock:
+        _roll_over()
+        count = _daily_counts.get((student_id, assignment_id))
+    if count is not None:
+        return count
+    return get_daily_submission_count(student_id, assignment_id)
+
+
+def is_daily_limit_reached(
+    student_id: str,
+    assignment_id: str,
+    assignment_config: Optional[Dict],
+    date: Optional[str] = None
+) -> bool:
+    """
+    判断学生某天的提交次数是否已达到作业的 max_submissions
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        assignment_config: 作业配置
+        date: 日期（YYYY-MM-DD，UTC），默认为今天；
+              不是今天时（排队跨过零点的提交）从提交历史计算该日的次数
+
+    Returns:
+        是否已达到上限
+    """
+    if date is None or date == _today():
+        count = get_daily_count(student_id, assignment_id)
+    else:
+        count = get_daily_submission_count(student_id, assignment_id, date)
+    return count >= get_max_submissions(assignment_config)
+
+
+def is_daily_limit_known_reached(student_id: str, assignment_id: str, assignment_config: Optional[Dict]) -> bool:
+    """
+    只根据内存中已有的计数判断是否达到每日上限（O(1)，不读取任何存储）
+
+    内存中还没有该学生当天的计数时返回False，由后续的完整校验判断
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        assignment_config: 作业配置
+
+    Returns:
+        是否已确定达到上限
+    """
+    with _lock:
+        if _daily_date != _today():
+            return False
+        count = _daily_counts.get((student_id, assignment_id))
+    return count is not None and count >= get_max_submissions(assignment_config)
+
+
+def record_submission(student_id: str, assignment_id: str, date: Optional[str] = None) -> None:
+    """
+    记录一次成功保存的提交（当日计数加一并持久化）
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        date: 提交记录的日期（YYYY-MM-DD，UTC），不是今天时不计入当日计数
+    """
+    if date is not None and date != _today():
+        return
+    key = (student_id, assignment_id)
+    _ensure_loaded()
+    with _lock:
+        _roll_over()
+        if key in _daily_counts:
+            _daily_counts[key] += 1
+            snapshot = _snapshot()
+        else:
+            snapshot = None
+            date = _daily_date
+
+    if snapshot is None:
+        # 提交已写入历史，从历史计算即包含本次提交（不持有锁）。
+        # 同一学生同一作业的提交按作业写锁串行，历史中的次数不会小于期间插入的计数
+        count = get_daily_submission_count(student_id, assignment_id)
+        with _lock:
+            if _daily_date != date:
+                return
+            _daily_counts[key] = max(_daily_counts.get(key, 0), count)
+            snapshot = _snapshot()
+    _write_snapshot(snapshot)
+
+
+def reset_daily_counts(assignment_id: str) -> None:
+    """
+    丢弃指定作业的当日计数（提交历史被批量修改后调用），下次使用时从历史重新计算
+
+    Args:
+        assignment_id: 作业ID
+    """
+    _ensure_loaded()
+    with _lock:
+        _roll_over()
+        for key in [key for key in _daily_counts if key[1] == assignment_id]:
+            del _daily_counts[key]
+        snapshot = _snapshot()
+    _write_snapshot(snapshot)
+
+
+def _snapshot() -> Tuple[int, Dict]:
+    """生成当天计数的紧凑格式快照（需持有锁）"""
+    global _snapshot_seq
+    _snapshot_seq += 1
+    counts: Dict[str, Dict[str, int]] = {}
+    for (student_id, assignment_id), count in _daily_counts.items():
+        counts.setdefault(assignment_id, {})[student_id] = count
+    return _snapshot_seq, {"date": _daily_date, "counts": counts}
+
+
+def _write_snapshot(snapshot: Tuple[int, Dict]) -> None:
+    """把快照写入磁盘（不持有 _lock）；并发写入时跳过比已写入的更旧的快照"""
+    global _written_seq
+    seq, data = snapshot
+    with _persist_lock:
+        if seq <= _written_seq:
+            return
+        write_json_atomic(RATE_LIMIT_FILE, data)
+        _written_seq = seq
@@ -0,0 +1,111 @@
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# 默认最多缓存的响应数量（按作业、视图区分）
+DEFAULT_MAX_ENTRIES = 1024
+
+# 小于该大小的响应不压缩（压缩收益小于开销）
+GZIP_MIN_SIZE = 500
+
+# 压缩级别：每个版本只压缩一次，因此可以使用较高的级别
+GZIP_LEVEL = 6
+
+
+class CachedBody:
+    """一份已编码完成的响应体及其对应的版本和ETag，gzip压缩结果按需生成一次后复用"""
+
+    __slots__ = ("version", "body", "etag", "_gzip")
+
+    def __init__(self, version: Any, body: bytes, etag: str):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self._gzip: Optional[bytes] = None
+
+    @property
+    def compressible(self) -> bool:
+        """响应体是否值得压缩"""
+        return len(self.body) >= GZIP_MIN_SIZE
+
+    @property
+    def gzip_body(self) -> bytes:
+        """gzip压缩后的响应体（同一版本只压缩一次）"""
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+        return self._gzip
+
+
+class ResponseCache:
+    """
+    响应字节缓存
+
+    以 (资源, 视图) 为键保存最终编码好的响应字节，同时记录生成时的版本。
+    读取时版本不一致即视为失效，因此写入方只需递增版本号即可让缓存失效。
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Any) -> Optional[CachedBody]:
+        """
+        获取指定版本的缓存响应
+
+        Args:
+            key: 缓存键
+            version: 当前版本
+
+        Returns:
+            版本一致时返回缓存内容，否则返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: Any, body: bytes, etag: str) -> CachedBody:
+        """
+        写入缓存（覆盖同一键的旧版本）
+
+        Args:
+            key: 缓存键
+            version: 生成该响应时读取到的版本
+            body: 编码后的响应字节
+            etag: 响应ETag
+
+        Returns:
+            缓存条目
+        """
+        entry = CachedBody(version, body, etag)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# 全局响应缓存
+response_cache = ResponseCache()
@@ -0,0 +1,154 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .storage_service import get_leaderboard
+from .version_service import get_leaderboard_version
+
+# 选课名单文件（仓库根目录）
+ROSTER_FILE = Path(__file__).parent.parent.parent.parent / "list.json"
+
+# 已解析的选课名单，文件变化时重新加载
+# 格式: {"signature": (mtime_ns, size) | None, "student_ids": frozenset, "students": {student_id: record}}
+_roster: Dict = {"signature": (-1, -1), "student_ids": frozenset(), "students": {}}
+
+# 每个作业的未提交学生集合，新学生首次进入排行榜时从集合中移除
+# 格式: {assignment_id: {"roster_signature", "leaderboard_version", "remaining": set, "result": dict | None}}
+_not_submitted: Dict[str, Dict] = {}
+
+_lock = threading.RLock()
+
+
+def _roster_signature() -> Optional[Tuple[int, int]]:
+    """名单文件签名（修改时间，大小），文件不存在时返回None"""
+    try:
+        stat = ROSTER_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_roster() -> Dict:
+    """
+    获取已解析的选课名单（名单文件未变化时直接返回内存中的结果）
+
+    Returns:
+        {"signature": 文件签名, "student_ids": 学号集合（字符串）, "students": {学号: 名单记录}}
+    """
+    global _roster
+    signature = _roster_signature()
+    if _roster["signature"] == signature:
+        return _roster
+
+    with _lock:
+        if _roster["signature"] == signature:
+            return _roster
+
+        students = {}
+        if signature is not None:
+            with open(ROSTER_FILE, 'r', encoding='utf-8') as f:
+                for student in json.load(f):
+                    # 将学号转换为字符串
+                    students[str(student['学号'])] = student
+
+        _roster = {
+            "signature": signature,
+            "student_ids": frozenset(students),
+            "students": students
+        }
+        return _roster
+
+
+def is_enrolled(student_id: str) -> bool:
+    """
+    判断学号是否在选课名单中
+
+    Args:
+        student_id: 学生ID
+
+    Returns:
+        是否在名单中
+    """
+    return student_id in get_roster()["student_ids"]
+
+
+def get_students_without_submission(assignment_id: str) -> Dict:
+    """
+    获取指定作业的未提交学生（增量维护，名单或排行榜被外部修改时重新计算）
+
+    返回的字典被多个请求共享，调用方不得修改。
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        {"assignment_id", "count", "student_ids"}，学号按字符串排序
+    """
+    roster = get_roster()
+    state = _not_submitted.get(assignment_id)
+    if (state is None
+            or state["roster_signature"] != roster["signature"]
+            or state["leaderboard_version"] != get_leaderboard_version(assignment_id)):
+        state = _rebuild_state(assignment_id, roster)
+
+    result = state["result"]
+    if result is None:
+        with _lock:
+            result = state["result"]
+            if result is None:
+                student_ids = sorted(state["remaining"])
+                result = state["result"] = {
+                    "assignment_id": assignment_id,
+                    "count": len(student_ids),
+                    "student_ids": student_ids
+                }
+    return result
+
+
+def _rebuild_state(assignment_id: str, roster: Dict) -> Dict:
+    """根据名单和当前排行榜重新计算未提交学生集合"""
+    with _lock:
+        # 先读版本再读排行榜：数据只可能比版本新，下次读取时会再对齐
+        version = get_leaderboard_version(assignment_id)
+        submitted = {entry['student_info']['student_id'] for entry in get_leaderboard(assignment_id)}
+        state = {
+            "roster_signature": roster["signature"],
+            "leaderboard_version": version,
+            "remaining": set(roster["student_ids"] - submitted),
+            "result": None
+        }
+        _not_submitted[assignment_id] = state
+        return state
+
+
+def record_leaderboard_update(
+    assignment_id: str,
+    student_id: str,
+    previous_version: int,
+    version: int
+) -> None:
+    """
+    排行榜更新后同步未提交学生集合
+
+    只有集合与更新前的排行榜版本一致时才增量移除该学生，
+    否则丢弃集合，下次读取时重新计算。
+
+    Args:
+        assignment_id: 作业ID
+        student_id: 本次提交的学生ID
+        previous_version: 更新前的排行榜版本
+        version: 更新后的排行榜版本
+    """
+    with _lock:
+        state = _not_submitted.get(assignment_id)
+        if state is None:
+            return
+        if state["leaderboard_version"] != previous_version:
+            _not_submitted.pop(assignment_id, None)
+            return
+
+        if student_id in state["remaining"]:
+            state["remaining"].discard(student_id)
+            state["result"] = None
+        state["leaderboard_version"] = version
@@ -0,0 +1,213 @@
+import bisect
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from .storage_service import load_assignments, get_assignments_revision
+from .version_service import make_etag
+from ..utils.helpers import hash_string
+
+# 截止时间表：作业配置文件变化时重新解析一次，之后的截止判断都是内存读取
+# 格式: {"revision": int, "assignment_ids": frozenset, "configs": {assignment_id: config},
+#        "deadlines": {assignment_id: datetime}, "ordered": [(datetime, assignment_id)]}
+_schedule: Dict = {"revision": None, "assignment_ids": frozenset(), "configs": {}, "deadlines": {}, "ordered": []}
+
+# 当前活跃作业集合，到达下一个截止时间或配置变化时重新计算
+# 格式: {"revision": int, "next_flip": datetime | None, "active": [...], "last_modified": datetime, "etag": str}
+_active_state: Dict = {"revision": None, "next_flip": None}
+
+_lock = threading.Lock()
+
+
+def parse_deadline(deadline_str: Optional[str]) -> Optional[datetime]:
+    """
+    解析截止时间并统一为UTC时区
+
+    不带时区的时间按UTC处理（与作业配置中的 "Z" 后缀一致）
+
+    Args:
+        deadline_str: ISO格式的截止时间字符串
+
+    Returns:
+        带UTC时区的datetime，为空或格式无效时返回None
+    """
+    if not deadline_str:
+        return None
+    try:
+        deadline = datetime.fromisoformat(deadline_str.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if deadline.tzinfo is None:
+        return deadline.replace(tzinfo=timezone.utc)
+    return deadline.astimezone(timezone.utc)
+
+
+def _utcnow() -> datetime:
+    """当前UTC时间（带时区）"""
+    return datetime.now(timezone.utc)
+
+
+def _get_schedule() -> Dict:
+    """获取截止时间表，作业配置文件修改后重新加载"""
+    global _schedule
+    revision = get_assignments_revision()
+    if _schedule["revision"] == revision:
+        return _schedule
+
+    with _lock:
+        if _schedule["revision"] == revision:
+            return _schedule
+
+        assignments = load_assignments()
+        deadlines = {}
+        for assignment_id, config in assignments.items():
+            deadline_str = config.get("deadline")
+            deadline = parse_deadline(deadline_str)
+            if deadline is not None:
+                deadlines[assignment_id] = deadline
+            elif deadline_str:
+                print(f"⚠️  作业 [{assignment_id}] 截止时间格式无效：{deadline_str}")
+
+        _schedule = {
+            "revision": revision,
+            "assignment_ids": frozenset(assignments),
+            "configs": assignments,
+            "deadlines": deadlines,
+            "ordered": sorted((deadline, assignment_id) for assignment_id, deadline in deadlines.items())
+        }
+        return _schedule
+
+
+def assignment_exists(assignment_id: str) -> bool:
+    """
+    判断作业是否存在于作业配置中（内存读取）
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        是否存在
+    """
+    return assignment_id in _get_schedule()["assignment_ids"]
+
+
+def get_cached_assignment_config(assignment_id: str) -> Optional[Dict]:
+    """
+    获取作业配置（随截止时间表一起缓存，调用方不得修改）
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        作业配置字典，不存在时返回None
+    """
+    return _get_schedule()["configs"].get(assignment_id)
+
+
+def get_cached_assignment_configs() -> Dict[str, Dict]:
+    """
+    获取全部作业配置（随截止时间表一起缓存，配置变化时返回新的字典，调用方不得修改）
+
+    Returns:
+        {assignment_id: config}
+    """
+    return _get_schedule()["configs"]
+
+
+def get_deadline(assignment_id: str) -> Optional[datetime]:
+    """
+    获取作业的截止时间（UTC）
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        截止时间，作业不存在或未设置截止时间时返回None
+    """
+    return _get_schedule()["deadlines"].get(assignment_id)
+
+
+def is_deadline_passed(assignment_id: str, at: Optional[datetime] = None) -> bool:
+    """
+    检查作业是否超过截止时间（内存读取）
+
+    Args:
+        assignment_id: 作业ID
+        at: 判断的时间点（带时区），默认为当前时间
+
+    Returns:
+        是否超时；作业不存在或未设置截止时间时返回False
+    """
+    deadline = get_deadline(assignment_id)
+    return deadline is not None and (at or _utcnow()) > deadline
+
+
+def _count_passed(ordered: List[Tuple[datetime, str]], now: datetime) -> int:
+    """按截止时间排序的列表中已截止（截止时间早于now）的作业数量"""
+    # (deadline, id) < (now,) 当且仅当 deadline < now
+    return bisect.bisect_left(ordered, (now,))
+
+
+def get_passed_assignment_ids() -> List[str]:
+    """
+    获取所有已截止的作业ID
+
+    Returns:
+        已截止的作业ID列表（按截止时间排序）
+    """
+    ordered = _get_schedule()["ordered"]
+    passed_count = _count_passed(ordered, _utcnow())
+    return [assignment_id for _, assignment_id in ordered[:passed_count]]
+
+
+def seconds_until_next_deadline() -> Optional[float]:
+    """
+    距离下一个截止时间的秒数
+
+    Returns:
+        秒数，没有未到期的截止时间时返回None
+    """
+    next_flip = get_active_state()["next_flip"]
+    if next_flip is None:
+        return None
+    return max(0.0, (next_flip - _utcnow()).total_seconds())
+
+
+def get_active_state() -> Dict:
+    """
+    获取当前活跃作业状态
+
+    只有在配置变化或到达下一个截止时间时才重新计算，其余情况直接返回内存中的结果。
+
+    Returns:
+        {"active": 按作业ID排序的未截止作业列表, "next_flip": 下一个截止时间,
+         "last_modified": 活跃集合最后变化时间, "etag": ETag}
+    """
+    global _active_state
+    schedule = _get_schedule()
+    state = _active_state
+    now = _utcnow()
+    if (state["revision"] == schedule["revision"]
+            and (state["next_flip"] is None or now <= state["next_flip"])):
+        return state
+
+    ordered = schedule["ordered"]
+    passed_count = _count_passed(ordered, now)
+    pending = ordered[passed_count:]
+    active = sorted(assignment_id for _, assignment_id in pending)
+
+    # 活跃集合在配置文件修改或最近一次截止时发生变化
+    changed_at = [datetime.fromtimestamp(schedule["revision"] / 1e9, tz=timezone.utc)]
+    if passed_count:
+        changed_at.append(ordered[passed_count - 1][0])
+    last_modified = max(changed_at).replace(microsecond=0)
+
+    state = {
+        "revision": schedule["revision"],
+        "next_flip": pending[0][0] if pending else None,
+        "active": active,
+        "last_modified": last_modified,
+        "etag": make_etag("active", hash_string(repr((schedule["revision"], active)), "sha1")[:16])
+    }
+    _active_state = state
+    return state
@@ -0,0 +1,166 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from .schedule_service import get_cached_assignment_configs
+
+# 提交请求的大小限制默认值
+# 作业配置中的 "upload_limits": {"max_body_bytes": ..., "max_files": ..., "max_file_bytes": ...} 可覆盖
+DEFAULT_MAX_BODY_BYTES = int(os.environ.get("LEADERBOARD_MAX_BODY_BYTES", str(32 * 1024 * 1024)))
+DEFAULT_MAX_FILES = int(os.environ.get("LEADERBOARD_MAX_FILES", "20"))
+DEFAULT_MAX_FILE_BYTES = int(os.environ.get("LEADERBOARD_MAX_FILE_BYTES", str(8 * 1024 * 1024)))
+
+# 拒绝原因
+REASON_BODY = "body_too_large"
+REASON_FILE_COUNT = "too_many_files"
+REASON_FILE_SIZE = "file_too_large"
+REASON_DECOMPRESSED = "decompressed_too_large"
+
+# 中间件把接收到的请求体字节数（压缩请求取压缩前后的较大值）记录在 scope["state"] 的该键下，
+# 解析出作业ID后再按作业自己的 max_body_bytes 检查
+BODY_BYTES_STATE_KEY = "submit_body_bytes"
+
+# 全部作业中最宽松的限制（作业ID在请求体中，接收请求体时只能先按最宽松的限制检查）
+# 格式: {"configs": 计算时的作业配置字典, "limits": (max_body_bytes, max_files, max_file_bytes)}
+_global_limit: Dict = {"configs": None, "limits": None}
+
+# 拒绝统计
+_stats = {
+    "rejected": {REASON_BODY: 0, REASON_FILE_COUNT: 0, REASON_FILE_SIZE: 0, REASON_DECOMPRESSED: 0},
+    # 拒绝前实际接收的字节数
+    "rejected_bytes": 0,
+    # 按 Content-Length 直接拒绝、没有接收的字节数
+    "refused_bytes": 0,
+    # 压缩请求体（Content-Encoding）的数量、压缩后和解压后的总字节数
+    "compressed_requests": 0,
+    "compressed_bytes": 0,
+    "decompressed_bytes": 0
+}
+_stats_lock = threading.Lock()
+
+
+def get_upload_limits(assignment_config: Optional[Dict]) -> Tuple[int, int, int]:
+    """
+    获取作业的提交大小限制
+
+    Args:
+        assignment_config: 作业配置
+
+    Returns:
+        (请求体最大字节数, 最大文件数, 单个文件最大字节数)
+    """
+    limits = (assignment_config or {}).get("upload_limits") or {}
+    return (
+        int(limits.get("max_body_bytes", DEFAULT_MAX_BODY_BYTES)),
+        int(limits.get("max_files", DEFAULT_MAX_FILES)),
+        int(limits.get("max_file_bytes", DEFAULT_MAX_FILE_BYTES))
+    )
+
+
+def get_loosest_limits() -> Tuple[int, int, int]:
+    """
+    全部作业中最宽松的限制（作业配置变化时重新计算）
+
+    作业ID在请求体中，确定作业之前只能先按最宽松的限制检查
+
+    Returns:
+        (请求体最大字节数, 最大文件数, 单个文件最大字节数)
+    """
+    global _global_limit
+    configs = get_cached_assignment_configs()
+    if _global_limit["configs"] is not configs:
+        all_limits = [get_upload_limits(config) for config in configs.values()] + [get_upload_limits(None)]
+        _global_limit = {
+            "configs": configs,
+            "limits": tuple(max(values) for values in zip(*all_limits))
+        }
+    return _global_limit["limits"]
+
+
+def get_max_body_bytes() -> int:
+    """全部作业中最大的请求体限制"""
+    return get_loosest_limits()[0]
+
+
+def body_too_large_detail(max_body_bytes: int) -> str:
+    """请求体过大的错误信息"""
+    return f"提交内容过大：请求体不能超过 {max_body_bytes // 1024} KB"
+
+
+def file_count_detail(max_files: int) -> str:
+    """文件过多的错误信息"""
+    return f"提交文件过多：最多 {max_files} 个文件"
+
+
+def file_size_detail(filename: str, max_file_bytes: int) -> str:
+    """单个文件过大的错误信息"""
+    return f"文件 {filename} 过大：单个文件不能超过 {max_file_bytes // 1024} KB"
+
+
+def check_files(assignment_config: Optional[Dict], file_sizes: Dict[str, int]) -> Optional[Tuple[str, str]]:
+    """
+    按作业的限制检查文件数量和每个文件的大小
+
+    Args:
+        assignment_config: 作业配置
+        file_sizes: {文件名: 解码后的字节数}
+
+    Returns:
+        超出限制时返回 (拒绝原因, 错误信息)，否则返回None
+    """
+    _, max_files, max_file_bytes = get_upload_limits(assignment_config)
+    if len(file_sizes) > max_files:
+        return REASON_FILE_COUNT, file_count_detail(max_files)
+    for filename, size in file_sizes.items():
+        if size > max_file_bytes:
+            return REASON_FILE_SIZE, file_size_detail(filename, max_file_bytes)
+    return None
+
+
+def base64_decoded_size(content: str) -> int:
+    """不解码，按Base64字符串长度计算解码后的字节数"""
+    padding = content[-2:].count("=") if content else 0
+    return len(content) * 3 // 4 - padding
+
+
+def record_rejection(reason: str, received_bytes: int = 0, refused_bytes: int = 0) -> None:
+    """
+    记录一次因大小限制被拒绝的提交
+
+    Args:
+        reason: 拒绝原因
+        received_bytes: 拒绝前已接收的字节数
+        refused_bytes: 没有接收就拒绝的字节数（按 Content-Length）
+    """
+    with _stats_lock:
+        _stats["rejected"][reason] = _stats["rejected"].get(reason, 0) + 1
+        _stats["rejected_bytes"] += received_bytes
+        _stats["refused_bytes"] += refused_bytes
+
+
+def record_decompression(compressed_bytes: int, decompressed_bytes: int) -> None:
+    """
+    记录一次成功解压的压缩请求体
+
+    Args:
+        compressed_bytes: 接收的（压缩后）字节数
+        decompressed_bytes: 解压后的字节数
+    """
+    with _stats_lock:
+        _stats["compressed_requests"] += 1
+        _stats["compressed_bytes"] += compressed_bytes
+        _stats["decompressed_bytes"] += decompressed_bytes
+
+
+def get_limit_stats() -> Dict:
+    """
+    大小限制的拒绝统计和压缩请求体统计
+
+    Returns:
+        {"rejected": {原因: 次数}, "rejected_bytes", "refused_bytes",
+         "compressed_requests", "compressed_bytes", "decompressed_bytes", "max_body_bytes"}
+    """
+    with _stats_lock:
+        stats = {**_stats, "rejected": dict(_stats["rejected"])}
+    stats["max_body_bytes"] = get_max_body_bytes()
+    return stats
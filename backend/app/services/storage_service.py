@@ -1,9 +1,12 @@
 import json
 import os
 import base64
-from typing import Dict, List, Optional
+import shutil
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
+from .version_service import bump_leaderboard_version, bump_history_version
 
 # 数据库目录结构
 DATABASE_DIR = Path(__file__).parent.parent.parent / "database"
@@ -16,6 +19,37 @@ CHECKPOINT_DIR = DATABASE_DIR / "checkpoint"
 CHECKPOINT_SUBMISSIONS_DIR = CHECKPOINT_DIR / "submissions"
 CHECKPOINT_LEADERBOARD_DIR = CHECKPOINT_DIR / "leaderboard"
 FILES_DIR = DATABASE_DIR / "files"
+# multipart 上传的文件内容，按MD5寻址（提交记录中只保存文件名、大小和MD5）
+BLOBS_DIR = DATABASE_DIR / "blobs"
+
+# 复制文件内容时每次读写的字节数
+FILE_COPY_SIZE = 1024 * 1024
+
+# 每个作业一把写锁：提交流程（计数 -> 保存 -> 更新排行榜）在线程池中执行时需要串行化
+_assignment_locks: Dict[str, threading.RLock] = {}
+_assignment_locks_guard = threading.Lock()
+
+# 已解析的提交记录 {assignment_id: ((文件修改时间, 文件大小), submissions)}
+# 提交文件可能很大，每次提交都重新解析会长时间占用GIL，文件未变化时直接复用
+_submissions_cache: Dict[str, Tuple[Tuple[int, int], List[Dict]]] = {}
+
+
+def get_assignment_lock(assignment_id: str) -> threading.RLock:
+    """
+    获取指定作业的写锁
+    
+    Args:
+        assignment_id: 作业ID
+        
+    Returns:
+        可重入锁
+    """
+    with _assignment_locks_guard:
+        lock = _assignment_locks.get(assignment_id)
+        if lock is None:
+            lock = threading.RLock()
+            _assignment_locks[assignment_id] = lock
+        return lock
 
 
 def get_submissions_file(assignment_id: str) -> Path:
@@ -44,6 +78,57 @@ def get_leaderboard_file(assignment_id: str) -> Path:
     return LEADERBOARD_DIR / f"leaderboard_{assignment_id}.json"
 
 
+def write_json_atomic(file_path: Path, data) -> None:
+    """
+    原子方式写入JSON文件（先写临时文件再替换）
+    
+    并发读取时不会读到写了一半的文件
+    
+    Args:
+        file_path: 目标文件路径
+        data: 要写入的数据
+    """
+    # 临时文件名带线程标识，多个线程同时写同一文件时互不覆盖
+    tmp_path = file_path.with_name(f"{file_path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, file_path)
+
+
+def _file_signature(file_path: Path) -> Tuple[int, int]:
+    """文件签名（修改时间，大小），用于判断缓存是否失效"""
+    stat = file_path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_submissions(assignment_id: str) -> List[Dict]:
+    """
+    读取指定作业的提交记录（文件未变化时复用已解析的结果）
+    
+    返回的列表被多个调用方共享，调用方不得修改
+    
+    Args:
+        assignment_id: 作业ID
+        
+    Returns:
+        提交记录列表
+    """
+    ensure_assignment_files_exist(assignment_id)
+    
+    submissions_file = get_submissions_file(assignment_id)
+    signature = _file_signature(submissions_file)
+    cached = _submissions_cache.get(assignment_id)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    with open(submissions_file, 'r', encoding='utf-8') as f:
+        submissions = json.load(f)
+    
+    # 读取期间文件被替换时签名对不上，下次读取会重新解析
+    _submissions_cache[assignment_id] = (signature, submissions)
+    return submissions
+
+
 def ensure_database_exists():
     """确保数据库目录和文件存在"""
     # 创建主目录结构（使用 parents=True 确保父目录也会被创建）
@@ -87,14 +172,25 @@ def ensure_assignment_files_exist(assignment_id: str):
     # 确保提交记录文件存在
     submissions_file = get_submissions_file(assignment_id)
     if not submissions_file.exists():
-        with open(submissions_file, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+        write_json_atomic(submissions_file, [])
     
     # 确保排行榜文件存在
     leaderboard_file = get_leaderboard_file(assignment_id)
     if not leaderboard_file.exists():
-        with open(leaderboard_file, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+        write_json_atomic(leaderboard_file, [])
+
+
+def load_assignments() -> Dict:
+    """
+    读取全部作业配置
+    
+    Returns:
+        {assignment_id: config} 字典
+    """
+    ensure_database_exists()
+    
+    with open(ASSIGNMENTS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 def get_assignment_config(assignment_id: str) -> Optional[Dict]:
@@ -115,28 +211,35 @@ def get_assignment_config(assignment_id: str) -> Optional[Dict]:
     return assignments.get(assignment_id)
 
 
-def is_deadline_passed(assignment_id: str) -> bool:
+def get_assignments_revision() -> int:
+    """
+    获取作业配置文件的修订号（文件修改时间，纳秒）
+    
+    Returns:
+        修订号，配置文件不存在时返回0
+    """
+    try:
+        return ASSIGNMENTS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def is_deadline_passed(assignment_id: str, at: Optional[datetime] = None) -> bool:
     """
     检查作业是否超过截止时间
     
+    截止时间由 schedule_service 预先解析并缓存，这里只做内存比较
+    
     Args:
         assignment_id: 作业ID
+        at: 判断的时间点（带时区），默认为当前时间
         
     Returns:
         是否超时
     """
-    config = get_assignment_config(assignment_id)
-    if not config:
-        return False  # 如果配置不存在，默认未超时
+    from .schedule_service import is_deadline_passed as _is_deadline_passed
     
-    deadline_str = config.get("deadline")
-    if not deadline_str:
-        return False
-    
-    deadline = datetime.fromisoformat(deadline_str.replace('Z', '+00:00'))
-    current_time = datetime.now(deadline.tzinfo)
-    
-    return current_time > deadline
+    return _is_deadline_passed(assignment_id, at)
 
 
 def get_submission_count(student_id: str, assignment_id: str) -> int:
@@ -150,11 +253,7 @@ def get_submission_count(student_id: str, assignment_id: str) -> int:
     Returns:
         总提交次数
     """
-    ensure_assignment_files_exist(assignment_id)
-    
-    submissions_file = get_submissions_file(assignment_id)
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
+    submissions = _load_submissions(assignment_id)
     
     count = sum(
         1 for s in submissions
@@ -176,11 +275,7 @@ def get_daily_submission_count(student_id: str, assignment_id: str, date: Option
     Returns:
         当日提交次数
     """
-    ensure_assignment_files_exist(assignment_id)
-    
-    submissions_file = get_submissions_file(assignment_id)
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
+    submissions = _load_submissions(assignment_id)
     
     # 确定要检查的日期
     if date is None:
@@ -214,16 +309,46 @@ def save_submission(submission: Dict) -> None:
     if not assignment_id:
         raise ValueError("提交记录缺少 assignment_id")
     
-    ensure_assignment_files_exist(assignment_id)
-    
-    submissions_file = get_submissions_file(assignment_id)
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
+    with get_assignment_lock(assignment_id):
+        # 生成新列表而不是原地追加：写入失败时缓存中不会留下未保存的记录
+        submissions = _load_submissions(assignment_id) + [submission]
+        
+        submissions_file = get_submissions_file(assignment_id)
+        write_json_atomic(submissions_file, submissions)
+        _submissions_cache[assignment_id] = (_file_signature(submissions_file), submissions)
+        
+        # 在作业写锁内递增版本并增量更新身份索引，同一作业的写入按顺序计入索引
+        bump_history_version(submission['student_info']['student_id'], assignment_id)
+        _record_identities(assignment_id, [submission])
+
+
+def save_submissions(assignment_id: str, submissions: List[Dict]) -> None:
+    """
+    批量保存提交记录到历史（只写入一次文件）
     
-    submissions.append(submission)
+    Args:
+        assignment_id: 作业ID
+        submissions: 完整的提交记录列表
+    """
+    if not submissions:
+        return
     
-    with open(submissions_file, 'w', encoding='utf-8') as f:
-        json.dump(submissions, f, ensure_ascii=False, indent=2)
+    with get_assignment_lock(assignment_id):
+        all_submissions = _load_submissions(assignment_id) + list(submissions)
+        
+        submissions_file = get_submissions_file(assignment_id)
+        write_json_atomic(submissions_file, all_submissions)
+        _submissions_cache[assignment_id] = (_file_signature(submissions_file), all_submissions)
+        
+        for student_id in {submission['student_info']['student_id'] for submission in submissions}:
+            bump_history_version(student_id, assignment_id)
+        _record_identities(assignment_id, submissions)
+
+
+def _record_identities(assignment_id: str, submissions: List[Dict]) -> None:
+    """把新写入的提交计入学生身份索引（index_service 依赖本模块，在函数内导入）"""
+    from .index_service import record_identities
+    record_identities(assignment_id, submissions)
 
 
 def get_leaderboard(assignment_id: str) -> List[Dict]:
@@ -256,8 +381,9 @@ def update_leaderboard(assignment_id: str, leaderboard: List[Dict]) -> None:
     ensure_assignment_files_exist(assignment_id)
     
     leaderboard_file = get_leaderboard_file(assignment_id)
-    with open(leaderboard_file, 'w', encoding='utf-8') as f:
-        json.dump(leaderboard, f, ensure_ascii=False, indent=2)
+    write_json_atomic(leaderboard_file, leaderboard)
+    
+    bump_leaderboard_version(assignment_id)
 
 
 def get_student_leaderboard_entry(
@@ -305,11 +431,10 @@ def get_student_registered_info(student_id: str) -> Optional[Dict]:
     # 收集所有提交记录（带时间戳）
     all_submissions = []
     
-    for submissions_file in SUBMISSIONS_DIR.glob("submissions_*.json"):
+    for assignment_id in get_all_assignment_ids():
         try:
-            with open(submissions_file, 'r', encoding='utf-8') as f:
-                submissions = json.load(f)
-                
+            submissions = _load_submissions(assignment_id)
+            
             # 查找该学生的提交
             for submission in submissions:
                 if submission['student_info']['student_id'] == student_id:
@@ -359,13 +484,7 @@ def get_all_submissions_for_assignment(assignment_id: str) -> List[Dict]:
     Returns:
         提交记录列表
     """
-    ensure_assignment_files_exist(assignment_id)
-    
-    submissions_file = get_submissions_file(assignment_id)
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
-    
-    return submissions
+    return list(_load_submissions(assignment_id))
 
 
 def get_files_directory(assignment_id: str, student_id: str) -> Path:
@@ -382,6 +501,53 @@ def get_files_directory(assignment_id: str, student_id: str) -> Path:
     return FILES_DIR / assignment_id / student_id
 
 
+def get_blob_path(md5: str) -> Path:
+    """
+    获取上传文件内容在文件存储中的路径
+
+    Args:
+        md5: 文件内容的MD5
+
+    Returns:
+        文件路径
+    """
+    return BLOBS_DIR / md5[:2] / md5
+
+
+def save_blob(md5: str, source: BinaryIO) -> None:
+    """
+    把上传文件内容分块复制到文件存储（阻塞，相同内容只保存一份）
+
+    Args:
+        md5: 文件内容的MD5（由服务端在接收时计算）
+        source: 文件对象，从头开始复制
+    """
+    blob_path = get_blob_path(md5)
+    if blob_path.exists():
+        return
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = blob_path.with_name(f"{md5}.{threading.get_ident()}.tmp")
+    source.seek(0)
+    with open(tmp_path, 'wb') as f:
+        shutil.copyfileobj(source, f, FILE_COPY_SIZE)
+    os.replace(tmp_path, blob_path)
+
+
+def save_submitted_file_refs(assignment_id: str, student_id: str, file_refs: Dict[str, Dict]) -> None:
+    """
+    保存学生提交的文件（multipart 上传：从文件存储分块复制，不经过Base64）
+
+    Args:
+        assignment_id: 作业ID
+        student_id: 学生ID
+        file_refs: 文件引用，格式为 {filename: {"md5": ..., "size": ...}}
+    """
+    student_dir = get_files_directory(assignment_id, student_id)
+    student_dir.mkdir(parents=True, exist_ok=True)
+    for filename, ref in file_refs.items():
+        shutil.copyfile(get_blob_path(ref["md5"]), student_dir / filename)
+
+
 def save_submitted_files(assignment_id: str, student_id: str, files: Dict[str, str]) -> None:
     """
     保存学生提交的文件（Base64解码并存储）
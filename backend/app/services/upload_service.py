@@ -0,0 +1,274 @@
+import hashlib
+import json
+import posixpath
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from .async_storage import run_io
+from .storage_service import save_blob
+from .schedule_service import get_cached_assignment_config
+from .size_limit_service import (
+    REASON_BODY,
+    REASON_FILE_COUNT,
+    REASON_FILE_SIZE,
+    body_too_large_detail,
+    check_files,
+    file_count_detail,
+    file_size_detail,
+    get_loosest_limits,
+    get_upload_limits,
+    record_rejection
+)
+
+# multipart 提交中元数据部分的字段名（JSON：student_info、assignment_id、metrics、checksums、main_contributor）
+SUBMISSION_FIELD = "submission"
+
+# 元数据部分的最大字节数（只包含身份和指标，正常只有几百字节）
+MAX_SUBMISSION_FIELD_SIZE = 64 * 1024
+
+# 单个上传文件在内存中缓冲的上限，超过后写入磁盘临时文件
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """multipart 提交格式错误，或超出大小限制（413，reason 为拒绝原因）"""
+
+    def __init__(self, status_code: int, detail: str, reason: Optional[str] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.reason = reason
+
+
+class UploadedFile:
+    """流式接收的上传文件：内容写入临时文件，同时计算大小和MD5"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.size = 0
+        self._md5 = hashlib.md5()
+
+    @property
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+    @property
+    def in_memory(self) -> bool:
+        return not getattr(self.file, "_rolled", True)
+
+    def write(self, data: bytes) -> None:
+        """写入一块内容（阻塞：已转存到磁盘时在存储线程池中调用）"""
+        self._md5.update(data)
+        self.size += len(data)
+        self.file.write(data)
+
+    def save(self) -> None:
+        """把内容分块复制到文件存储（阻塞）"""
+        save_blob(self.md5, self.file)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _PartCollector:
+    """
+    MultipartParser 回调：收集元数据字段，把文件内容转交给 UploadedFile
+
+    收到 submission 字段之前按全部作业中最宽松的限制检查，之后按该作业的限制检查
+    """
+
+    def __init__(self):
+        self.max_body_bytes, self.max_files, self.max_file_bytes = get_loosest_limits()
+        self.assignment_config: Optional[Dict] = None
+        self.fields: Dict[str, bytes] = {}
+        self.files: Dict[str, UploadedFile] = {}
+        # 本次 write 解析出的待写入文件块（回调中不能等待，解析完一块数据后统一写入）
+        self.pending_writes: List[Tuple[UploadedFile, bytes]] = []
+        self._headers: List[Tuple[bytes, bytes]] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._field_name: Optional[str] = None
+        self._current_file: Optional[UploadedFile] = None
+
+    def on_part_begin(self) -> None:
+        self._headers = []
+        self._field_name = None
+        self._current_file = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers.append((self._header_name.lower(), self._header_value))
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        disposition = dict(self._headers).get(b"content-disposition", b"")
+        _, options = parse_options_header(disposition)
+        if b"name" not in options:
+            raise UploadError(400, "multipart 格式错误：缺少字段名（Content-Disposition name）")
+        self._field_name = options[b"name"].decode("utf-8", errors="replace")
+
+        if b"filename" not in options:
+            if self._field_name in self.fields:
+                raise UploadError(400, f"multipart 格式错误：字段 {self._field_name} 重复")
+            self.fields[self._field_name] = b""
+            return
+
+        # 只保留文件名本身，防止路径穿越
+        filename = options[b"filename"].decode("utf-8", errors="replace")
+        filename = posixpath.basename(filename.replace("\\", "/"))
+        if not filename or filename in (".", ".."):
+            raise UploadError(400, "multipart 格式错误：文件名无效")
+        if filename in self.files:
+            raise UploadError(400, f"multipart 格式错误：文件 {filename} 重复")
+        if len(self.files) >= self.max_files:
+            raise UploadError(413, file_count_detail(self.max_files), REASON_FILE_COUNT)
+        self._current_file = self.files[filename] = UploadedFile(filename)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current_file is not None:
+            self.pending_writes.append((self._current_file, data[start:end]))
+            return
+
+        value = self.fields[self._field_name] + data[start:end]
+        if len(value) > MAX_SUBMISSION_FIELD_SIZE:
+            raise UploadError(413, f"字段 {self._field_name} 过大（最大 {MAX_SUBMISSION_FIELD_SIZE} 字节）")
+        self.fields[self._field_name] = value
+
+    def on_part_end(self) -> None:
+        if self._current_file is None and self._field_name == SUBMISSION_FIELD:
+            self._resolve_assignment()
+        self._current_file = None
+
+    def _resolve_assignment(self) -> None:
+        """收到 submission 字段后按其中的作业ID切换为该作业的大小限制（格式错误留到最后报告）"""
+        try:
+            assignment_id = json.loads(self.fields[SUBMISSION_FIELD]).get("assignment_id")
+        except (ValueError, AttributeError):
+            return
+        config = get_cached_assignment_config(assignment_id) if isinstance(assignment_id, str) else None
+        if config is not None:
+            self.assignment_config = config
+            self.max_body_bytes, self.max_files, self.max_file_bytes = get_upload_limits(config)
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+def close_files(files: Dict[str, UploadedFile]) -> None:
+    """关闭（删除）上传文件的临时文件"""
+    for uploaded in files.values():
+        uploaded.close()
+
+
+async def parse_submission_upload(
+    content_type: str,
+    stream: AsyncIterator[bytes]
+) -> Tuple[Dict, Dict[str, UploadedFile]]:
+    """
+    流式解析 multipart/form-data 提交（需在事件循环中调用）
+
+    格式：一个名为 submission 的 JSON 字段（不含 files），其余每个文件一个文件部分，
+    文件名即提交的文件名。文件内容边接收边写入临时文件并计算MD5，
+    超过 SPOOL_MAX_SIZE 的文件转存到磁盘，内存占用与文件大小无关。
+    请求体大小、文件数量和单个文件大小在接收过程中检查，超出时立即返回413。
+
+    Args:
+        content_type: 请求的 Content-Type
+        stream: 请求体数据流
+
+    Returns:
+        (元数据字典, {文件名: UploadedFile})，调用方用完后需调用 close_files
+
+    Raises:
+        UploadError: 格式错误
+    """
+    mime_type, params = parse_options_header(content_type)
+    if mime_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError(415, "请求格式错误：需要 multipart/form-data")
+
+    collector = _PartCollector()
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    received = 0
+    try:
+        async for chunk in stream:
+            received += len(chunk)
+            if received > collector.max_body_bytes:
+                raise UploadError(413, body_too_large_detail(collector.max_body_bytes), REASON_BODY)
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadError(400, f"multipart 格式错误：{str(e)}")
+            for uploaded, data in collector.pending_writes:
+                if uploaded.size + len(data) > collector.max_file_bytes:
+                    raise UploadError(413, file_size_detail(uploaded.filename, collector.max_file_bytes), REASON_FILE_SIZE)
+                if uploaded.in_memory and uploaded.file.tell() + len(data) <= SPOOL_MAX_SIZE:
+                    uploaded.write(data)
+                else:
+                    await run_io(uploaded.write, data)
+            collector.pending_writes.clear()
+        parser.finalize()
+
+        if SUBMISSION_FIELD not in collector.fields:
+            raise UploadError(400, f"multipart 格式错误：缺少 {SUBMISSION_FIELD} 字段")
+        try:
+            metadata = json.loads(collector.fields[SUBMISSION_FIELD])
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise UploadError(400, f"{SUBMISSION_FIELD} 字段不是有效的JSON：{str(e)}")
+        if not isinstance(metadata, dict):
+            raise UploadError(400, f"{SUBMISSION_FIELD} 字段必须为JSON对象")
+
+        # submission 字段之前收到的文件只按最宽松的限制检查过，这里按作业的限制再检查一次
+        violation = check_files(collector.assignment_config, {
+            filename: uploaded.size for filename, uploaded in collector.files.items()
+        })
+        if violation is not None:
+            raise UploadError(413, violation[1], violation[0])
+    except BaseException as e:
+        close_files(collector.files)
+        if isinstance(e, UploadError) and e.reason is not None:
+            record_rejection(e.reason, received_bytes=received)
+        raise
+
+    return metadata, collector.files
+
+
+def get_file_refs(files: Dict[str, UploadedFile]) -> Dict[str, Dict]:
+    """
+    生成提交记录使用的文件引用 {filename: {"md5": ..., "size": ...}}
+
+    Args:
+        files: 上传文件
+
+    Returns:
+        文件引用字典
+    """
+    return {filename: {"md5": uploaded.md5, "size": uploaded.size} for filename, uploaded in files.items()}
+
+
+def save_uploaded_files(files: Dict[str, UploadedFile]) -> None:
+    """
+    把上传文件保存到文件存储（阻塞，在提交通过校验之后、写入提交记录之前调用）
+
+    Args:
+        files: 上传文件
+    """
+    for uploaded in files.values():
+        uploaded.save()
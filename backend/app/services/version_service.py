@@ -0,0 +1,150 @@
+import threading
+import time
+from typing import Dict, Tuple
+from urllib.parse import quote
+
+# 进程启动标识：版本号只在进程内单调递增，重启后通过该标识让旧ETag全部失效
+# 注意：版本号保存在进程内存中，要求以单进程方式运行服务（与 uvi.sh 一致）
+_EPOCH = format(time.time_ns(), "x")
+
+_lock = threading.Lock()
+
+# 排行榜版本 {assignment_id: version}
+_leaderboard_versions: Dict[str, int] = {}
+
+# 学生提交历史版本 {(student_id, assignment_id): version}
+_history_versions: Dict[Tuple[str, str], int] = {}
+
+# 作业提交记录整体版本 {assignment_id: version}，任一学生新增提交都会递增
+_submissions_versions: Dict[str, int] = {}
+
+
+def get_leaderboard_version(assignment_id: str) -> int:
+    """
+    获取指定作业排行榜的当前版本号
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        版本号（进程启动后从0开始单调递增）
+    """
+    return _leaderboard_versions.get(assignment_id, 0)
+
+
+def bump_leaderboard_version(assignment_id: str) -> int:
+    """
+    排行榜写入后递增版本号
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        新的版本号
+    """
+    with _lock:
+        version = _leaderboard_versions.get(assignment_id, 0) + 1
+        _leaderboard_versions[assignment_id] = version
+    return version
+
+
+def get_history_version(student_id: str, assignment_id: str) -> int:
+    """
+    获取学生在指定作业的提交历史版本号
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+
+    Returns:
+        版本号
+    """
+    return _history_versions.get((student_id, assignment_id), 0)
+
+
+def bump_history_version(student_id: str, assignment_id: str) -> int:
+    """
+    学生新增提交记录后递增版本号
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+
+    Returns:
+        新的版本号
+    """
+    key = (student_id, assignment_id)
+    with _lock:
+        version = _history_versions.get(key, 0) + 1
+        _history_versions[key] = version
+        _submissions_versions[assignment_id] = _submissions_versions.get(assignment_id, 0) + 1
+    return version
+
+
+def get_submissions_version(assignment_id: str) -> int:
+    """
+    获取指定作业全部提交记录的版本号
+
+    Args:
+        assignment_id: 作业ID
+
+    Returns:
+        版本号
+    """
+    return _submissions_versions.get(assignment_id, 0)
+
+
+def get_process_epoch() -> str:
+    """
+    获取进程启动标识（版本号只在同一个进程内可以比较）
+
+    Returns:
+        进程启动标识
+    """
+    return _EPOCH
+
+
+def make_etag(kind: str, *parts) -> str:
+    """
+    根据资源类型和版本信息生成弱ETag
+
+    Args:
+        kind: 资源类型，例如 "lb"、"sub"
+        *parts: 标识资源及其版本的各个部分
+
+    Returns:
+        弱ETag字符串，例如 W/"lb-01-3-...-18a2f..."
+    """
+    # 对各部分做URL编码，保证ETag中只含可安全放入响应头的ASCII字符
+    tag = "-".join([kind, *(quote(str(p), safe="") for p in parts), _EPOCH])
+    return f'W/"{tag}"'
+
+
+def leaderboard_etag(assignment_id: str, version: int, config_revision: int) -> str:
+    """
+    生成排行榜响应的ETag（响应中包含作业配置，因此也包含配置修订号）
+
+    Args:
+        assignment_id: 作业ID
+        version: 排行榜版本号
+        config_revision: 作业配置文件修订号
+
+    Returns:
+        弱ETag字符串
+    """
+    return make_etag("lb", assignment_id, version, config_revision)
+
+
+def history_etag(student_id: str, assignment_id: str, version: int) -> str:
+    """
+    生成学生提交历史响应的ETag
+
+    Args:
+        student_id: 学生ID
+        assignment_id: 作业ID
+        version: 提交历史版本号
+
+    Returns:
+        弱ETag字符串
+    """
+    return make_etag("sub", student_id, assignment_id, version)
@@ -0,0 +1,36 @@
+from typing import Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..services.admission_service import AdmissionRejected, admit_route
+
+
+class SubmitAdmissionMiddleware:
+    """
+    提交路由的准入控制（ASGI 中间件）
+
+    在接收和解析请求体之前获取名额：过载时直接返回503和 Retry-After，
+    被拒绝的提交不会占用接收请求体、JSON解析和模型校验的开销。
+    名额一直保持到响应发送完成。
+    """
+
+    def __init__(self, app: ASGIApp, paths: Tuple[str, ...] = ("/api/submit", "/api/submit/upload")):
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with admit_route(scope["path"]):
+                await self.app(scope, receive, send)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                {"detail": e.reason},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
@@ -0,0 +1,77 @@
+from typing import Tuple
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..services.size_limit_service import (
+    BODY_BYTES_STATE_KEY,
+    REASON_BODY,
+    body_too_large_detail,
+    get_max_body_bytes,
+    record_rejection
+)
+
+
+class BodySizeLimitMiddleware:
+    """
+    提交请求体大小限制（ASGI 中间件）
+
+    在请求体被解析之前生效：
+    - Content-Length 超过限制时直接返回413，不读取请求体
+    - 否则边接收边计数，超过限制时立即中止读取并返回413（分块传输或 Content-Length 不准确时）
+
+    作业ID在请求体中，这里按全部作业中最大的 max_body_bytes 限制，并把接收的字节数
+    记录在 scope["state"] 中；解析后再按作业自己的请求体大小、文件数量和文件大小限制检查。
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: Tuple[str, ...] = ("/api/submit",)):
+        self.app = app
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or not scope["path"].startswith(self.path_prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        max_body_bytes = get_max_body_bytes()
+        content_length = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    content_length = None
+                break
+
+        if content_length is not None and content_length > max_body_bytes:
+            record_rejection(REASON_BODY, refused_bytes=content_length)
+            response = JSONResponse(
+                {"detail": body_too_large_detail(max_body_bytes)},
+                status_code=413,
+                headers={"Connection": "close"}
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        state = scope.setdefault("state", {})
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                state[BODY_BYTES_STATE_KEY] = max(state.get(BODY_BYTES_STATE_KEY, 0), received)
+                if received > max_body_bytes:
+                    record_rejection(REASON_BODY, received_bytes=received)
+                    # HTTPException 会穿过请求体解析，由 FastAPI 转换为413响应
+                    raise HTTPException(
+                        status_code=413,
+                        detail=body_too_large_detail(max_body_bytes),
+                        headers={"Connection": "close"}
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
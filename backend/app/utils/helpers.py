@@ -1,6 +1,13 @@
 from datetime import datetime
 from typing import Any
 import hashlib
+import json
+import math
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
 
 
 def get_current_timestamp() -> str:
@@ -55,3 +62,64 @@ def format_score(score: float, precision: int = 6) -> str:
     """
     return f"{score:.{precision}f}"
 
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    将数据编码为紧凑的UTF-8 JSON字节（与FastAPI默认JSONResponse输出一致）
+    
+    安装了 orjson 时使用 orjson 编码，orjson 不支持的数据（如超出64位的整数）
+    回退到标准库 json。NaN 和 Infinity 不是合法的JSON，两种编码方式都输出为 null
+    （orjson 的行为；标准库需先替换）
+    
+    Args:
+        data: 可JSON序列化的数据
+        
+    Returns:
+        JSON字节串
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    try:
+        return _dumps(data)
+    except ValueError:
+        # 数据中有 NaN/Infinity（只在出错时才遍历替换，正常数据不受影响）
+        return _dumps(_replace_non_finite(data))
+
+
+def _dumps(data: Any) -> bytes:
+    """标准库 json 编码（不允许 NaN/Infinity）"""
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _replace_non_finite(data: Any) -> Any:
+    """把数据中的 NaN/Infinity 替换为None"""
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _replace_non_finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_replace_non_finite(value) for value in data]
+    return data
+
+
+def compute_etag(content: bytes) -> str:
+    """
+    根据内容计算强ETag
+    
+    Args:
+        content: 响应体字节
+        
+    Returns:
+        带引号的ETag字符串，例如 "\"3f2a...\""
+    """
+    return '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
@@ -0,0 +1,58 @@
+from typing import Optional
+from fastapi import Request
+
+
+def accepts_gzip(request: Request) -> bool:
+    """
+    判断客户端是否接受gzip编码的响应
+
+    Args:
+        request: 请求对象
+
+    Returns:
+        Accept-Encoding 中是否包含可用的 gzip
+    """
+    accept_encoding = request.headers.get("accept-encoding", "")
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        if parts[0].strip().lower() not in ("gzip", "*"):
+            continue
+        # 处理 q=0 表示明确拒绝的情况
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    if float(value) == 0:
+                        break
+                except ValueError:
+                    break
+        else:
+            return True
+    return False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断 If-None-Match 请求头是否与当前ETag匹配（弱比较）
+
+    Args:
+        if_none_match: If-None-Match 请求头的值
+        etag: 当前资源的ETag
+
+    Returns:
+        是否匹配（匹配时应返回304）
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
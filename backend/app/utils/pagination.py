@@ -0,0 +1,49 @@
+import base64
+import json
+from typing import Dict, Optional
+
+# 单页最多返回的条目数
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(data: Dict) -> str:
+    """
+    将游标数据编码为不透明的字符串
+
+    Args:
+        data: 游标数据，例如 {"r": 50} 或 {"s": 12}
+
+    Returns:
+        URL安全的base64字符串
+    """
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], key: str) -> Optional[int]:
+    """
+    解析游标字符串中的位置信息
+
+    Args:
+        cursor: 游标字符串（可能为None）
+        key: 位置字段名
+
+    Returns:
+        游标中的整数位置，未提供游标时返回None
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value = data[key]
+    except (ValueError, KeyError, TypeError, UnicodeEncodeError):
+        raise ValueError("无效的分页游标")
+
+    if not isinstance(value, int) or value < 0:
+        raise ValueError("无效的分页游标")
+    return value
@@ -0,0 +1,85 @@
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# 排行榜条目可选择的顶层字段
+LEADERBOARD_FIELDS = frozenset({
+    "rank", "student_info", "score", "metrics", "timestamp", "submission_count", "main_contributor"
+})
+
+# 提交记录可选择的顶层字段
+SUBMISSION_FIELDS = frozenset({
+    "student_info", "assignment_id", "submission_data"
+})
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[Tuple[str, ...]]:
+    """
+    解析 fields 查询参数
+
+    支持顶层字段（如 "score"）和一级嵌套字段（如 "student_info.nickname"），
+    以逗号分隔。结果经过去重和排序，可直接作为缓存键。
+
+    Args:
+        fields: 查询参数原始值，例如 "rank,score,student_info.nickname"
+        allowed: 允许的顶层字段集合
+
+    Returns:
+        规范化后的字段元组，未指定时返回None
+
+    Raises:
+        ValueError: 包含不允许的字段
+    """
+    if fields is None:
+        return None
+
+    parsed = set()
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        top, _, sub = field.partition(".")
+        if top not in allowed or "." in sub:
+            raise ValueError(f"不支持的字段：{field}")
+        parsed.add(field)
+
+    if not parsed:
+        raise ValueError("fields 参数不能为空")
+
+    # 选择了整个顶层字段时，其嵌套字段无需单独保留
+    return tuple(sorted(
+        f for f in parsed
+        if "." not in f or f.partition(".")[0] not in parsed
+    ))
+
+
+@lru_cache(maxsize=256)
+def get_projector(fields: Tuple[str, ...]) -> Callable[[Dict], Dict]:
+    """
+    获取指定字段集合的投影函数（按字段集合缓存）
+
+    Args:
+        fields: parse_fields 返回的规范化字段元组
+
+    Returns:
+        输入一条记录、返回只包含所选字段的新字典的函数
+    """
+    top_fields = []
+    nested_fields: Dict[str, list] = {}
+    for field in fields:
+        top, _, sub = field.partition(".")
+        if sub:
+            nested_fields.setdefault(top, []).append(sub)
+        else:
+            top_fields.append(field)
+    nested_items = tuple((top, tuple(subs)) for top, subs in nested_fields.items())
+    top_fields = tuple(top_fields)
+
+    def project(record: Dict) -> Dict:
+        result = {key: record[key] for key in top_fields if key in record}
+        for top, subs in nested_items:
+            value = record.get(top)
+            if isinstance(value, dict):
+                result[top] = {sub: value[sub] for sub in subs if sub in value}
+        return result
+
+    return project
@@ -0,0 +1,169 @@
+import zlib
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..services.size_limit_service import (
+    BODY_BYTES_STATE_KEY,
+    REASON_DECOMPRESSED,
+    get_max_body_bytes,
+    record_decompression,
+    record_rejection
+)
+
+# zstd 为可选依赖：安装 zstandard 后才接受 Content-Encoding: zstd
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 取决于运行环境
+    zstandard = None
+
+# 支持的请求体编码
+GZIP_ENCODINGS = (b"gzip", b"x-gzip")
+ZSTD_ENCODING = b"zstd"
+
+
+class _GzipDecoder:
+    """gzip 流式解码，每次最多输出 limit 字节，防止解压炸弹一次性占满内存"""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decode(self, data: bytes, limit: int) -> bytes:
+        output = self._decompressor.decompress(data, limit + 1)
+        while self._decompressor.unconsumed_tail and len(output) <= limit:
+            output += self._decompressor.decompress(self._decompressor.unconsumed_tail, limit + 1 - len(output))
+        return output
+
+    def finish(self) -> bytes:
+        if not self._decompressor.eof:
+            raise zlib.error("gzip 数据不完整")
+        return self._decompressor.flush()
+
+
+class _ZstdDecoder:
+    """
+    zstd 解码，输出同样不超过 limit + 1 字节
+
+    zstandard 的 decompressobj 不能限制输出大小，stream_reader 可以，但它在输入读完时即认为
+    数据结束，不能边接收边喂入。因此先缓存压缩数据（大小已由外层的 BodySizeLimitMiddleware 限制），
+    接收完成后用 stream_reader 分块读取，超过 limit 后立即停止解压。
+    """
+
+    def __init__(self):
+        self._compressed = bytearray()
+        self._limit = 0
+
+    def decode(self, data: bytes, limit: int) -> bytes:
+        self._compressed += data
+        self._limit = limit
+        return b""
+
+    def finish(self) -> bytes:
+        reader = zstandard.ZstdDecompressor().stream_reader(self._compressed, read_across_frames=True)
+        output = bytearray()
+        with reader:
+            while len(output) <= self._limit:
+                chunk = reader.read(self._limit + 1 - len(output))
+                if not chunk:
+                    break
+                output += chunk
+        return bytes(output)
+
+
+def _content_encoding(scope: Scope) -> Optional[bytes]:
+    for name, value in scope["headers"]:
+        if name == b"content-encoding":
+            return value.strip().lower()
+    return None
+
+
+def _decoded_scope(scope: Scope) -> Scope:
+    """去掉 Content-Encoding / Content-Length：应用看到的是解压后的请求体"""
+    headers = [
+        (name, value) for name, value in scope["headers"]
+        if name not in (b"content-encoding", b"content-length")
+    ]
+    return {**scope, "headers": headers}
+
+
+class RequestDecompressionMiddleware:
+    """
+    解压提交请求体（ASGI 中间件）
+
+    接受 Content-Encoding: gzip（以及安装 zstandard 后的 zstd），边接收边解压。
+    解压后的大小按全部作业中最大的 max_body_bytes 限制，超出时立即中止并返回413，
+    防止解压炸弹；压缩前的大小由外层的 BodySizeLimitMiddleware 限制。
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: Tuple[str, ...] = ("/api/submit",)):
+        self.app = app
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or not scope["path"].startswith(self.path_prefixes)):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _content_encoding(scope)
+        if encoding in (None, b"", b"identity"):
+            await self.app(scope, receive, send)
+            return
+
+        if encoding in GZIP_ENCODINGS:
+            decoder = _GzipDecoder()
+        elif encoding == ZSTD_ENCODING and zstandard is not None:
+            decoder = _ZstdDecoder()
+        else:
+            supported = "gzip, zstd" if zstandard is not None else "gzip"
+            response = JSONResponse(
+                {"detail": f"不支持的请求体编码：{encoding.decode('latin-1')}（支持 {supported}）"},
+                status_code=415
+            )
+            await response(scope, receive, send)
+            return
+
+        max_body_bytes = get_max_body_bytes()
+        state = scope.setdefault("state", {})
+        compressed = 0
+        decompressed = 0
+        finished = False
+
+        async def decoded_receive() -> Message:
+            nonlocal compressed, decompressed, finished
+            if finished:
+                return await receive()
+
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+
+            data = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            compressed += len(data)
+            try:
+                output = decoder.decode(data, max_body_bytes - decompressed)
+                # 先检查大小再结束解压：被截断输出的解压炸弹应返回413而不是“数据不完整”
+                if decompressed + len(output) <= max_body_bytes and not more_body:
+                    output += decoder.finish()
+            except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as e:
+                raise HTTPException(status_code=400, detail=f"请求体解压失败：{str(e)}")
+
+            decompressed += len(output)
+            state[BODY_BYTES_STATE_KEY] = max(state.get(BODY_BYTES_STATE_KEY, 0), decompressed)
+            if decompressed > max_body_bytes:
+                record_rejection(REASON_DECOMPRESSED, received_bytes=compressed)
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"提交内容过大：解压后不能超过 {max_body_bytes // 1024} KB",
+                    headers={"Connection": "close"}
+                )
+
+            if not more_body:
+                finished = True
+                record_decompression(compressed, decompressed)
+            return {"type": "http.request", "body": output, "more_body": more_body}
+
+        await self.app(_decoded_scope(scope), decoded_receive, send)
@@ -0,0 +1,23 @@
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from .helpers import encode_json
+
+
+class FastJSONResponse(Response):
+    """
+    直接编码为JSON字节的响应类
+
+    不经过 jsonable_encoder 的递归转换，也不会按 response_model 再校验一遍：
+    字典和列表直接用 encode_json 编码，pydantic 模型直接导出JSON。
+    只应用于内部生成、已可信的数据。
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return encode_json(content)
@@ -0,0 +1,67 @@
+"""
+批量导入提交记录（重新评分、数据迁移）
+
+把 JSONL 文件（每行一条提交记录）流式上传到后端的管理接口：
+POST /api/admin/assignments/{assignment_id}/import
+
+每行格式：
+{"student_info": {"student_id": "...", "name": "...", "nickname": "..."},
+ "metrics": {...}, "main_contributor": "human",
+ "checksums": {...}, "files": {...}, "timestamp": "2025-11-01T12:00:00Z"}
+其中 checksums、files、timestamp 可选。
+
+用法：
+    export LEADERBOARD_ADMIN_TOKEN=...
+    python import_submissions.py 02 regraded_02.jsonl [--server http://localhost:8000] [--atomic]
+"""
+
+import argparse
+import os
+import sys
+
+import requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入提交记录（JSONL）")
+    parser.add_argument("assignment_id", help="作业ID")
+    parser.add_argument("jsonl_file", help="JSONL 文件路径，每行一条提交记录")
+    parser.add_argument("--server", default="http://localhost:8000", help="后端地址")
+    parser.add_argument("--token", default=os.environ.get("LEADERBOARD_ADMIN_TOKEN"),
+                        help="管理接口令牌（默认读取环境变量 LEADERBOARD_ADMIN_TOKEN）")
+    parser.add_argument("--atomic", action="store_true", help="任一记录校验失败则整批不导入")
+    args = parser.parse_args()
+
+    if not args.token:
+        print("❌ 缺少管理接口令牌：请使用 --token 或设置环境变量 LEADERBOARD_ADMIN_TOKEN")
+        return 1
+
+    url = f"{args.server.rstrip('/')}/api/admin/assignments/{args.assignment_id}/import"
+    with open(args.jsonl_file, 'rb') as f:
+        # 传入文件对象时 requests 边读边发送，不会把整个文件读入内存
+        response = requests.post(
+            url,
+            data=f,
+            params={"atomic": "true"} if args.atomic else None,
+            headers={"Content-Type": "application/x-ndjson", "X-Admin-Token": args.token},
+            timeout=600
+        )
+
+    if response.status_code != 200:
+        print(f"❌ 导入失败（HTTP {response.status_code}）: {response.json().get('detail')}")
+        return 1
+
+    report = response.json()
+    print(f"作业 [{report['assignment_id']}]：共 {report['received']} 条，"
+          f"导入 {report['imported']} 条，失败 {report['failed']} 条")
+    for error in report["errors"]:
+        print(f"  第 {error['line']} 行（{error['student_id']}）: {error['detail']}")
+    if report["failed"] and not report["imported"] and args.atomic:
+        print("⚠ 使用了 --atomic，存在失败记录，整批未导入")
+    if report["leaderboard_version"] is not None:
+        print(f"✓ 排行榜已更新（版本 {report['leaderboard_version']}）")
+    return 0 if not report["failed"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,9 @@ import os
 import pandas as pd
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
+import gzip
 import hashlib
+import json
 import requests
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +21,22 @@ STUDENT_ID_FILE = os.path.join(current_dir, '.student_id')
 # ================================================
 
 
+def wait_for_submission(status_url, timeout=120, interval=1.0):
+    """轮询排队提交的处理状态，返回提交结果；处理失败或超时返回None"""
+    base_url = LEADERBOARD_URL.split('/api/', 1)[0]
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = requests.get(base_url + status_url, timeout=10).json()
+        if status.get('status') == 'completed':
+            return status['result']
+        if status.get('status') == 'failed':
+            print(f"❌ 提交失败: {status['error']['detail']}")
+            return None
+        time.sleep(interval)
+    print(f"⚠️ 提交仍在处理中，可稍后访问 {base_url + status_url} 查看结果")
+    return None
+
+
 def compute_file_md5(filepath):
     """计算文件的MD5哈希值"""
     md5_hash = hashlib.md5()
@@ -181,22 +199,39 @@ if __name__ == "__main__":
 
     try:
         print("\n正在提交到leaderboard...")
+        # 使用提交队列：服务端校验后立即返回提交ID，截止前高峰期也不会超时
+        # 幂等键由提交内容决定：超时后重新运行脚本提交相同结果时，服务端直接返回首次提交的结果，不会重复记录
+        idempotency_key = hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=float).encode('utf-8')
+        ).hexdigest()
+        # 请求体gzip压缩后上传（服务端按 Content-Encoding 解压），减少上传流量和时间
+        body = gzip.compress(json.dumps(payload, default=float).encode('utf-8'), compresslevel=6)
         response = requests.post(
             LEADERBOARD_URL,
-            json=payload,
-            headers={'Content-Type': 'application/json'},
+            params={'queue': 'true'},
+            data=body,
+            headers={
+                'Content-Type': 'application/json',
+                'Content-Encoding': 'gzip',
+                'Idempotency-Key': idempotency_key
+            },
             timeout=10
         )
 
-        if response.status_code == 200:
+        if response.status_code == 202:
+            result = wait_for_submission(response.json()['status_url'])
+        elif response.status_code == 200:
             result = response.json()
+        else:
+            result = None
+            print(f"❌ 提交失败: {response.text}")
+
+        if result is not None:
             print("✅ 提交成功!")
-            if 'rank' in result:
-                print(f"🏆 当前排名: {result['rank']}")
+            if result.get('current_rank') is not None:
+                print(f"🏆 当前排名: {result['current_rank']}")
             if 'message' in result:
                 print(f"📝 {result['message']}")
-        else:
-            print(f"❌ 提交失败: {response.text}")
 
     except Exception as e:
         print(f"❌ 提交错误: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+事件循环阻塞基准测试
+
+在写入大提交的同时轮询 /api/health 和排行榜接口，对比空闲时和写入期间的
+p50 / p99 延迟。阻塞的文件读写移到线程池后，两组延迟应基本持平。
+
+用法：先启动后端服务，再运行 python bench_event_loop.py
+"""
+
+import base64
+import os
+import threading
+import time
+
+import requests
+
+# ==================== 配置区 ====================
+BASE_URL = "http://localhost:8000"
+ASSIGNMENT_ID = "02"
+CORRECT_MD5 = "a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6"
+LARGE_FILE_SIZE = 8 * 1024 * 1024  # 每个文件的原始大小（字节）
+WRITER_SUBMISSIONS = 5             # 写入期间发送的大提交数量
+PROBE_DURATION = 5.0               # 空闲阶段的采样时长（秒）
+# ================================================
+
+
+def percentile(samples, pct):
+    """计算百分位数（毫秒）"""
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+def probe(url, stop_event, samples):
+    """持续请求指定接口并记录延迟"""
+    session = requests.Session()
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        session.get(url, timeout=30)
+        samples.append(time.perf_counter() - start)
+
+
+def large_submission(index):
+    """构造一次包含大文件的提交"""
+    content = base64.b64encode(os.urandom(LARGE_FILE_SIZE)).decode()
+    return {
+        "student_info": {
+            "student_id": f"bench_{index:03d}",
+            "name": f"基准测试{index}",
+            "nickname": f"bench{index}"
+        },
+        "assignment_id": ASSIGNMENT_ID,
+        "metrics": {"Accuracy": 0.5, "Prediction_Time": 1.0},
+        "checksums": {"evaluate.py": CORRECT_MD5},
+        "files": {"solution.py": content, "model.py": content},
+        "main_contributor": "human"
+    }
+
+
+def run_phase(name, writer=None):
+    """运行一个采样阶段，返回各接口的延迟样本"""
+    urls = {
+        "health": f"{BASE_URL}/api/health",
+        "leaderboard": f"{BASE_URL}/api/leaderboard/{ASSIGNMENT_ID}",
+    }
+    samples = {key: [] for key in urls}
+    stop_event = threading.Event()
+    threads = [
+        threading.Thread(target=probe, args=(url, stop_event, samples[key]))
+        for key, url in urls.items()
+    ]
+    for thread in threads:
+        thread.start()
+
+    if writer is None:
+        time.sleep(PROBE_DURATION)
+    else:
+        writer()
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"\n[{name}]")
+    for key, values in samples.items():
+        print(f"  {key:<12} n={len(values):<5} "
+              f"p50={percentile(values, 50):8.2f}ms  "
+              f"p99={percentile(values, 99):8.2f}ms  "
+              f"max={max(values) * 1000 if values else float('nan'):8.2f}ms")
+    return samples
+
+
+def write_large_submissions():
+    """依次发送多个大提交"""
+    payloads = [large_submission(i) for i in range(WRITER_SUBMISSIONS)]
+    start = time.perf_counter()
+    for payload in payloads:
+        response = requests.post(f"{BASE_URL}/api/submit", json=payload, timeout=120)
+        if response.status_code != 200:
+            print(f"  ⚠️  提交失败: {response.status_code} {response.text[:200]}")
+    print(f"\n写入 {WRITER_SUBMISSIONS} 个大提交耗时 {time.perf_counter() - start:.2f}s")
+
+
+def main():
+    print("=" * 60)
+    print("事件循环阻塞基准测试")
+    print("=" * 60)
+
+    idle = run_phase("空闲")
+    busy = run_phase("写入大提交期间", writer=write_large_submissions)
+
+    print("\n" + "=" * 60)
+    for key in idle:
+        print(f"{key:<12} p99 空闲 {percentile(idle[key], 99):8.2f}ms -> "
+              f"写入期间 {percentile(busy[key], 99):8.2f}ms")
+    print("=" * 60)
+    print("注意：基准测试会写入 bench_* 学生的提交记录，请在测试环境中运行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+JSON 响应编码基准测试
+
+对比 1000 条排行榜数据在三种响应路径下的编码耗时：
+1. response_model 路径：按 List[LeaderboardEntry] 校验后再经 jsonable_encoder 转换
+2. 普通字典路径：jsonable_encoder 递归转换后由 JSONResponse 编码
+3. FastJSONResponse：直接编码为字节（安装 orjson 时使用 orjson）
+
+用法：python bench_json_response.py（无需启动后端服务）
+"""
+
+import sys
+import timeit
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.submission import LeaderboardEntry
+from app.utils import helpers
+from app.utils.responses import FastJSONResponse
+
+# ==================== 配置区 ====================
+ENTRY_COUNT = 1000   # 排行榜条目数
+REPEAT = 50          # 每种路径的重复次数
+# ================================================
+
+
+def build_leaderboard(count):
+    """构造带排名的排行榜数据"""
+    return [
+        {
+            "rank": i + 1,
+            "student_info": {
+                "student_id": f"5128590{i:04d}",
+                "name": f"学生{i}",
+                "nickname": f"nick{i}"
+            },
+            "score": 0.9 - i * 1e-4,
+            "metrics": {"Accuracy": 0.9 - i * 1e-4, "Prediction_Time": 1.0 + i * 1e-3},
+            "timestamp": "2025-11-01T12:00:00.000000Z",
+            "submission_count": i % 20 + 1,
+            "main_contributor": "human"
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    leaderboard = build_leaderboard(ENTRY_COUNT)
+    adapter = TypeAdapter(List[LeaderboardEntry])
+
+    def response_model_path():
+        validated = adapter.validate_python(leaderboard)
+        return JSONResponse(jsonable_encoder(validated)).body
+
+    def dict_path():
+        return JSONResponse(jsonable_encoder(leaderboard)).body
+
+    def fast_path():
+        return FastJSONResponse(leaderboard).body
+
+    encoder = "orjson" if helpers.orjson is not None else "json"
+    print("=" * 60)
+    print(f"JSON 响应编码基准测试（{ENTRY_COUNT} 条排行榜，encode_json 使用 {encoder}）")
+    print("=" * 60)
+
+    baseline = None
+    for name, func in [
+        ("response_model + jsonable_encoder", response_model_path),
+        ("jsonable_encoder + JSONResponse", dict_path),
+        ("FastJSONResponse", fast_path),
+    ]:
+        func()  # 预热
+        elapsed = min(timeit.repeat(func, number=REPEAT, repeat=3)) / REPEAT * 1000
+        baseline = baseline or elapsed
+        print(f"{name:<36} {elapsed:8.3f} ms/次  ({baseline / elapsed:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
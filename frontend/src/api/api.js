@@ -99,5 +99,14 @@ export const getActiveAssignment = () => {
   return api.get('/active-assignment');
 };
 
+/**
+ * 批量读取：一次请求执行多个读取操作
+ * @param {Array<Object>} operations - 读取操作列表，例如 [{op: 'assignments'}, {op: 'leaderboard', assignment_id: '02'}]
+ * @returns {Promise<Object>} {results: [{id, op, status, data | detail}]}，顺序与请求一致
+ */
+export const batchRead = (operations) => {
+  return api.post('/batch', { operations });
+};
+
 export default api;
 
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getLeaderboard, getAllAssignments, getStudentsWithoutSubmission, getActiveAssignment } from '../api/api';
+import { getLeaderboard, getStudentsWithoutSubmission, batchRead } from '../api/api';
 import './LeaderboardTable.css';
 
 const LeaderboardTable = ({ onStudentClick }) => {
@@ -24,14 +24,24 @@ const LeaderboardTable = ({ onStudentClick }) => {
   useEffect(() => {
     const fetchAssignments = async () => {
       try {
-        // 获取所有作业列表
-        const allAssignments = await getAllAssignments();
-        const assignmentIds = Object.keys(allAssignments).sort();
+        // 一次请求同时获取作业列表和当前活跃的作业
+        const { results } = await batchRead([
+          { op: 'assignments' },
+          { op: 'active_assignment' },
+        ]);
+        const [assignmentsResult, activeResult] = results;
+        if (assignmentsResult.status !== 200) {
+          throw new Error(assignmentsResult.detail);
+        }
+        const assignmentIds = Object.keys(assignmentsResult.data).sort();
         setAssignments(assignmentIds);
         
         // 获取当前活跃的作业（未过截止时间的第一个）
         try {
-          const activeData = await getActiveAssignment();
+          if (activeResult.status !== 200) {
+            throw new Error(activeResult.detail);
+          }
+          const activeData = activeResult.data;
           if (activeData.assignment_id && assignmentIds.includes(activeData.assignment_id)) {
             // 如果有活跃的作业，选择它
             setSelectedAssignment(activeData.assignment_id);
@@ -5,13 +5,53 @@
 2. 缺少必需的指标字段
 3. 指标值为负数
 4. 正常提交
+6. multipart 上传提交
+7. multipart 格式错误
+8. 提交内容过大（413：请求体、文件数量、单个文件大小）
+9. 压缩请求体（gzip 正常提交、解压炸弹、损坏的数据）
+10. 提交预检（dry-run）
+11. 排行榜条件请求（If-None-Match 返回304）
+12. 提交历史游标分页（翻页之间有新提交）
+13. 幂等提交（Idempotency-Key 重放）
 """
 
 import requests
 import json
+import base64
+import gzip
+import uuid
 
 BASE_URL = "http://localhost:8000"
 
+
+def make_submission_02(accuracy=0.9):
+    """构造作业02的提交元数据（不含文件内容）"""
+    return {
+        "student_info": {
+            "student_id": "10225101460",
+            "name": "测试学生",
+            "nickname": "Tester"
+        },
+        "assignment_id": "02",
+        "metrics": {
+            "Accuracy": accuracy,
+            "Prediction_Time": 1.2
+        },
+        "checksums": {
+            "evaluate.py": "a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6"
+        },
+        "main_contributor": "human"
+    }
+
+
+def print_response(response):
+    """打印状态码和响应内容"""
+    print(f"状态码: {response.status_code}")
+    try:
+        print(f"响应: {json.dumps(response.json(), ensure_ascii=False, indent=2)}")
+    except ValueError:
+        print(f"响应: {response.text}")
+
 def test_invalid_assignment_id():
     """测试无效的作业ID"""
     print("\n=== 测试1: 无效的作业ID ===")
@@ -156,6 +196,258 @@ def test_missing_all_metrics():
         print(f"错误: {e}")
 
 
+def make_valid_submission_02(accuracy=0.9):
+    """构造作业02可以通过校验的提交（包含必需文件）"""
+    data = make_submission_02(accuracy)
+    data["files"] = {"solution.py": base64.b64encode(b"print('x')\n").decode(), "model.py": base64.b64encode(b"print('y')\n").decode()}
+    return data
+
+
+def test_multipart_upload():
+    """测试 multipart 上传提交（文件以文件部分上传，MD5由服务端计算）"""
+    print("\n=== 测试6: multipart 上传提交 ===")
+    
+    files = [
+        ("solution.py", ("solution.py", b"print('solution')\n")),
+        ("model.py", ("model.py", b"print('model')\n"))
+    ]
+    
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/submit/upload",
+            data={"submission": json.dumps(make_submission_02(), ensure_ascii=False)},
+            files=files
+        )
+        print_response(response)
+        
+        # 提交历史只返回文件清单，文件内容按需获取
+        history = requests.get(f"{BASE_URL}/api/submissions/10225101460/02")
+        latest = history.json()[0]["submission_data"] if history.ok and history.json() else None
+        if latest:
+            print(f"文件清单: {json.dumps(latest['file_manifest'], ensure_ascii=False)}")
+            file_response = requests.get(
+                f"{BASE_URL}/api/submissions/10225101460/02/{latest['submission_count']}/files/solution.py"
+            )
+            print(f"文件内容: {file_response.status_code} {file_response.content!r}")
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+def test_multipart_parse_errors():
+    """测试 multipart 格式错误（缺少 submission 字段、submission 不是JSON、不是 multipart）"""
+    print("\n=== 测试7: multipart 格式错误 ===")
+    
+    cases = [
+        ("缺少 submission 字段", {"data": {"other": "1"}, "files": [("solution.py", ("solution.py", b"x"))]}),
+        ("submission 不是JSON", {"data": {"submission": "not json"}, "files": [("solution.py", ("solution.py", b"x"))]}),
+        ("不是 multipart", {"json": make_submission_02()})
+    ]
+    
+    for name, kwargs in cases:
+        try:
+            print(f"--- {name} ---")
+            response = requests.post(f"{BASE_URL}/api/submit/upload", **kwargs)
+            print_response(response)
+        except Exception as e:
+            print(f"错误: {e}")
+
+
+def test_submission_too_large():
+    """测试提交内容过大（默认限制：请求体32MB、20个文件、单个文件8MB，作业配置 upload_limits 可覆盖）"""
+    print("\n=== 测试8: 提交内容过大 ===")
+    
+    small_file = base64.b64encode(b"print('x')\n").decode()
+    
+    # 请求体超过限制：按 Content-Length 直接拒绝，或接收过程中超过限制时中止
+    big_body = make_submission_02()
+    big_body["files"] = {"solution.py": small_file, "model.py": small_file, "data.txt": "QUFB" * (9 * 1024 * 1024)}
+    
+    # 文件数量超过限制
+    many_files = make_submission_02()
+    many_files["files"] = {f"file_{i}.py": small_file for i in range(21)}
+    
+    # 单个文件超过限制（multipart 上传，接收过程中检查）
+    big_file = [("data.bin", ("data.bin", b"0" * (8 * 1024 * 1024 + 1)))]
+    
+    cases = [
+        ("请求体过大", {"url": "/api/submit", "json": big_body}),
+        ("文件数量过多", {"url": "/api/submit", "json": many_files}),
+        ("单个文件过大", {
+            "url": "/api/submit/upload",
+            "data": {"submission": json.dumps(make_submission_02(), ensure_ascii=False)},
+            "files": big_file
+        })
+    ]
+    
+    for name, kwargs in cases:
+        try:
+            print(f"--- {name} ---")
+            url = kwargs.pop("url")
+            response = requests.post(f"{BASE_URL}{url}", **kwargs)
+            print_response(response)
+        except Exception as e:
+            print(f"错误: {e}")
+    
+    # 作业自己的请求体限制（作业配置了 upload_limits.max_body_bytes 时）
+    try:
+        print("--- 超过作业的 max_body_bytes ---")
+        assignments = requests.get(f"{BASE_URL}/api/assignments").json()
+        max_body_bytes = (assignments.get("02", {}).get("upload_limits") or {}).get("max_body_bytes")
+        if max_body_bytes is None:
+            print("作业02未配置 upload_limits.max_body_bytes，跳过")
+        else:
+            data = make_submission_02()
+            data["files"] = {"solution.py": small_file, "model.py": small_file, "data.txt": "QUFB" * (max_body_bytes // 4 + 1)}
+            print_response(requests.post(f"{BASE_URL}/api/submit", json=data))
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+def test_compressed_submission():
+    """测试压缩请求体（Content-Encoding: gzip）"""
+    print("\n=== 测试9: 压缩请求体 ===")
+    
+    small_file = base64.b64encode(b"print('x')\n").decode()
+    data = make_submission_02()
+    data["files"] = {"solution.py": small_file, "model.py": small_file}
+    
+    # 解压炸弹：压缩后只有几十KB，解压后超过请求体限制，应在解压过程中返回413
+    bomb = b'{"padding": "' + b" " * (40 * 1024 * 1024) + b'"}'
+    
+    cases = [
+        ("gzip 正常提交", gzip.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))),
+        ("解压炸弹", gzip.compress(bomb)),
+        ("损坏的 gzip 数据", gzip.compress(json.dumps(data).encode("utf-8"))[:-20] + b"corrupted")
+    ]
+    
+    for name, content in cases:
+        try:
+            print(f"--- {name}（压缩后 {len(content)} 字节） ---")
+            response = requests.post(
+                f"{BASE_URL}/api/submit",
+                data=content,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+            )
+            print_response(response)
+        except Exception as e:
+            print(f"错误: {e}")
+
+
+def test_validate_dry_run():
+    """测试提交预检：返回全部未通过的校验项和今日剩余提交次数，不记录提交"""
+    print("\n=== 测试10: 提交预检（dry-run） ===")
+    
+    valid = make_valid_submission_02()
+    
+    # 多项校验同时失败：姓名与绑定信息不一致、指标为负数、MD5不匹配、缺少必需文件
+    invalid = make_submission_02(accuracy=-1)
+    invalid["student_info"]["name"] = "其他姓名"
+    invalid["checksums"] = {"evaluate.py": "00000000000000000000000000000000"}
+    
+    for name, data in (("校验通过", valid), ("多项校验失败", invalid)):
+        try:
+            print(f"--- {name} ---")
+            response = requests.post(f"{BASE_URL}/api/submit/validate", json=data)
+            print_response(response)
+        except Exception as e:
+            print(f"错误: {e}")
+    
+    # 预检按学生限流（与提交的令牌桶分开），短时间内过多预检返回429
+    try:
+        print("--- 连续预检 ---")
+        status_codes = [
+            requests.post(f"{BASE_URL}/api/submit/validate", json=valid).status_code
+            for _ in range(40)
+        ]
+        print(f"状态码统计: 200={status_codes.count(200)}, 429={status_codes.count(429)}")
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+def test_leaderboard_not_modified():
+    """测试排行榜条件请求：携带上次的ETag请求，排行榜未变化时返回304且没有响应体"""
+    print("\n=== 测试11: 排行榜条件请求（If-None-Match） ===")
+    
+    try:
+        first = requests.get(f"{BASE_URL}/api/leaderboard/02")
+        etag = first.headers.get("ETag")
+        print(f"首次请求: {first.status_code} ETag={etag} Cache-Control={first.headers.get('Cache-Control')}")
+        
+        second = requests.get(f"{BASE_URL}/api/leaderboard/02", headers={"If-None-Match": etag or ""})
+        print(f"携带 If-None-Match: {second.status_code} 响应体 {len(second.content)} 字节 ETag={second.headers.get('ETag')}")
+        print(f"结果: {'通过' if second.status_code == 304 and not second.content else '失败'}")
+        
+        # 不匹配的ETag返回完整内容
+        third = requests.get(f"{BASE_URL}/api/leaderboard/02", headers={"If-None-Match": '"stale"'})
+        print(f"过期的ETag: {third.status_code}")
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+def test_history_cursor_pagination():
+    """测试提交历史游标分页：翻页之间有新提交时，后续页不重复也不遗漏"""
+    print("\n=== 测试12: 提交历史游标分页 ===")
+    
+    url = f"{BASE_URL}/api/submissions/10225101460/02"
+    
+    try:
+        # 至少需要两条历史记录才能翻页
+        for _ in range(2):
+            requests.post(f"{BASE_URL}/api/submit", json=make_valid_submission_02())
+        
+        expected = [item["submission_data"]["submission_count"] for item in requests.get(url).json()]
+        
+        first_page = requests.get(url, params={"limit": 1}).json()
+        print(f"第一页: total={first_page['total']} next_cursor={first_page['next_cursor']}")
+        
+        # 翻页之间插入一次新提交
+        print_response(requests.post(f"{BASE_URL}/api/submit", json=make_valid_submission_02(accuracy=0.95)))
+        
+        pages = [first_page]
+        while pages[-1]["next_cursor"]:
+            pages.append(requests.get(url, params={"limit": 1, "cursor": pages[-1]["next_cursor"]}).json())
+        
+        seen = [item["submission_data"]["submission_count"] for page in pages for item in page["submissions"]]
+        print(f"翻页得到的提交序号: {seen}")
+        print(f"翻页前的提交序号: {expected}")
+        print(f"结果: {'通过' if seen == expected else '失败'}")
+    except Exception as e:
+        print(f"错误: {e}")
+
+
+def test_idempotent_replay():
+    """测试幂等提交：同一个 Idempotency-Key 重试时重放首次响应，不重复记录提交"""
+    print("\n=== 测试13: 幂等提交（Idempotency-Key） ===")
+    
+    key = str(uuid.uuid4())
+    data = make_valid_submission_02(accuracy=0.91)
+    history_url = f"{BASE_URL}/api/submissions/10225101460/02"
+    
+    try:
+        first = requests.post(f"{BASE_URL}/api/submit", json=data, headers={"Idempotency-Key": key})
+        print_response(first)
+        count_after_first = len(requests.get(history_url).json())
+        
+        second = requests.post(f"{BASE_URL}/api/submit", json=data, headers={"Idempotency-Key": key})
+        print(f"重试: {second.status_code} Idempotent-Replayed={second.headers.get('Idempotent-Replayed')}")
+        count_after_second = len(requests.get(history_url).json())
+        
+        replayed = (
+            second.status_code == first.status_code
+            and second.content == first.content
+            and second.headers.get("Idempotent-Replayed") == "true"
+            and count_after_second == count_after_first
+        )
+        print(f"结果: {'通过' if replayed else '失败'}")
+        
+        # 同一个键用于内容不同的提交返回422
+        changed = make_valid_submission_02(accuracy=0.92)
+        print("--- 同一个键、不同内容 ---")
+        print_response(requests.post(f"{BASE_URL}/api/submit", json=changed, headers={"Idempotency-Key": key}))
+    except Exception as e:
+        print(f"错误: {e}")
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("提交验证测试")
@@ -167,6 +459,14 @@ if __name__ == "__main__":
     test_negative_metrics()
     test_valid_submission()
     test_missing_all_metrics()
+    test_multipart_upload()
+    test_multipart_parse_errors()
+    test_submission_too_large()
+    test_compressed_submission()
+    test_validate_dry_run()
+    test_leaderboard_not_modified()
+    test_history_cursor_pagination()
+    test_idempotent_replay()
     
     print("\n" + "=" * 60)
     print("测试完成")